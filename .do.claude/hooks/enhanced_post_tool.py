@@ -9,17 +9,20 @@ from datetime import datetime
 def send_notification(title, message):
     if platform.system() == "Darwin":
         script = f'display notification "{message}" with title "{title}"'
-        subprocess.run(["osascript", "-e", script], capture_output=True)
+        try:
+            subprocess.run(["osascript", "-e", script], capture_output=True, timeout=5)
+        except subprocess.TimeoutExpired:
+            pass  # A stuck notification daemon must not stall the hook
 
 def create_checkpoint():
     try:
         result = subprocess.run(["git", "status", "--porcelain"], 
-                              capture_output=True, text=True)
+                              capture_output=True, text=True, timeout=30)
         if result.returncode == 0 and result.stdout.strip():
-            subprocess.run(["git", "add", "."], capture_output=True)
+            subprocess.run(["git", "add", "."], capture_output=True, timeout=30)
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             commit_msg = f"Auto-checkpoint: {timestamp}\n\n🤖 Generated with [Claude Code](https://claude.ai/code)"
-            subprocess.run(["git", "commit", "-m", commit_msg], capture_output=True)
+            subprocess.run(["git", "commit", "-m", commit_msg], capture_output=True, timeout=30)
             send_notification("📁 Auto-Checkpoint", "Progress saved")
     except Exception:
         pass
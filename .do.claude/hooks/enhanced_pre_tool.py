@@ -8,7 +8,10 @@ import platform
 def send_notification(title, message):
     if platform.system() == "Darwin":
         script = f'display notification "{message}" with title "{title}"'
-        subprocess.run(["osascript", "-e", script], capture_output=True)
+        try:
+            subprocess.run(["osascript", "-e", script], capture_output=True, timeout=5)
+        except subprocess.TimeoutExpired:
+            pass  # A stuck notification daemon must not stall the hook
 
 def validate_command(command):
     safe_patterns = [r'^ls', r'^cat', r'^grep', r'^find', r'^git (status|log|diff)']
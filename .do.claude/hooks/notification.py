@@ -11,11 +11,14 @@ def main():
     
     if platform.system() == "Darwin":  # macOS
         script = f'display notification "{message}" with title "{title}"'
-        subprocess.run(["osascript", "-e", script], capture_output=True)
+        try:
+            subprocess.run(["osascript", "-e", script], capture_output=True, timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
     elif platform.system() == "Linux":
         try:
-            subprocess.run(["notify-send", title, message], capture_output=True)
-        except FileNotFoundError:
+            subprocess.run(["notify-send", title, message], capture_output=True, timeout=5)
+        except (FileNotFoundError, subprocess.TimeoutExpired):
             pass
     
     print(json.dumps({"ok": True}))
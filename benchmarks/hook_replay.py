@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+End-to-end replay of hook traffic through a generated settings.json
+
+Usage: hook_replay.py [--trace FILE ...] [--sessions N] [--tools-per-session N]
+                      [--concurrency N] [--rate EVENTS_PER_SECOND]
+                      [--project-type generic] [--settings FILE]
+                      [--output FILE] [--keep]
+
+Sessions come from trace files recorded with CLAUDE_HOOK_TRACE=1
+(.do.claude/logs/trace_*.log[.gz]) or are synthesized. Each session replays its
+events in order, running every command that settings.json configures for the
+event exactly as Claude Code would (stdin payload, project cwd, settings
+environment). Sessions run in parallel up to --concurrency, and --rate caps
+events per second across all sessions. The scratch project is a git repo and
+replayed writes touch real files, so checkpoint costs are included.
+"""
+import os
+import sys
+import json
+import gzip
+import time
+import shlex
+import random
+import shutil
+import fcntl
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from hook_bench import (HOOKS_SOURCE, REPO_DIR, SAFE_COMMANDS, DEV_COMMANDS, STANDARD_COMMANDS,
+                        percentile)
+
+GENERATE_SETTINGS = os.path.join(REPO_DIR, 'setup-templates', 'scripts', 'generate-settings.py')
+FILE_TOOLS = ["write", "edit", "multi_edit"]
+
+def load_trace(paths):
+    """Recorded events grouped by session, in recording order"""
+    sessions = {}
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                sessions.setdefault(record.get("session_id", "unknown"), []).append(record)
+    for events in sessions.values():
+        events.sort(key=lambda record: record.get("ts", 0))
+    return sessions
+
+def synthetic_sessions(count, tools_per_session, seed=11):
+    """Sessions shaped like real ones: reads and searches, edits, some commands"""
+    rng = random.Random(seed)
+    sessions = {}
+    for s in range(count):
+        events = [{"event": "notification", "payload": {"event_type": "session_start"}}]
+        for i in range(tools_per_session):
+            roll = rng.random()
+            if roll < 0.35:
+                tool, parameters = "bash", {"command": rng.choice(SAFE_COMMANDS + DEV_COMMANDS + STANDARD_COMMANDS)}
+            elif roll < 0.65:
+                tool, parameters = rng.choice(FILE_TOOLS), {"file_path": f"src/module_{rng.randrange(40)}.py"}
+            elif roll < 0.85:
+                tool, parameters = "read", {"file_path": f"src/module_{rng.randrange(40)}.py"}
+            else:
+                tool, parameters = "grep", {"pattern": "TODO", "path": "src"}
+            events.append({"event": "pre_tool_use", "payload": {"tool_name": tool, "parameters": parameters}})
+            events.append({"event": "post_tool_use", "payload": {
+                "tool_name": tool,
+                "parameters": parameters,
+                "exit_code": 0 if rng.random() > 0.05 else 1,
+                "duration_ms": rng.randrange(5, 3000)
+            }})
+        events.append({"event": "stop", "payload": {"total_tools_used": tools_per_session, "duration_ms": 1800000}})
+        sessions[f"synthetic-{s}"] = events
+    return sessions
+
+class RateLimiter:
+    """Spaces events evenly at `rate` per second across all threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            slot = max(self.next_slot, time.monotonic())
+            self.next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+class Project:
+    """Scratch git project with the hooks and a settings.json installed"""
+
+    def __init__(self, project_type, settings_file=None):
+        self.root = tempfile.mkdtemp(prefix="hook-replay-")
+        self.claude_dir = os.path.join(self.root, '.do.claude')
+        shutil.copytree(HOOKS_SOURCE, os.path.join(self.claude_dir, 'hooks'),
+                        ignore=shutil.ignore_patterns('__pycache__'))
+
+        if settings_file:
+            with open(settings_file, 'r') as f:
+                self.settings = json.load(f)
+        else:
+            output = subprocess.run([sys.executable, GENERATE_SETTINGS, project_type],
+                                    capture_output=True, text=True, check=True).stdout
+            self.settings = json.loads(output)
+        with open(os.path.join(self.claude_dir, 'settings.json'), 'w') as f:
+            json.dump(self.settings, f, indent=2)
+
+        os.makedirs(os.path.join(self.root, 'src'))
+        for i in range(40):
+            with open(os.path.join(self.root, 'src', f'module_{i}.py'), 'w') as f:
+                f.write(f"# module {i}\n")
+        for args in (["init", "-q"], ["config", "user.name", "Hook Replay"],
+                     ["config", "user.email", "replay@localhost"], ["add", "."],
+                     ["commit", "-q", "-m", "Initial commit"]):
+            subprocess.run(["git"] + args, cwd=self.root, capture_output=True)
+
+        self.env = dict(os.environ)
+        self.env.update(self.settings.get("environment", {}))
+        self.env["CLAUDE_HOOK_DAEMON_IDLE"] = "10"  # Don't leave daemons behind for long
+
+    def commands(self, event, payload):
+        """Commands settings.json runs for an event with this payload"""
+        commands = []
+        for entry in self.settings.get("hooks", {}).get(event, []):
+            if matches(entry.get("match", {}), payload):
+                commands += entry.get("run", [])
+        return commands
+
+    def argv(self, command):
+        argv = shlex.split(command)
+        if argv[0].endswith(".py"):
+            return [sys.executable, os.path.join(self.claude_dir, argv[0])] + argv[1:]
+        return argv
+
+    def local_path(self, file_path, trace_cwd=None):
+        """Where a traced file path lives inside the scratch project"""
+        if os.path.isabs(file_path):
+            rel = os.path.relpath(file_path, trace_cwd) if trace_cwd else os.path.basename(file_path)
+            if rel.startswith(".."):
+                rel = os.path.join("replayed", os.path.basename(file_path))
+        else:
+            rel = file_path
+        return os.path.join(self.root, rel)
+
+    def wait_for_background(self, timeout=90):
+        """Wait until the hook daemon, checkpoint worker and notification dispatcher have exited"""
+        deadline = time.time() + timeout
+        for name in ("hookd.lock", "checkpoint.lock", "notify.lock"):
+            path = os.path.join(self.claude_dir, 'run', name)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'a') as lock:
+                while True:
+                    try:
+                        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except OSError:
+                        if time.time() > deadline:
+                            return False
+                        time.sleep(0.5)
+        return True
+
+    def commit_count(self):
+        result = subprocess.run(["git", "rev-list", "--all", "--count"], cwd=self.root,
+                                capture_output=True, text=True)
+        return int(result.stdout.strip() or 0)
+
+def matches(match, payload):
+    """Whether a settings.json hook matcher applies to a payload"""
+    if not match or not isinstance(payload, dict):
+        return True
+    tools = match.get("tool_name", match.get("tools"))
+    if tools is None:
+        return True
+    tools = [tools] if isinstance(tools, str) else tools
+    return payload.get("tool_name") in tools
+
+def prepare(project, record, session_id):
+    """Rewrite a recorded payload for the scratch project and apply its file effect"""
+    payload = record.get("payload")
+    if not isinstance(payload, dict):
+        return payload
+    payload = json.loads(json.dumps(payload))
+    parameters = payload.get("parameters")
+    if isinstance(parameters, dict) and isinstance(parameters.get("file_path"), str):
+        path = project.local_path(parameters["file_path"], record.get("cwd"))
+        parameters["file_path"] = path
+        if record["event"] == "post_tool_use" and payload.get("tool_name") in FILE_TOOLS:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a") as f:
+                f.write(f"# {session_id} {time.time()}\n")
+    return payload
+
+def replay_session(project, session_id, events, limiter):
+    """Replay one session's events in order, returning per-event timings"""
+    env = dict(project.env, CLAUDE_SESSION_ID=f"replay-{session_id}")
+    timings = []
+    for record in events:
+        payload = prepare(project, record, session_id)
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        for command in project.commands(record["event"], payload):
+            limiter.wait()
+            started = time.perf_counter()
+            subprocess.run(project.argv(command), input=data.encode(), cwd=project.root, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append((record["event"], (time.perf_counter() - started) * 1000))
+    return session_id, timings
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.50), 2),
+        "p95_ms": round(percentile(values, 0.95), 2),
+        "p99_ms": round(percentile(values, 0.99), 2),
+        "max_ms": round(values[-1], 2) if values else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay hook traffic through the full hook pipeline")
+    parser.add_argument("--trace", action="append", default=[], help="Recorded trace file (repeatable)")
+    parser.add_argument("--sessions", type=int, default=8, help="Synthetic sessions when no trace is given")
+    parser.add_argument("--tools-per-session", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4, help="Sessions replayed in parallel")
+    parser.add_argument("--rate", type=float, default=0, help="Max hook invocations per second (0 = unlimited)")
+    parser.add_argument("--project-type", default="generic", help="Project type for generate-settings.py")
+    parser.add_argument("--settings", help="Use this settings.json instead of generating one")
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch project")
+    args = parser.parse_args()
+
+    sessions = load_trace(args.trace) if args.trace else synthetic_sessions(args.sessions, args.tools_per_session)
+    project = Project(args.project_type, args.settings)
+    commits_before = project.commit_count()
+    limiter = RateLimiter(args.rate)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        results = list(pool.map(lambda item: replay_session(project, item[0], item[1], limiter), sessions.items()))
+    wall = time.perf_counter() - started
+
+    by_event, per_session = {}, {}
+    for session_id, timings in results:
+        per_session[session_id] = sum(ms for _, ms in timings)
+        for event, ms in timings:
+            by_event.setdefault(event, []).append(ms)
+    total_calls = sum(len(values) for values in by_event.values())
+
+    report = {
+        "sessions": len(sessions),
+        "hook_invocations": total_calls,
+        "concurrency": args.concurrency,
+        "rate_limit": args.rate,
+        "wall_seconds": round(wall, 3),
+        "throughput_per_second": round(total_calls / wall, 2) if wall else 0.0,
+        "checkpoint_commits": project.commit_count() - commits_before,
+        "latency_by_event": {event: summarize(values) for event, values in sorted(by_event.items())},
+        "all_events": summarize([ms for values in by_event.values() for ms in values]),
+        "overhead_per_session_ms": summarize(list(per_session.values()))
+    }
+
+    print(f"{report['sessions']} sessions, {total_calls} hook runs in {report['wall_seconds']}s "
+          f"({report['throughput_per_second']}/s), {report['checkpoint_commits']} checkpoint commits")
+    print(f"{'event':<20} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = list(report["latency_by_event"].items()) + [("all", report["all_events"]),
+                                                       ("per-session total", report["overhead_per_session_ms"])]
+    for name, stats in rows:
+        print(f"{name:<20} {stats['count']:>7} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+              f"{stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.keep:
+        print(f"Scratch project kept at {project.root}")
+    else:
+        print("Waiting for background hook processes to go idle...")
+        project.wait_for_background()
+        shutil.rmtree(project.root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
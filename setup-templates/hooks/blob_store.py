@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Content-addressed, compressed store for large values in the usage logs
+
+String parameter values of at least CLAUDE_LOG_BLOB_THRESHOLD bytes (file
+contents of write/edit calls) are stored once in logs/blobs/<ab>/<sha256>.z
+(zlib) and replaced in the log line by {"$blob": "<sha256>", "size": n}.
+Writing content that is already stored only refreshes the blob's mtime, so
+blobs not referenced for CLAUDE_LOG_BLOB_RETENTION_DAYS (default: the log
+retention) are removed by prune(). resolve() and resolve_line() put the
+values back; references to pruned blobs are left as they are. Set
+CLAUDE_LOG_BLOB_THRESHOLD=0 to log every value inline.
+"""
+import os
+import json
+import time
+import zlib
+
+from hook_paths import LOG_DIR
+
+DEFAULT_THRESHOLD = 4096
+REF_KEY = "$blob"
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+def threshold():
+    return _env_int("CLAUDE_LOG_BLOB_THRESHOLD", DEFAULT_THRESHOLD)
+
+def blob_dir(log_dir=LOG_DIR):
+    return os.path.join(log_dir, "blobs")
+
+def blob_path(digest, log_dir=LOG_DIR):
+    return os.path.join(blob_dir(log_dir), digest[:2], digest + ".z")
+
+def is_ref(value):
+    return isinstance(value, dict) and isinstance(value.get(REF_KEY), str) and set(value) == {REF_KEY, "size"}
+
+def put(data, log_dir=LOG_DIR):
+    """Store bytes once, returning their digest"""
+    import hashlib
+    digest = hashlib.sha256(data).hexdigest()
+    path = blob_path(digest, log_dir)
+    try:
+        os.utime(path)  # Already stored; mark it as referenced again
+        return digest
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(zlib.compress(data, 6))
+    os.replace(tmp_path, path)
+    return digest
+
+def get(digest, log_dir=LOG_DIR):
+    """Stored bytes for a digest; OSError when the blob is gone"""
+    with open(blob_path(digest, log_dir), 'rb') as f:
+        return zlib.decompress(f.read())
+
+def externalize(value, log_dir=LOG_DIR, limit=None):
+    """Copy of a JSON value with every large string replaced by a blob reference"""
+    limit = threshold() if limit is None else limit
+    if limit <= 0:
+        return value
+    if isinstance(value, str):
+        if len(value) < limit:
+            return value
+        data = value.encode(errors="surrogatepass")  # JSON input may hold lone surrogates
+        if len(data) < limit:
+            return value
+        return {REF_KEY: put(data, log_dir), "size": len(data)}
+    if isinstance(value, dict):
+        return {k: externalize(v, log_dir, limit) for k, v in value.items()}
+    if isinstance(value, list):
+        return [externalize(v, log_dir, limit) for v in value]
+    return value
+
+def resolve(value, log_dir=LOG_DIR):
+    """Copy of a JSON value with blob references replaced by their content where still stored"""
+    if is_ref(value):
+        try:
+            return get(value[REF_KEY], log_dir).decode(errors="surrogatepass")
+        except (OSError, zlib.error, UnicodeDecodeError):
+            return value
+    if isinstance(value, dict):
+        return {k: resolve(v, log_dir) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve(v, log_dir) for v in value]
+    return value
+
+def resolve_line(line, log_dir=LOG_DIR):
+    """A JSONL log line with its blob references resolved; other lines are returned unchanged"""
+    if f'"{REF_KEY}"' not in line:
+        return line
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return line
+    return json.dumps(resolve(record, log_dir)) + ('\n' if line.endswith('\n') else '')
+
+def prune(log_dir=LOG_DIR, retention_days=None):
+    """Remove blobs not referenced within the retention period"""
+    if retention_days is None:
+        default = _env_int("CLAUDE_LOG_RETENTION_DAYS", 30)
+        retention_days = _env_int("CLAUDE_LOG_BLOB_RETENTION_DAYS", default)
+    cutoff = time.time() - retention_days * 86400
+    try:
+        shards = os.scandir(blob_dir(log_dir))
+    except OSError:
+        return
+    for shard in shards:
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Optional inotify change tracker for checkpoints (Linux)
+
+With CLAUDE_CHANGE_TRACKER=1 a per-project tracker process watches the git
+work tree with inotify, skipping .git and ignored directories, and keeps
+the set of paths changed since the last checkpoint. Checkpoints ask it for
+that set instead of running `git status` over the whole repository, and
+stage only those paths. Events are filtered through `git check-ignore`, so
+ignored files never count as changes.
+
+The tracker starts on first use and rebuilds its set from `git status`
+whenever it cannot vouch for it: at startup, and after the kernel's event
+queue overflowed. If inotify is unavailable or out of watches it answers
+"unknown" and callers fall back to `git status`. It exits after
+CLAUDE_CHANGE_TRACKER_IDLE seconds without queries.
+"""
+import os
+import sys
+import json
+import errno
+import time
+import fcntl
+import socket
+
+import hook_paths
+
+DEFAULT_IDLE_SECONDS = 1800
+REQUEST_TIMEOUT_SECONDS = 2
+GIT_TIMEOUT_SECONDS = 60
+IGNORE_CACHE_SIZE = 10000
+
+def enabled():
+    return os.environ.get("CLAUDE_CHANGE_TRACKER", "0") == "1" and sys.platform.startswith("linux")
+
+def socket_path():
+    """Per-project tracker socket"""
+    return hook_paths.socket_path("tracker.sock")
+
+def _request(message):
+    path = socket_path()
+    if not hook_paths.owned_socket(path):
+        raise FileNotFoundError(path)  # Missing, or someone else's; never trust its answers
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(REQUEST_TIMEOUT_SECONDS)
+        sock.connect(path)
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        sock.close()
+    return json.loads(b"".join(chunks) or b"{}")
+
+def spawn_tracker():
+    import subprocess
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            cwd=os.getcwd(),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except OSError:
+        pass  # Checkpoints fall back to git status
+
+def changes():
+    """(top, seq, paths) changed since the last ack, paths relative to the work tree top;
+    None when the tracker is disabled or cannot vouch for its set"""
+    if not enabled():
+        return None
+    try:
+        response = _request({"op": "changes"})
+    except (ConnectionRefusedError, FileNotFoundError):
+        spawn_tracker()
+        return None
+    except (OSError, ValueError):
+        return None
+    if response.get("state") != "ok":
+        return None
+    return response["top"], response["seq"], response["paths"]
+
+def ack(seq):
+    """Forget every change recorded up to seq; they are committed"""
+    try:
+        _request({"op": "ack", "seq": seq})
+    except (OSError, ValueError):
+        pass  # The paths are staged again next time, which is harmless
+
+# inotify(7)
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_ONLYDIR)
+
+class Tracker:
+    """Dirty-path set of a work tree, fed by inotify"""
+
+    def __init__(self, top):
+        import ctypes
+        import struct
+        self.top = top
+        self.event = struct.Struct("iIII")  # wd, mask, cookie, name length
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.get_errno = ctypes.get_errno
+        self.fd = -1
+        self.watches = {}  # wd -> directory relative to top
+        self.dirty = {}  # path relative to top -> seq of its last change
+        self.pending = set()
+        self.ignored = {}
+        self.seq = 0
+        self.state = "unknown"
+
+    def git(self, args, input=None):
+        import subprocess
+        return subprocess.run(["git"] + args, cwd=self.top, capture_output=True, text=True,
+                              input=input, timeout=GIT_TIMEOUT_SECONDS)
+
+    def filter_ignored(self, paths):
+        """Paths git does not ignore, asking git only about ones not seen recently"""
+        unknown = [p for p in paths if p not in self.ignored]
+        if unknown:
+            result = self.git(["check-ignore", "-z", "--stdin"], input="\0".join(unknown) + "\0")
+            ignored = set(result.stdout.split("\0"))
+            if len(self.ignored) + len(unknown) > IGNORE_CACHE_SIZE:
+                self.ignored.clear()
+            for path in unknown:
+                self.ignored[path] = path in ignored
+        return [p for p in paths if not self.ignored.get(p)]
+
+    def watch_tree(self, rel):
+        """Watch a directory and every non-ignored directory below it; returns the files found"""
+        files = []
+        directories = [rel]
+        while directories:
+            batch = self.filter_ignored(directories)
+            directories = []
+            for directory in batch:
+                path = os.path.join(self.top, directory)
+                wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+                if wd < 0:
+                    if self.get_errno() == errno.ENOSPC:
+                        self.state = "degraded"  # Out of inotify watches
+                        return files
+                    continue  # Vanished meanwhile
+                self.watches[wd] = directory
+                try:
+                    entries = list(os.scandir(path))
+                except OSError:
+                    continue
+                for entry in entries:
+                    child = os.path.normpath(os.path.join(directory, entry.name))
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != ".git":
+                            directories.append(child)
+                    else:
+                        files.append(child)
+        return files
+
+    def reconcile(self):
+        """Rebuild watches and the dirty set from scratch"""
+        if self.fd >= 0:
+            os.close(self.fd)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self.state = "degraded"
+            return
+        self.watches = {}
+        self.pending = set()
+        self.ignored = {}
+        self.state = "ok"
+        self.watch_tree(".")
+        if self.state != "ok":
+            return
+
+        result = self.git(["status", "--porcelain", "-z"])
+        if result.returncode != 0:
+            self.state = "degraded"
+            return
+        self.seq += 1
+        self.dirty = {}
+        fields = iter(result.stdout.split("\0"))
+        for field in fields:
+            if len(field) < 4:
+                continue
+            self.dirty[field[3:].rstrip("/")] = self.seq
+            if "R" in field[:2] or "C" in field[:2]:
+                self.dirty[next(fields, "")] = self.seq  # Source of a rename or copy
+
+    def read_events(self):
+        """Drain the inotify queue into the pending set"""
+        try:
+            data = os.read(self.fd, 1 << 20)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.event.unpack_from(data, offset)
+            name = data[offset + self.event.size:offset + self.event.size + length].rstrip(b"\0")
+            offset += self.event.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                self.state = "overflow"
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            path = os.path.normpath(os.path.join(directory, os.fsdecode(name)))
+            if name == b".gitignore":
+                self.ignored.clear()
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                if os.path.basename(path) != ".git":
+                    self.pending.update(self.watch_tree(path))
+            elif mask & IN_ISDIR and mask & IN_MOVED_FROM:
+                self.pending.add(path)  # Everything below it is gone
+            elif not mask & IN_ISDIR:
+                self.pending.add(path)
+
+    def settle(self):
+        """Fold pending events into the dirty set; reconcile if the queue overflowed"""
+        self.read_events()
+        if self.state == "overflow":
+            self.reconcile()
+            return
+        if self.pending:
+            self.seq += 1
+            for path in self.filter_ignored(sorted(self.pending)):
+                self.dirty[path] = self.seq
+            self.pending = set()
+
+    def handle(self, request):
+        if request.get("op") == "ack":
+            seq = request.get("seq", 0)
+            self.dirty = {p: s for p, s in self.dirty.items() if s > seq}
+            return {"state": self.state}
+        self.settle()
+        if self.state != "ok":
+            return {"state": self.state}
+        return {"state": "ok", "top": self.top, "seq": self.seq, "paths": sorted(self.dirty)}
+
+def run_tracker():
+    import select
+
+    lock = open(hook_paths.run_path("tracker.lock"), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return  # Another tracker serves this project
+
+    import subprocess
+    result = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, text=True,
+                            timeout=GIT_TIMEOUT_SECONDS)
+    if result.returncode != 0:
+        return  # Not a git repo
+    tracker = Tracker(result.stdout.strip())
+    tracker.reconcile()
+
+    path = socket_path()
+    if os.path.exists(path):
+        os.unlink(path)  # Stale socket from a previous tracker
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    os.chmod(path, 0o600)
+    server.listen(16)
+
+    idle_seconds = int(os.environ.get("CLAUDE_CHANGE_TRACKER_IDLE", DEFAULT_IDLE_SECONDS))
+    last_request = time.time()
+    try:
+        while time.time() - last_request < idle_seconds:
+            sources = [server] + ([tracker.fd] if tracker.fd >= 0 else [])
+            readable, _, _ = select.select(sources, [], [], 1.0)
+            if tracker.fd in readable:
+                tracker.read_events()
+            if server not in readable:
+                continue
+
+            conn, _ = server.accept()
+            last_request = time.time()
+            try:
+                conn.settimeout(REQUEST_TIMEOUT_SECONDS)
+                data = b""
+                while not data.endswith(b"\n"):
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+                response = tracker.handle(json.loads(data or b"{}"))
+                conn.sendall(json.dumps(response).encode())
+            except Exception:
+                pass  # A broken client must not stop the tracker
+            finally:
+                conn.close()
+    finally:
+        server.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+if __name__ == "__main__":
+    run_tracker()
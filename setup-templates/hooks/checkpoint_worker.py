@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Background worker that coalesces auto-checkpoints into one commit per burst
+
+The post-tool hook only appends to a queue file (enqueue). A single worker
+per project waits until CLAUDE_CHECKPOINT_QUIET_SECONDS pass without new
+entries, then commits once for the whole burst. flush() makes the worker
+commit immediately and waits for it; the session manager calls it before
+the final checkpoint.
+
+With CLAUDE_CHECKPOINT_MODE=ref, checkpoints never touch HEAD or the user's
+index: only the paths the session wrote are staged into a private
+GIT_INDEX_FILE, and the tree is committed onto refs/checkpoints/<session>
+(session ids git refuses as ref names are rewritten, with a hash of the id).
+The cost scales with the number of changed files, not the repository size,
+except after commands that change files at unknown paths (builds, installs),
+which stage the whole work tree into that index.
+"""
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import fcntl
+from datetime import datetime
+
+from hook_paths import run_path
+import change_tracker
+import hook_budget
+import telemetry
+from notify_dispatcher import send_notification
+
+DEFAULT_QUIET_SECONDS = 5
+POLL_SECONDS = 0.2
+IDLE_EXIT_SECONDS = 60
+FLUSH_TIMEOUT_SECONDS = 30
+GIT_TIMEOUT_SECONDS = 30
+
+def checkpoint_mode():
+    """'commit' (git add . && git commit on HEAD) or 'ref' (path-targeted checkpoint refs)"""
+    return os.environ.get("CLAUDE_CHECKPOINT_MODE", "commit")
+
+def quiet_seconds():
+    try:
+        return float(os.environ.get("CLAUDE_CHECKPOINT_QUIET_SECONDS", DEFAULT_QUIET_SECONDS))
+    except ValueError:
+        return DEFAULT_QUIET_SECONDS
+
+def _try_lock(path):
+    """Open and exclusively lock a file, returning None if someone else holds it"""
+    f = open(path, "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+def worker_running():
+    lock = _try_lock(run_path("checkpoint.lock"))
+    if lock is None:
+        return True
+    lock.close()
+    return False
+
+def enqueue(file_paths=None, session_id="unknown"):
+    """Record a change for the next checkpoint and make sure a worker is running;
+    without paths (e.g. a build command) the checkpoint covers the whole work tree"""
+    now = time.time()
+    lines = [json.dumps({"timestamp": now, "file_path": os.path.abspath(path) if path else None,
+                         "session_id": session_id}) + "\n"
+             for path in (file_paths or [None])]
+    with open(run_path("checkpoint.queue"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.write("".join(lines))
+
+    if not worker_running():
+        spawn_worker()
+
+def spawn_worker():
+    import subprocess
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            cwd=os.getcwd(),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except OSError:
+        pass  # Next flush or final checkpoint still picks the changes up
+
+def pending_since():
+    """Time of the last queued change, or None when the queue is empty"""
+    try:
+        stat = os.stat(run_path("checkpoint.queue"))
+    except OSError:
+        return None
+    return stat.st_mtime if stat.st_size else None
+
+def drain_queue():
+    """Atomically take every queued entry"""
+    try:
+        f = open(run_path("checkpoint.queue"), "r+")
+    except OSError:
+        return []
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        lines = f.read().splitlines()
+        f.seek(0)
+        f.truncate()
+
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            pass
+    return entries
+
+def git(args, env=None, input=None, cwd=None):
+    import subprocess
+    return subprocess.run(["git"] + args, capture_output=True, text=True,
+                          env=env, input=input, cwd=cwd,
+                          timeout=hook_budget.timeout(GIT_TIMEOUT_SECONDS))
+
+def session_ref(session_id):
+    """Checkpoint ref for a session, e.g. refs/checkpoints/<session>"""
+    name = re.sub(r'[^A-Za-z0-9._-]|\.\.+', '_', session_id).strip('.')
+    if name != session_id or name.endswith('.lock'):
+        # Keep ids that only differ in rewritten characters apart
+        name = f"{name or 'session'}-{zlib.crc32(session_id.encode(errors='surrogatepass')):08x}"
+    return "refs/checkpoints/" + name
+
+def session_index_file(git_dir, session_id):
+    """Private index used to build a session's checkpoint trees"""
+    return os.path.join(git_dir, "checkpoint-index-" + session_ref(session_id).rsplit("/", 1)[1])
+
+def commit_checkpoint(entries):
+    """Create one git checkpoint covering a burst of queued changes"""
+    started = time.monotonic()
+    if checkpoint_mode() == "ref":
+        paths_by_session = {}
+        for entry in entries:
+            # None stands for changes at unknown paths
+            paths_by_session.setdefault(entry.get("session_id", "unknown"), set()).add(entry.get("file_path"))
+        for session_id, paths in paths_by_session.items():
+            if None in paths:
+                commit_ref_checkpoint(session_id, None)
+            else:
+                commit_ref_checkpoint(session_id, sorted(paths))
+        telemetry.emit("checkpoint", mode="ref", changes=len(entries),
+                       duration_ms=round((time.monotonic() - started) * 1000, 1))
+        return
+
+    try:
+        if not stage_changes():
+            return  # Not a git repo, or no changes
+
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        commit_msg = f"""Auto-checkpoint: {timestamp}
+
+Automated commit from Claude Code session ({len(entries)} changes)
+
+🤖 Generated with [Claude Code](https://claude.ai/code)
+
+Co-Authored-By: Claude <noreply@anthropic.com>"""
+
+        if git(["commit", "-m", commit_msg]).returncode != 0:
+            return
+        telemetry.emit("checkpoint", mode="commit", changes=len(entries),
+                       duration_ms=round((time.monotonic() - started) * 1000, 1))
+        send_notification("📁 Git Checkpoint", "Auto-saved progress", "Glass", category="checkpoint")
+
+    except Exception:
+        pass  # Silently fail if git operations fail
+
+def stage_changes():
+    """Stage every change in the work tree, returning False when there is nothing to commit"""
+    tracked = change_tracker.changes()
+    if tracked is None:
+        # Check if we're in a git repo and have changes
+        result = git(["status", "--porcelain"])
+        if result.returncode != 0 or not result.stdout.strip():
+            return False
+        git(["add", "."])
+        return True
+
+    # Only the paths the tracker saw change, instead of scanning the whole tree
+    top, seq, paths = tracked
+    if not paths:
+        return False
+    paths = _stageable(top, paths)
+    if paths:
+        result = git(["--literal-pathspecs", "add", "-A", "--pathspec-from-file=-", "--pathspec-file-nul"],
+                     input="\0".join(paths) + "\0", cwd=top)
+    if not paths or result.returncode != 0:
+        # Stage the whole tree rather than retrying the same paths forever
+        result = git(["add", "-A"], cwd=top)
+        if result.returncode != 0:
+            return False
+    change_tracker.ack(seq)
+    return True
+
+def _stageable(top, paths):
+    """Paths git add can take: present in the work tree, or gone but still in the index"""
+    present, missing = [], []
+    for path in paths:
+        (present if os.path.lexists(os.path.join(top, path)) else missing).append(path)
+    if not missing:
+        return present
+    result = git(["--literal-pathspecs", "ls-files", "-z", "--pathspec-from-file=-", "--pathspec-file-nul"],
+                 input="\0".join(missing) + "\0", cwd=top)
+    if result.returncode != 0:
+        return present
+    return present + [path for path in result.stdout.split("\0") if path]
+
+def commit_ref_checkpoint(session_id, paths):
+    """Commit the given paths (None: the whole work tree) onto the session's checkpoint ref
+    using git plumbing"""
+    try:
+        result = git(["rev-parse", "--show-toplevel", "--absolute-git-dir"])
+        if result.returncode != 0:
+            return  # Not a git repo
+        top, git_dir = result.stdout.splitlines()[:2]
+
+        ref = session_ref(session_id)
+        result = git(["rev-parse", "--verify", "-q", ref + "^{commit}"], cwd=top)
+        old_value = result.stdout.strip() if result.returncode == 0 else ""
+        parent = old_value
+        if not parent:
+            result = git(["rev-parse", "--verify", "-q", "HEAD^{commit}"], cwd=top)
+            parent = result.stdout.strip() if result.returncode == 0 else ""
+
+        env = dict(os.environ, GIT_INDEX_FILE=session_index_file(git_dir, session_id))
+        if not os.path.exists(env["GIT_INDEX_FILE"]):
+            git(["read-tree", parent] if parent else ["read-tree", "--empty"], env=env, cwd=top)
+
+        if paths is None:
+            # Changes we cannot name (a build or install); scan the work tree into the private index
+            if git(["add", "-A"], env=env, cwd=top).returncode != 0:
+                return
+            files = "work tree"
+        else:
+            # Only files inside this work tree; deleted files are dropped via --remove
+            relative = []
+            for path in paths:
+                rel = os.path.relpath(os.path.realpath(path), os.path.realpath(top))
+                if rel != ".." and not rel.startswith(".." + os.sep) and not os.path.isdir(path):
+                    relative.append(rel)
+            if not relative:
+                return
+
+            ignored = git(["check-ignore", "-z", "--stdin"], env=env, cwd=top,
+                          input="\0".join(relative) + "\0").stdout.split("\0")
+            relative = [rel for rel in relative if rel not in ignored]
+            if not relative:
+                return
+
+            result = git(["update-index", "--add", "--remove", "-z", "--stdin"], env=env, cwd=top,
+                         input="\0".join(relative) + "\0")
+            if result.returncode != 0:
+                return
+            files = f"{len(relative)} files"
+
+        tree = git(["write-tree"], env=env, cwd=top).stdout.strip()
+        if not tree:
+            return
+        if parent and git(["rev-parse", parent + "^{tree}"], cwd=top).stdout.strip() == tree:
+            return  # Nothing changed since the last checkpoint
+
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        commit_msg = f"Auto-checkpoint: {timestamp}\n\nSession {session_id}: {files}"
+        args = ["commit-tree", tree, "-m", commit_msg] + (["-p", parent] if parent else [])
+        commit = git(args, cwd=top).stdout.strip()
+        if not commit:
+            return
+
+        git(["update-ref", "-m", "auto-checkpoint", ref, commit, old_value], cwd=top)
+        send_notification("📁 Git Checkpoint", f"Saved {files} to {ref}", "Glass", category="checkpoint")
+
+    except Exception:
+        pass  # Silently fail if git operations fail
+
+def discard_session_index(session_id):
+    """Remove a finished session's private checkpoint index"""
+    result = git(["rev-parse", "--absolute-git-dir"])
+    if result.returncode == 0:
+        try:
+            os.unlink(session_index_file(result.stdout.strip(), session_id))
+        except OSError:
+            pass
+
+def flush(timeout=None):
+    """Commit any queued changes now, waiting for a running worker to finish"""
+    timeout = hook_budget.timeout(FLUSH_TIMEOUT_SECONDS) if timeout is None else timeout
+    flush_marker = run_path("checkpoint.flush")
+    open(flush_marker, "w").close()
+
+    deadline = time.time() + timeout
+    lock = _try_lock(run_path("checkpoint.lock"))
+    while lock is None and time.time() < deadline:
+        time.sleep(POLL_SECONDS / 4)
+        lock = _try_lock(run_path("checkpoint.lock"))
+
+    try:
+        if lock is not None and pending_since() is not None:
+            commit_checkpoint(drain_queue())  # Worker was not running
+    finally:
+        if lock is not None:
+            lock.close()
+        try:
+            os.unlink(flush_marker)
+        except OSError:
+            pass
+
+def run_worker():
+    """Commit once per burst of changes until the queue stays idle"""
+    lock = _try_lock(run_path("checkpoint.lock"))
+    if lock is None:
+        return  # Another worker owns the queue
+
+    flush_marker = run_path("checkpoint.flush")
+    idle_since = time.time()
+    while True:
+        last_change = pending_since()
+        flushing = os.path.exists(flush_marker)
+
+        if last_change is not None and (flushing or time.time() - last_change >= quiet_seconds()):
+            commit_checkpoint(drain_queue())
+            idle_since = time.time()
+        elif last_change is None and (flushing or time.time() - idle_since >= IDLE_EXIT_SECONDS):
+            lock.close()
+            # An enqueue may have raced with the exit check; take over again if so
+            if pending_since() is None or flushing:
+                return
+            lock = _try_lock(run_path("checkpoint.lock"))
+            if lock is None:
+                return
+
+        if last_change is not None:
+            idle_since = time.time()
+        time.sleep(POLL_SECONDS)
+
+if __name__ == "__main__":
+    run_worker()
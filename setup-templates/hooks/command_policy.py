@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Compiled command policy for the pre-tool hook
+
+Rules come from the built-in defaults plus an optional policy file
+(.do.claude/command_policy.json, or $CLAUDE_COMMAND_POLICY):
+
+    {
+      "include_defaults": true,
+      "safe": ["^make\\s+lint(\\s|$)"],
+      "dev": ["^make\\s+"],
+      "dangerous": ["terraform\\s+destroy"]
+    }
+
+"safe" rules are anchored at the start of the command (re.match), "dev" and
+"dangerous" rules may match anywhere (re.search). A command is classified
+safe first, then dangerous, then dev, like the original hard-coded lists.
+
+Each tier is bucketed by the literal text every match must start with, so a
+lookup only runs the combined regex of the few buckets whose prefix occurs in
+the command. The bucket layout is cached on disk keyed by the policy file's
+mtime, and bucket regexes are compiled lazily on first use.
+"""
+import os
+import re
+import json
+import zlib
+
+from hook_paths import CLAUDE_DIR, cache_path
+
+LAYOUT_VERSION = 1
+
+DEFAULT_POLICY = {
+    # Ultra-safe commands (always allow)
+    "safe": [
+        r'^ls(\s|$)',
+        r'^cat\s+[^|>;&]+$',  # cat with simple file paths
+        r'^grep\s+[^|>;&]+$',
+        r'^find\s+.*-name',
+        r'^git\s+(status|log|diff|show)(\s|$)',
+        r'^python.*--help',
+        r'^npm\s+(list|info|view)',
+        r'^echo\s+',
+        r'^pwd$',
+        r'^whoami$',
+        r'^date$'
+    ],
+    # Development commands (allow with notification)
+    "dev": [
+        r'^git\s+(add|commit|push)',
+        r'^npm\s+(install|update|run)',
+        r'^pip\s+(install|update)',
+        r'^python\s+[^;|>&]+\.py',
+        r'^node\s+[^;|>&]+\.js',
+        r'^cargo\s+(build|run|test)',
+        r'^mvn\s+(compile|test|package)'
+    ],
+    # Potentially dangerous (require extra validation)
+    "dangerous": [
+        r'rm\s.*-rf',
+        r'sudo\s',
+        r'chmod\s777',
+        r'>\s*/dev/',
+        r'curl.*\|\s*(sh|bash)',
+        r'wget.*\|\s*(sh|bash)',
+        r'eval\s',
+        r'exec\s'
+    ]
+}
+
+# Checked in this order; safe rules are anchored, the others search
+TIERS = [("safe", True), ("dangerous", False), ("dev", False)]
+
+_META = set('.^$*+?{}[]\\|()')
+
+def policy_file():
+    """Location of the project policy file"""
+    return os.environ.get("CLAUDE_COMMAND_POLICY") or os.path.join(CLAUDE_DIR, 'command_policy.json')
+
+def has_top_level_alternation(pattern):
+    """True if the pattern contains a '|' outside any group or character class"""
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            i += 2
+            continue
+        if in_class:
+            if c == ']':
+                in_class = False
+        elif c == '[':
+            in_class = True
+            if pattern[i + 1:i + 2] == ']':
+                i += 1  # ']' right after '[' is a literal
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            return True
+        i += 1
+    return False
+
+def literal_prefix(pattern):
+    """Literal text every match of an anchored pattern must start with"""
+    if has_top_level_alternation(pattern):
+        return ""
+
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            escaped = pattern[i + 1:i + 2]
+            if not escaped or escaped.isalnum():
+                break  # \s, \d, \1, ... are not literals
+            literal, step = escaped, 2
+        elif c in _META:
+            break
+        else:
+            literal, step = c, 1
+
+        quantifier = pattern[i + step:i + step + 1]
+        if quantifier and quantifier in '*?{':
+            break  # Literal may be absent
+        prefix.append(literal)
+        if quantifier == '+':
+            break
+        i += step
+    return "".join(prefix)
+
+def build_layout(policy):
+    """Bucket every tier's rules by literal prefix and match mode"""
+    tiers = {}
+    for name, anchored_tier in TIERS:
+        anchored = {}
+        floating = {}
+        for pattern in policy.get(name, []):
+            # re.search('^x') == re.match('x'), so a leading caret moves a rule to the anchored buckets
+            caret = pattern.startswith('^') and not has_top_level_alternation(pattern)
+            if anchored_tier or caret:
+                body = pattern[1:] if caret else pattern
+                anchored.setdefault(literal_prefix(body), []).append(body)
+            else:
+                floating.setdefault(literal_prefix(pattern), []).append(pattern)
+        tiers[name] = {"anchored": anchored, "floating": floating}
+    return tiers
+
+def _compile_bucket(patterns):
+    """Compile a bucket into one alternation, or individually if it can't be combined"""
+    try:
+        return [re.compile("|".join(f"(?:{p})" for p in patterns))]
+    except re.error:
+        compiled = []
+        for p in patterns:
+            try:
+                compiled.append(re.compile(p))
+            except re.error:
+                pass  # Skip invalid rules rather than failing every command
+        return compiled
+
+class RuleTier:
+    """One tier of rules, matched through its literal-prefix buckets"""
+
+    def __init__(self, layout):
+        self.anchored = layout["anchored"]
+        self.floating = layout["floating"]
+        self.anchored_lengths = sorted({len(p) for p in self.anchored})
+        self.compiled = {}
+
+    def _bucket(self, kind, prefix, patterns):
+        key = (kind, prefix)
+        if key not in self.compiled:
+            self.compiled[key] = _compile_bucket(patterns)
+        return self.compiled[key]
+
+    def matches(self, command):
+        for length in self.anchored_lengths:
+            if length > len(command):
+                break
+            prefix = command[:length]
+            patterns = self.anchored.get(prefix)
+            if patterns and any(r.match(command) for r in self._bucket("a", prefix, patterns)):
+                return True
+
+        for prefix, patterns in self.floating.items():
+            if prefix in command and any(r.search(command) for r in self._bucket("f", prefix, patterns)):
+                return True
+
+        return False
+
+class CommandPolicy:
+    """Classifies commands as safe, dangerous, dev or None (standard)"""
+
+    def __init__(self, layout, fingerprint=None):
+        self._fingerprint = fingerprint
+        self.tiers = [(name, RuleTier(layout[name])) for name, _ in TIERS]
+
+    def classify(self, command):
+        for name, tier in self.tiers:
+            if tier.matches(command):
+                return name
+        return None
+
+    @property
+    def fingerprint(self):
+        """Hash of the effective rule set; computed on demand for the built-in rules"""
+        if self._fingerprint is None:
+            self._fingerprint = policy_fingerprint(DEFAULT_POLICY)
+        return self._fingerprint
+
+def policy_fingerprint(policy):
+    """Stable 64-bit hash of the effective rule set (zlib, since hashlib is slow to import)"""
+    data = json.dumps(policy, sort_keys=True).encode()
+    return f"{zlib.crc32(data):08x}{zlib.adler32(data):08x}"
+
+def _read_policy(path):
+    """Merge the policy file with the defaults"""
+    with open(path, 'r') as f:
+        rules = json.load(f)
+
+    policy = {}
+    for name, _ in TIERS:
+        defaults = DEFAULT_POLICY[name] if rules.get("include_defaults", True) else []
+        policy[name] = defaults + list(rules.get(name, []))
+    return policy
+
+def _load_layout(path, stat):
+    """Layout for a policy file, from the disk cache when the file is unchanged"""
+    key = {
+        "version": LAYOUT_VERSION,
+        "defaults": policy_fingerprint(DEFAULT_POLICY),
+        "path": path,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size
+    }
+    cache_file = cache_path("command_policy.json")
+
+    try:
+        with open(cache_file, 'r') as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            return cached["layout"], cached["fingerprint"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    policy = _read_policy(path)
+    layout = build_layout(policy)
+    fingerprint = policy_fingerprint(policy)
+    try:
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({"key": key, "fingerprint": fingerprint, "layout": layout}, f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass  # Cache is an optimization only
+    return layout, fingerprint
+
+_loaded = {}
+
+def default_policy():
+    """Policy with only the built-in rules, built without touching the disk"""
+    if "default" not in _loaded:
+        _loaded["default"] = CommandPolicy(build_layout(DEFAULT_POLICY))
+    return _loaded["default"]
+
+def loaded_policy():
+    """Current policy if it needs no loading (the built-in rules, or a policy file this
+    process already compiled); None otherwise"""
+    path = policy_file()
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return default_policy()
+    if _loaded.get("state") == (path, stat.st_mtime_ns, stat.st_size):
+        return _loaded["policy"]
+    return None
+
+def load_policy():
+    """Current policy, rebuilt only when the policy file changes"""
+    path = policy_file()
+    try:
+        stat = os.stat(path)
+        state = (path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        stat = None
+        state = (None, None, None)
+
+    if _loaded.get("state") != state:
+        if stat is None:
+            _loaded["policy"] = default_policy()
+        else:
+            _loaded["policy"] = CommandPolicy(*_load_layout(path, stat))
+        _loaded["state"] = state
+    return _loaded["policy"]
@@ -5,15 +5,26 @@ Enhanced post-tool hook with advanced logging and smart notifications
 import sys
 import json
 import os
-import subprocess
-import platform
 from datetime import datetime
 
-def send_notification(title, message, sound="Glass"):
-    """Send system notification"""
-    if platform.system() == "Darwin":  # macOS
-        script = f'display notification "{message}" with title "{title}" sound name "{sound}"'
-        subprocess.run(["osascript", "-e", script], capture_output=True)
+if sys.flags.isolated:
+    # python3 -I (the fast-start bundle) leaves the script's directory off sys.path
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import blob_store
+import checkpoint_worker
+import hook_budget
+import hook_metrics
+import hook_trace
+import log_writer
+import path_policy
+import stats_store
+import telemetry
+from notify_dispatcher import send_notification
+
+# Tools with actions beyond logging; generate-settings.py routes only these to it,
+# unless read-only logging is enabled and every call comes here
+HANDLED_TOOLS = ["bash", "write", "edit", "multi_edit"]
 
 def should_create_checkpoint(tool_name, parameters, exit_code):
     """Determine if we should create a git checkpoint"""
@@ -37,44 +48,24 @@ def should_create_checkpoint(tool_name, parameters, exit_code):
     
     return False
 
-def create_auto_checkpoint():
-    """Create automatic git checkpoint"""
+def create_auto_checkpoint(file_paths=None, session_id="unknown"):
+    """Queue an automatic git checkpoint; the background worker commits once per burst"""
     try:
-        # Check if we're in a git repo
-        result = subprocess.run(["git", "status", "--porcelain"], 
-                              capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            return  # Not a git repo
-        
-        # Check if there are changes
-        if not result.stdout.strip():
-            return  # No changes
-        
-        # Create checkpoint
-        subprocess.run(["git", "add", "."], capture_output=True)
-        
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        commit_msg = f"""Auto-checkpoint: {timestamp}
-
-Automated commit from Claude Code session
-
-🤖 Generated with [Claude Code](https://claude.ai/code)
-
-Co-Authored-By: Claude <noreply@anthropic.com>"""
-        
-        subprocess.run(["git", "commit", "-m", commit_msg], capture_output=True)
-        send_notification("📁 Git Checkpoint", "Auto-saved progress", "Glass")
-        
+        with hook_metrics.phase("checkpoint"):
+            checkpoint_worker.enqueue(file_paths, session_id)
     except Exception:
-        pass  # Silently fail if git operations fail
+        pass  # Silently fail if the queue is unavailable
+
+def loggable_parameters(parameters):
+    """Parameters for the usage log, with large values moved to the blob store"""
+    try:
+        return blob_store.externalize(parameters)
+    except (OSError, ValueError):
+        return parameters  # Log inline rather than lose the record
 
 def log_tool_usage(data):
     """Enhanced logging with analytics"""
     
-    log_dir = os.path.join(os.path.dirname(__file__), '../logs')
-    os.makedirs(log_dir, exist_ok=True)
-    
     # Enhanced log entry
     log_entry = {
         "timestamp": datetime.now().isoformat(),
@@ -82,14 +73,13 @@ def log_tool_usage(data):
         "exit_code": data.get("exit_code", None),
         "duration_ms": data.get("duration_ms", 0),
         "success": data.get("exit_code", 0) == 0,
-        "parameters": data.get("parameters", {}),
-        "session_id": os.environ.get("CLAUDE_SESSION_ID", "unknown")
+        "parameters": loggable_parameters(data.get("parameters", {})),
+        "session_id": stats_store.session_id(data)
     }
     
     # Daily log file
-    log_file = os.path.join(log_dir, f"usage_{datetime.now().strftime('%Y%m%d')}.log")
-    with open(log_file, 'a') as f:
-        f.write(json.dumps(log_entry) + '\n')
+    with hook_metrics.phase("log_tool_usage"):
+        log_writer.append("usage", log_entry)
     
     # Update usage statistics
     update_usage_stats(log_entry)
@@ -97,32 +87,9 @@ def log_tool_usage(data):
 def update_usage_stats(log_entry):
     """Update usage statistics"""
     
-    stats_file = os.path.join(os.path.dirname(__file__), '../logs/stats.json')
-    
     try:
-        if os.path.exists(stats_file):
-            with open(stats_file, 'r') as f:
-                stats = json.load(f)
-        else:
-            stats = {
-                "total_tools": 0,
-                "successful_tools": 0,
-                "tool_counts": {},
-                "last_updated": None
-            }
-        
-        # Update stats
-        stats["total_tools"] += 1
-        if log_entry["success"]:
-            stats["successful_tools"] += 1
-        
-        tool_name = log_entry["tool_name"]
-        stats["tool_counts"][tool_name] = stats["tool_counts"].get(tool_name, 0) + 1
-        stats["last_updated"] = datetime.now().isoformat()
-        
-        with open(stats_file, 'w') as f:
-            json.dump(stats, f, indent=2)
-            
+        with hook_metrics.phase("update_usage_stats"):
+            stats_store.record(log_entry)
     except Exception:
         pass  # Silently handle stats errors
 
@@ -152,34 +119,50 @@ def send_contextual_notification(tool_name, parameters, exit_code, duration_ms):
         file_path = parameters.get("file_path", "")
         if file_path:
             filename = os.path.basename(file_path)
-            send_notification("📝 File Updated", filename, "Glass")
+            send_notification("📝 File Updated", filename, "Glass", category="file_updated")
 
-def main():
+def process(raw):
+    """Run post-tool actions on a raw hook payload, returning (response, exit_code)"""
+    hook_metrics.begin("post_tool")
     try:
-        data = json.load(sys.stdin)
+        with hook_metrics.phase("parse"):
+            data = json.loads(raw)
         tool_name = data.get("tool_name", "")
+        hook_metrics.set_tool(tool_name)
         parameters = data.get("parameters", {})
         exit_code = data.get("exit_code", 0)
         duration_ms = data.get("duration_ms", 0)
         
         # Log tool usage
         log_tool_usage(data)
+        telemetry.emit("tool", tool=tool_name, success=exit_code == 0, duration_ms=duration_ms)
         
         # Send contextual notifications
         send_contextual_notification(tool_name, parameters, exit_code, duration_ms)
         
         # Create checkpoint if needed
         if should_create_checkpoint(tool_name, parameters, exit_code):
-            create_auto_checkpoint()
+            hook_budget.run(create_auto_checkpoint, path_policy.target_paths(parameters), stats_store.session_id(data))
         
         # Pass through the original data
-        print(json.dumps(data))
+        return data, 0
         
     except Exception as e:
         # Log error but don't fail
         error_data = data if 'data' in locals() else {}
         error_data["hook_error"] = str(e)
-        print(json.dumps(error_data))
+        return error_data, 0
+
+def main():
+    hook_budget.start("post_tool")
+    raw = sys.stdin.read()
+    if hook_trace.enabled():
+        hook_trace.record("post_tool", raw)
+    with hook_metrics.phase("total"):
+        response, exit_code = process(raw)
+    print(json.dumps(response))
+    if exit_code:
+        sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,130 +1,195 @@
 #!/usr/bin/env python3
 """
 Enhanced pre-tool hook with smart validation and notifications
+
+Besides single tool calls it accepts {"batch": [{tool_name, parameters}, ...]},
+validated against one loaded policy with a verdict per call in "results".
+Settings route hooks by tool name, so batches are piped to
+`hook_client.py pre_tool`, which forwards them to the hook daemon.
 """
 import sys
+import os
 import json
-import re
-import subprocess
-import platform
 
-def send_notification(title, message, sound="Glass"):
-    """Send system notification"""
-    if platform.system() == "Darwin":  # macOS
-        script = f'display notification "{message}" with title "{title}" sound name "{sound}"'
-        subprocess.run(["osascript", "-e", script], capture_output=True)
+if sys.flags.isolated:
+    # python3 -I (the fast-start bundle) leaves the script's directory off sys.path
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import command_policy
+import hook_budget
+import hook_metrics
+import hook_trace
+import path_policy
+import verdict_cache
+from notify_dispatcher import send_notification
 
-def validate_command(command, tool_name):
+# Tools this hook acts on; generate-settings.py routes only these to it
+HANDLED_TOOLS = ["bash", "write", "edit", "multi_edit"]
+
+def validate_command(command, tool_name, policy=None):
     """Advanced command validation with context awareness"""
     
-    # Ultra-safe commands (always allow)
-    ultra_safe = [
-        r'^ls(\s|$)',
-        r'^cat\s+[^|>;&]+$',  # cat with simple file paths
-        r'^grep\s+[^|>;&]+$',
-        r'^find\s+.*-name',
-        r'^git\s+(status|log|diff|show)(\s|$)',
-        r'^python.*--help',
-        r'^npm\s+(list|info|view)',
-        r'^echo\s+',
-        r'^pwd$',
-        r'^whoami$',
-        r'^date$'
-    ]
-    
-    # Development commands (allow with notification)
-    dev_commands = [
-        r'^git\s+(add|commit|push)',
-        r'^npm\s+(install|update|run)',
-        r'^pip\s+(install|update)',
-        r'^python\s+[^;|>&]+\.py',
-        r'^node\s+[^;|>&]+\.js',
-        r'^cargo\s+(build|run|test)',
-        r'^mvn\s+(compile|test|package)'
-    ]
+    level = verdict_cache.classify(policy or command_policy.load_policy(), command)
     
     # Potentially dangerous (require extra validation)
-    dangerous = [
-        r'rm\s.*-rf',
-        r'sudo\s',
-        r'chmod\s777',
-        r'>\s*/dev/',
-        r'curl.*\|\s*(sh|bash)',
-        r'wget.*\|\s*(sh|bash)',
-        r'eval\s',
-        r'exec\s'
-    ]
+    if level == "dangerous":
+        send_notification("⚠️ Claude Code", f"Blocked dangerous command: {command[:50]}...", "Basso")
+    
+    # Development commands (allow with notification)
+    elif level == "dev":
+        send_notification("🔧 Claude Code", f"Running: {command[:50]}...", "Glass", category="dev_command")
     
-    # Check ultra-safe first
-    for pattern in ultra_safe:
-        if re.match(pattern, command):
-            return {"ok": True, "level": "safe"}
+    return command_result(command, level)
+
+def command_result(command, level):
+    """Response for a classified command; safe, dev and unclassified (standard) ones are allowed"""
+    if level == "dangerous":
+        return {"error": f"Blocked dangerous command: {command}"}
+    return {"ok": True, "level": level or "standard"}
+
+def validate_path(file_path, path_rules=None):
+    """Verdict for writing a single path"""
+    if not file_path:
+        return {"ok": True}
     
-    # Check dangerous patterns
-    for pattern in dangerous:
-        if re.search(pattern, command):
-            send_notification("⚠️ Claude Code", f"Blocked dangerous command: {command[:50]}...", "Basso")
-            return {"error": f"Blocked dangerous command: {command}"}
+    verdict, rule = (path_rules or path_policy.load_policy()).check(file_path)
     
-    # Check development commands
-    for pattern in dev_commands:
-        if re.search(pattern, command):
-            send_notification("🔧 Claude Code", f"Running: {command[:50]}...", "Glass")
-            return {"ok": True, "level": "dev"}
+    # Notify for important file modifications
+    if verdict == "notify":
+        send_notification("📝 Claude Code", f"Modifying {file_path}", "Glass")
     
-    # Default: allow with logging
-    return {"ok": True, "level": "standard"}
+    return path_result(file_path, verdict, rule)
+
+def path_result(file_path, verdict, rule):
+    """Response for a checked path"""
+    # Block writing to system directories and other protected paths
+    if verdict == "protect":
+        return {"error": f"Blocked write to protected path: {file_path} ({rule})"}
+    return {"ok": True}
 
-def validate_file_operation(tool_name, parameters):
+def validate_file_operation(tool_name, parameters, path_rules=None):
     """Validate file operations"""
     
-    if tool_name in ["write", "edit", "multi_edit"]:
-        file_path = parameters.get("file_path", "")
-        
-        # Block writing to system directories
-        dangerous_paths = ["/etc/", "/usr/", "/var/", "/sys/", "/proc/"]
-        for path in dangerous_paths:
-            if file_path.startswith(path):
-                return {"error": f"Blocked write to system directory: {file_path}"}
-        
-        # Notify for important file modifications
-        important_files = ["package.json", "requirements.txt", "Cargo.toml", ".gitignore"]
-        if any(file_path.endswith(f) for f in important_files):
-            send_notification("📝 Claude Code", f"Modifying {file_path}", "Glass")
+    if tool_name not in ["write", "edit", "multi_edit"]:
+        return {"ok": True}
     
-    return {"ok": True}
+    path_rules = path_rules or path_policy.load_policy()
+    paths = path_policy.target_paths(parameters)
+    if len(paths) <= 1:
+        return validate_path(paths[0] if paths else "", path_rules)
+    
+    # Many target paths (multi_edit): one verdict per path
+    results = [dict(validate_path(path, path_rules), file_path=path) for path in paths]
+    errors = [r["error"] for r in results if r.get("error")]
+    if errors:
+        return {"error": "; ".join(errors), "results": results}
+    return {"ok": True, "results": results}
 
-def main():
+def validate_tool_call(tool_name, parameters, policy=None, path_rules=None):
+    """Verdict for one tool invocation"""
+    if tool_name == "bash":
+        command = parameters.get("command", "")
+        if command:
+            with hook_metrics.phase("validate_command"):
+                return validate_command(command, tool_name, policy)
+    
+    with hook_metrics.phase("validate_file_operation"):
+        return validate_file_operation(tool_name, parameters, path_rules)
+
+def validate_batch(calls, policy=None, path_rules=None):
+    """Validate many tool invocations in one pass, sharing the loaded policies"""
+    policy = policy or command_policy.load_policy()
+    path_rules = path_rules or path_policy.load_policy()
+    results = []
+    for call in calls:
+        try:
+            results.append(validate_tool_call(call.get("tool_name", ""), call.get("parameters", {}), policy, path_rules))
+        except Exception as e:
+            results.append({"error": f"Hook error: {str(e)}"})
+    return batch_result(results)
+
+def batch_result(results):
+    """Response for a batch; blocked when any call is"""
+    blocked = sum(1 for r in results if r.get("error"))
+    if blocked:
+        return {"error": f"Blocked {blocked} of {len(results)} tool calls", "results": results}
+    return {"ok": True, "results": results}
+
+def process(raw):
+    """Run pre-tool validation on a raw hook payload, returning (response, exit_code)"""
+    hook_metrics.begin("pre_tool")
     try:
-        data = json.load(sys.stdin)
+        with hook_metrics.phase("parse"):
+            data = json.loads(raw)
+        # Batch of tool invocations (e.g. parallel tool calls)
+        if isinstance(data.get("batch"), list):
+            hook_metrics.set_tool("batch")
+            result = validate_batch(data["batch"])
+            if result.get("error"):
+                send_notification("⚠️ Claude Code", result["error"], "Basso")
+            return result, 1 if result.get("error") else 0
+        
         tool_name = data.get("tool_name", "")
         parameters = data.get("parameters", {})
+        hook_metrics.set_tool(tool_name)
         
-        # Handle bash commands
-        if tool_name == "bash":
-            command = parameters.get("command", "")
-            if command:
-                result = validate_command(command, tool_name)
-                print(json.dumps(result))
-                if result.get("error"):
-                    sys.exit(1)
-                return
+        result = validate_tool_call(tool_name, parameters)
+        if result.get("error"):
+            if tool_name != "bash":  # Dangerous commands already notified
+                send_notification("⚠️ Claude Code", result["error"], "Basso")
+            return result, 1
         
-        # Handle file operations
-        file_result = validate_file_operation(tool_name, parameters)
-        if file_result.get("error"):
-            send_notification("⚠️ Claude Code", file_result["error"], "Basso")
-            print(json.dumps(file_result))
-            sys.exit(1)
-        
-        # Default: allow operation
-        print(json.dumps({"ok": True}))
+        return result, 0
         
     except Exception as e:
         error_msg = f"Hook error: {str(e)}"
         send_notification("❌ Claude Code", error_msg, "Basso")
-        print(json.dumps({"error": error_msg}))
-        sys.exit(1)
+        return {"error": error_msg}, 1
+
+def fallback_verdict(raw):
+    """Verdict for when the full validation misses its budget: from the rules already in
+    memory, or a block when a project policy would have to be loaded first. Uses no cache,
+    lock or notification, since the stalled main thread may be holding one of them"""
+    try:
+        data = json.loads(raw)
+        policy = command_policy.loaded_policy()
+        path_rules = path_policy.loaded_policy()
+        if policy is None or path_rules is None:
+            return {"error": "Blocked: validation timed out before the project policy was loaded"}, 1
+        if isinstance(data.get("batch"), list):
+            result = batch_result([fallback_call(call.get("tool_name", ""), call.get("parameters", {}), policy, path_rules)
+                                   for call in data["batch"]])
+        else:
+            result = fallback_call(data.get("tool_name", ""), data.get("parameters", {}), policy, path_rules)
+        return result, 1 if result.get("error") else 0
+    except Exception as e:
+        return {"error": f"Hook error: {str(e)}"}, 1
+
+def fallback_call(tool_name, parameters, policy, path_rules):
+    """Verdict for one tool invocation straight from the policies"""
+    command = parameters.get("command", "") if tool_name == "bash" else ""
+    if command:
+        return command_result(command, policy.classify(command))
+    if tool_name not in ["write", "edit", "multi_edit"]:
+        return {"ok": True}
+    errors = []
+    for path in path_policy.target_paths(parameters):
+        error = path_result(path, *path_rules.check(path)).get("error")
+        if error:
+            errors.append(error)
+    return {"error": "; ".join(errors)} if errors else {"ok": True}
+
+def main():
+    raw = sys.stdin.read()
+    if hook_trace.enabled():
+        hook_trace.record("pre_tool", raw)
+    watchdog = hook_budget.Watchdog(hook_budget.start("pre_tool"), lambda: fallback_verdict(raw))
+    with hook_metrics.phase("total"):
+        response, exit_code = process(raw)
+    watchdog.disarm()
+    print(json.dumps(response))
+    if exit_code:
+        sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Per-hook latency budgets
+
+Every hook run gets a deadline of CLAUDE_HOOK_BUDGET_MS, or of the per-hook
+override CLAUDE_HOOK_BUDGET_MS_<HOOK> (e.g. CLAUDE_HOOK_BUDGET_MS_PRE_TOOL).
+Essential work, including every log record and stats row, always runs.
+Optional work (showing notifications, queueing checkpoints) goes through
+run(): it runs while budget remains, is deferred until after the response in
+a long-lived process (the hook daemon), and is shed otherwise. Subprocesses and lock waits take their timeout from timeout().
+"""
+import os
+import time
+
+DEFAULT_BUDGET_MS = {
+    "pre_tool": 1000,
+    "post_tool": 1000,
+    "notification": 1000,
+    "stop": 15000
+}
+FALLBACK_BUDGET_MS = 1000
+SUBPROCESS_TIMEOUT_SECONDS = 10
+MIN_TIMEOUT_SECONDS = 0.1
+
+def budget_ms(hook):
+    """Latency budget of a hook in milliseconds"""
+    for name in (f"CLAUDE_HOOK_BUDGET_MS_{hook.upper()}", "CLAUDE_HOOK_BUDGET_MS"):
+        try:
+            return max(0, int(os.environ[name]))
+        except (KeyError, ValueError):
+            pass
+    return DEFAULT_BUDGET_MS.get(hook, FALLBACK_BUDGET_MS)
+
+class Deadline:
+    """Wall-clock deadline for one hook run"""
+
+    def __init__(self, hook, started=None):
+        self.hook = hook
+        self.started = started if started is not None else time.monotonic()
+        self.expires = self.started + budget_ms(hook) / 1000
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires
+
+_state = {"deadline": None, "deferred": None}
+
+def start(hook, started=None):
+    """Begin the budget of a hook run in this process"""
+    _state["deadline"] = Deadline(hook, started)
+    return _state["deadline"]
+
+def current():
+    return _state["deadline"]
+
+def remaining():
+    """Seconds left for the current hook run, or None outside of one"""
+    deadline = _state["deadline"]
+    return deadline.remaining() if deadline is not None else None
+
+def timeout(limit=SUBPROCESS_TIMEOUT_SECONDS):
+    """Timeout for a blocking call (subprocess, lock wait): `limit`, capped by what is left of the budget"""
+    left = remaining()
+    if left is None:
+        return limit
+    return max(MIN_TIMEOUT_SECONDS, min(limit, left))
+
+def shedding():
+    """True when run() would drop work: the budget is spent and nothing defers it"""
+    deadline = _state["deadline"]
+    return deadline is not None and deadline.expired() and _state["deferred"] is None
+
+def run(func, *args, **kwargs):
+    """Run optional work now if budget remains, otherwise defer or shed it"""
+    deadline = _state["deadline"]
+    if deadline is None or not deadline.expired():
+        return func(*args, **kwargs)
+    if _state["deferred"] is not None:
+        _state["deferred"].append((func, args, kwargs))
+    return None
+
+def enable_deferral():
+    """Keep work that misses the budget for run_deferred() instead of dropping it"""
+    if _state["deferred"] is None:
+        _state["deferred"] = []
+
+def run_deferred():
+    """Run deferred work once the hook has answered"""
+    _state["deadline"] = None
+    if not _state["deferred"]:
+        return
+    deferred, _state["deferred"] = _state["deferred"], []
+    for func, args, kwargs in deferred:
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            pass  # Deferred work is best effort
+
+class Watchdog:
+    """Answers with fallback() and exits if the hook is still running when its deadline passes"""
+
+    def __init__(self, deadline, fallback):
+        import threading
+
+        self.fallback = fallback
+        self.lock = threading.Lock()
+        self.done = False
+        self.timer = threading.Timer(deadline.remaining(), self._expire)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _expire(self):
+        import sys
+        import json
+
+        with self.lock:
+            if self.done:
+                return
+            self.done = True
+            try:
+                response, exit_code = self.fallback()
+                sys.stdout.write(json.dumps(response) + "\n")
+                sys.stdout.flush()
+            except Exception:
+                exit_code = 1
+            os._exit(exit_code)
+
+    def disarm(self):
+        """Called once the real response is ready; after this the watchdog never fires"""
+        with self.lock:
+            self.done = True
+            self.timer.cancel()
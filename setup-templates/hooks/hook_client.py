@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Thin hook client that forwards a hook payload to the per-project hook daemon
+
+Usage: hook_client.py <pre_tool|post_tool|log_tool>
+
+pre_tool also takes a {"batch": [...]} payload of tool calls, validated in
+one daemon request. The daemon (hook_daemon.py) is spawned on first use. If it is not reachable
+the hook runs in this process exactly like the standalone script would.
+"""
+import sys
+import os
+import _socket  # The socket wrapper module pulls in enum/selectors; keep startup lean
+
+if sys.flags.isolated:
+    # python3 -I (the fast-start bundle) leaves the script's directory off sys.path
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import hook_paths
+import hook_budget
+
+HOOK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HOOK_MODULES = {
+    "pre_tool": "enhanced_pre_tool",
+    "post_tool": "enhanced_post_tool",
+    "log_tool": "tool_logger"
+}
+
+CONNECT_TIMEOUT = 0.05
+# Reply of a daemon whose hook files changed on disk: it exits without running the hook
+RESTART_STATUS = "restart"
+
+def socket_path():
+    """Per-project daemon socket"""
+    return hook_paths.socket_path("hookd.sock")
+
+def connect():
+    """Connect to the daemon socket, raising OSError if it is not listening"""
+    path = socket_path()
+    if not hook_paths.owned_socket(path):
+        raise FileNotFoundError(path)  # Missing, or someone else's; never send it payloads
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def forward(sock, hook, raw, timeout):
+    """Send a payload to the daemon and return (exit_code, stdout_text), or None when
+    the daemon is restarting"""
+    fields = [hook, os.getcwd()]
+    fields += [f"{k}={v}" for k, v in os.environ.items() if k.startswith("CLAUDE_")]
+    header = "\0".join(fields).encode()
+
+    try:
+        sock.settimeout(timeout)
+        sock.sendall(b"%d\n" % len(header) + header + raw)
+        sock.shutdown(_socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        sock.close()
+
+    status, _, output = b"".join(chunks).decode().partition("\n")
+    if status == RESTART_STATUS:
+        return None
+    return int(status), output
+
+def spawn_daemon():
+    """Start the hook daemon in the background for subsequent calls"""
+    import subprocess
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.join(HOOK_DIR, "hook_daemon.py")],
+            cwd=os.getcwd(),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except OSError:
+        pass  # Daemon is an optimization only
+
+def load_module(hook):
+    import importlib
+    return importlib.import_module(HOOK_MODULES[hook])
+
+def run_in_process(hook, raw):
+    """Run the hook logic directly, as the standalone script would"""
+    import json
+    module = load_module(hook)
+    watchdog = None
+    if hasattr(module, "fallback_verdict"):
+        # Hooks with a fallback verdict must answer within their budget
+        watchdog = hook_budget.Watchdog(hook_budget.current(), lambda: module.fallback_verdict(raw.decode()))
+    import hook_metrics
+    with hook_metrics.phase("total"):
+        response, exit_code = module.process(raw.decode())
+    if watchdog is not None:
+        watchdog.disarm()
+    return exit_code, json.dumps(response)
+
+def recover(hook, raw):
+    """Answer after the daemon failed or missed the budget mid-request"""
+    import json
+    module = load_module(hook)
+    if not hasattr(module, "fallback_verdict"):
+        # The daemon may already have run the side effects; just pass through
+        return 0, raw.decode() or "{}"
+    if not hook_budget.current().expired():
+        return run_in_process(hook, raw)
+    response, exit_code = module.fallback_verdict(raw.decode())
+    return exit_code, json.dumps(response)
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in HOOK_MODULES:
+        print(f"Usage: hook_client.py <{'|'.join(HOOK_MODULES)}>")
+        sys.exit(1)
+
+    hook = sys.argv[1]
+    hook_budget.start(hook)
+    raw = sys.stdin.buffer.read()
+
+    if os.environ.get("CLAUDE_HOOK_TRACE", "0") not in ("", "0"):
+        import hook_trace
+        hook_trace.record(hook, raw)
+
+    if os.environ.get("CLAUDE_HOOK_DAEMON", "1") == "0":
+        exit_code, output = run_in_process(hook, raw)
+    else:
+        try:
+            sock = connect()
+        except (ConnectionRefusedError, FileNotFoundError):
+            spawn_daemon()
+            sock = None
+        except OSError:
+            sock = None  # Daemon is busy; don't wait for it
+
+        if sock is None:
+            exit_code, output = run_in_process(hook, raw)
+        else:
+            try:
+                reply = forward(sock, hook, raw, hook_budget.timeout())
+            except (OSError, ValueError):
+                reply = recover(hook, raw)
+            # The next call starts a daemon with the new code
+            exit_code, output = reply if reply is not None else run_in_process(hook, raw)
+
+    print(output)
+    if exit_code:
+        sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
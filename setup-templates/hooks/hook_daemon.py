@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Long-lived hook server for the pre-tool and post-tool hooks
+
+Started on demand by hook_client.py. It keeps the hook modules imported (and
+their compiled state warm) and serves one request at a time on a per-project
+Unix socket. It exits after CLAUDE_HOOK_DAEMON_IDLE seconds without requests,
+and as soon as any hook file changes on disk: that request is answered with
+RESTART_STATUS so the client runs it in process, and the next call starts a
+daemon with the new code.
+"""
+import os
+import json
+import fcntl
+import socket
+import importlib
+import socketserver
+
+from hook_client import HOOK_DIR, HOOK_MODULES, RESTART_STATUS, socket_path
+from hook_paths import run_path
+import hook_budget
+import hook_metrics
+import log_writer
+import notify_dispatcher
+
+DEFAULT_IDLE_SECONDS = 1800
+
+class HookRequestHandler(socketserver.StreamRequestHandler):
+    """Read a length-prefixed header plus the raw payload, reply with exit code and output"""
+
+    def handle(self):
+        try:
+            size = int(self.rfile.readline())
+            hook, cwd, *env = self.rfile.read(size).decode().split("\0")
+            header = {"hook": hook, "cwd": cwd, "env": dict(item.split("=", 1) for item in env)}
+            raw = self.rfile.read().decode()
+            if self.server.sources_changed():
+                self.server.retire()
+                self.wfile.write(f"{RESTART_STATUS}\n".encode())
+                return
+            exit_code, output = self.server.dispatch(header, raw)
+        except Exception as e:
+            exit_code, output = 1, json.dumps({"error": f"Hook daemon error: {str(e)}"})
+        self.wfile.write(f"{exit_code}\n{output}".encode())
+
+        # Release the client before running work that missed the budget
+        try:
+            self.connection.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        hook_budget.run_deferred()
+
+def hook_sources():
+    """{file name: (mtime, size)} of every hook module the daemon may have imported"""
+    sources = {}
+    for entry in os.scandir(HOOK_DIR):
+        if entry.name.endswith(".py"):
+            try:
+                stat = entry.stat()
+                sources[entry.name] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                pass  # Removed meanwhile; shows up as a change next time
+    return sources
+
+class HookServer(socketserver.UnixStreamServer):
+    """Serial hook server; requests never overlap, so the process env is per-request"""
+
+    def __init__(self, path, idle_seconds):
+        self.timeout = idle_seconds
+        self.idle = False
+        self.sources = hook_sources()
+        super().__init__(path, HookRequestHandler)
+        os.chmod(path, 0o600)
+
+    def handle_timeout(self):
+        self.idle = True
+
+    def retire(self):
+        """Stop taking connections; clients start a new daemon meanwhile"""
+        self.idle = True
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+    def sources_changed(self):
+        """True once a hook file was added, removed or modified since the daemon started"""
+        return hook_sources() != self.sources
+
+    def dispatch(self, header, raw):
+        """Run a hook in the caller's working directory and CLAUDE_* environment"""
+        module = importlib.import_module(HOOK_MODULES[header["hook"]])
+
+        for key in [k for k in os.environ if k.startswith("CLAUDE_")]:
+            del os.environ[key]
+        os.environ.update(header.get("env", {}))
+        os.chdir(header.get("cwd") or os.getcwd())
+
+        hook_budget.start(header["hook"])
+        with hook_metrics.phase("total"):
+            response, exit_code = module.process(raw)
+        return exit_code, json.dumps(response)
+
+def main():
+    # Only one daemon per project
+    lock = open(run_path("hookd.lock"), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return
+
+    path = socket_path()
+    if os.path.exists(path):
+        os.unlink(path)  # Stale socket from a previous daemon
+
+    # Appends from a long-lived process are batched, notifications dispatched from a thread,
+    # and work that misses a hook's budget runs after the reply
+    log_writer.enable_batching()
+    notify_dispatcher.start_in_process()
+    hook_budget.enable_deferral()
+    hook_metrics.enable_periodic_flush()
+    hook_metrics.serve()
+
+    idle_seconds = int(os.environ.get("CLAUDE_HOOK_DAEMON_IDLE", DEFAULT_IDLE_SECONDS))
+    server = HookServer(path, idle_seconds)
+    try:
+        while not server.idle:
+            server.handle_request()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Phase timing for the hooks, as mergeable latency histograms
+
+Hooks wrap their phases in `with hook_metrics.phase("validate_command"):`.
+Durations land in fixed-bucket histograms keyed by hook, phase and tool, so
+histograms from any number of processes merge by adding counts. Each process
+merges what it recorded into run/metrics.json on exit (the daemon every few
+seconds), skipping the merge when another process holds the file, and rewrites logs/hook_metrics.prom for the Prometheus textfile
+collector. A long-lived process can also serve /metrics on
+127.0.0.1:CLAUDE_HOOK_METRICS_PORT.
+"""
+import os
+import json
+import time
+import fcntl
+import bisect
+import threading
+from contextlib import contextmanager
+
+from hook_paths import LOG_DIR, run_path
+
+METRIC = "claude_hook_phase_duration_seconds"
+# Upper bounds in seconds; the last bucket is +Inf
+BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+FLUSH_INTERVAL_SECONDS = 10
+
+_state = {"hook": "unknown", "tool": "", "pending": {}, "atexit": False}
+_lock = threading.Lock()
+
+def textfile_path(log_dir=LOG_DIR):
+    return os.path.join(log_dir, "hook_metrics.prom")
+
+def begin(hook, tool=""):
+    """Label the phases recorded from now on"""
+    _state["hook"] = hook
+    _state["tool"] = tool
+
+def set_tool(tool):
+    _state["tool"] = tool or ""
+
+def observe(phase, seconds, hook=None, tool=None):
+    """Add one duration to the histogram of a phase"""
+    key = "|".join((hook or _state["hook"], phase, _state["tool"] if tool is None else tool))
+    with _lock:
+        series = _state["pending"].get(key)
+        if series is None:
+            # One count per bucket (the last is +Inf), then sum and count
+            series = _state["pending"][key] = [0] * (len(BUCKETS) + 1) + [0.0, 0]
+        series[bisect.bisect_left(BUCKETS, seconds)] += 1
+        series[-2] += seconds
+        series[-1] += 1
+    if not _state["atexit"]:
+        import atexit
+        atexit.register(flush)
+        _state["atexit"] = True
+
+@contextmanager
+def phase(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+def merge(into, histograms):
+    """Add histograms into another set of histograms"""
+    for key, series in histograms.items():
+        target = into.get(key)
+        if target is None:
+            into[key] = list(series)
+        else:
+            for i, value in enumerate(series):
+                target[i] += value
+    return into
+
+def _load(f):
+    f.seek(0)
+    try:
+        return json.loads(f.read() or "{}")
+    except ValueError:
+        return {}
+
+def flush(log_dir=LOG_DIR):
+    """Merge this process's observations into the shared histograms and re-export the textfile
+
+    Never waits for the lock: if another process is flushing, the observations
+    stay pending for the next flush (a one-shot hook exiting just drops them).
+    """
+    with _lock:
+        pending, _state["pending"] = _state["pending"], {}
+    if not pending:
+        return
+    try:
+        with open(run_path("metrics.json"), "a+") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                with _lock:
+                    merge(_state["pending"], pending)
+                return
+            histograms = merge(_load(f), pending)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(histograms))
+            f.flush()
+            write_textfile(histograms, log_dir)
+    except OSError:
+        pass  # Metrics are best effort
+
+def snapshot():
+    """Shared histograms plus what this process has not flushed yet"""
+    try:
+        with open(run_path("metrics.json"), "r") as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            histograms = _load(f)
+    except OSError:
+        histograms = {}
+    with _lock:
+        return merge(histograms, _state["pending"])
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def render(histograms):
+    """Prometheus text exposition format"""
+    lines = [
+        f"# HELP {METRIC} Time spent in each phase of a hook run",
+        f"# TYPE {METRIC} histogram"
+    ]
+    for key in sorted(histograms):
+        hook, phase_name, tool = key.split("|", 2)
+        labels = f'hook="{_label(hook)}",phase="{_label(phase_name)}",tool="{_label(tool)}"'
+        series = histograms[key]
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ["+Inf"], series):
+            cumulative += count
+            lines.append(f'{METRIC}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{METRIC}_sum{{{labels}}} {series[-2]:.6f}")
+        lines.append(f"{METRIC}_count{{{labels}}} {series[-1]}")
+    return "\n".join(lines) + "\n"
+
+def write_textfile(histograms, log_dir=LOG_DIR):
+    path = textfile_path(log_dir)
+    os.makedirs(log_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render(histograms))
+    os.replace(tmp_path, path)
+
+def enable_periodic_flush(interval=FLUSH_INTERVAL_SECONDS):
+    """Flush from a background thread; for long-lived processes"""
+    def run():
+        while True:
+            time.sleep(interval)
+            flush()
+
+    threading.Thread(target=run, daemon=True).start()
+
+def serve(port=None):
+    """Serve /metrics on localhost from a background thread when CLAUDE_HOOK_METRICS_PORT is set"""
+    port = port or os.environ.get("CLAUDE_HOOK_METRICS_PORT")
+    if not port:
+        return None
+
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render(snapshot()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep scrapes out of stderr
+
+    try:
+        server = HTTPServer(("127.0.0.1", int(port)), MetricsHandler)
+    except (OSError, ValueError):
+        return None  # Port taken (e.g. by another project's daemon) or invalid
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Shared locations for hook logs, runtime state and caches
+"""
+import os
+
+CLAUDE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+LOG_DIR = os.path.join(CLAUDE_DIR, 'logs')
+RUN_DIR = os.path.join(CLAUDE_DIR, 'run')
+CACHE_DIR = os.path.join(CLAUDE_DIR, 'cache')
+
+def private_dir(path):
+    """Create a runtime directory that git checkpoints never pick up"""
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, '.gitignore'), 'w') as f:
+            f.write('*\n')
+    return path
+
+def run_path(name):
+    """Path of a runtime file (sockets, locks, queues)"""
+    return os.path.join(private_dir(RUN_DIR), name)
+
+def cache_path(name):
+    """Path of a cache file that can be rebuilt at any time"""
+    return os.path.join(private_dir(CACHE_DIR), name)
+
+def user_runtime_dir():
+    """Per-user directory for sockets: $XDG_RUNTIME_DIR/claude-code-ultra, else
+    /tmp/claude-code-ultra-<uid>; OSError unless it is a 0700 directory of this user"""
+    import stat
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base and os.path.isabs(base):
+        path = os.path.join(base, "claude-code-ultra")
+    else:
+        path = os.path.join("/tmp", f"claude-code-ultra-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"not a private directory: {path}")
+    return path
+
+def socket_path(name):
+    """Path of a per-project Unix socket, in user_runtime_dir() when the project path
+    is too long for a socket address"""
+    path = run_path(name)
+    if len(path.encode()) < 100:
+        return path
+    import hashlib
+    digest = hashlib.sha1(CLAUDE_DIR.encode()).hexdigest()[:16]
+    stem, ext = os.path.splitext(name)
+    return os.path.join(user_runtime_dir(), f"{stem}-{digest}{ext}")
+
+def owned_socket(path):
+    """True if a socket exists and belongs to this user, so it may be sent hook payloads"""
+    try:
+        return os.lstat(path).st_uid == os.getuid()
+    except OSError:
+        return False
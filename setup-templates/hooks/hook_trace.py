@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Hook payload recorder
+
+With CLAUDE_HOOK_TRACE=1 every hook appends the exact stdin payload it
+received to logs/trace_YYYYMMDD.log (one JSON record per line, rotated and
+expired like the other logs). With CLAUDE_HOOK_TRACE_REDACT=1 the values of
+content-like parameters are replaced by same-length filler and secrets in
+commands are masked; set it to a comma-separated list of parameter names to
+choose which values are replaced. Traces feed benchmarks/hook_replay.py.
+"""
+import os
+import re
+import json
+import time
+
+# Hook names used by hook_client/the scripts -> settings.json hook events
+EVENTS = {
+    "pre_tool": "pre_tool_use",
+    "post_tool": "post_tool_use",
+    "notification": "notification",
+    "stop": "stop"
+}
+
+DEFAULT_REDACTED_KEYS = ["content", "new_string", "old_string", "new_source", "text"]
+
+SECRET_PATTERNS = [
+    re.compile(r'(?i)(--?(?:password|passwd|token|secret|api[-_]?key)[= ])\S+'),
+    re.compile(r'(?i)((?:password|passwd|token|secret|api[-_]?key)\w*=)\S+'),
+    re.compile(r'(?i)(authorization:\s*(?:bearer|basic)\s+)\S+'),
+    re.compile(r'()(?:AKIA[0-9A-Z]{16}|gh[pousr]_[A-Za-z0-9]{20,}|sk-[A-Za-z0-9_-]{20,}|xox[abpr]-[A-Za-z0-9-]{10,})'),
+    re.compile(r'(://[^/\s:@]+:)[^@\s]+(?=@)')
+]
+
+def enabled():
+    return os.environ.get("CLAUDE_HOOK_TRACE", "0") not in ("", "0")
+
+def redacted_keys():
+    setting = os.environ.get("CLAUDE_HOOK_TRACE_REDACT", "0")
+    if setting in ("", "0"):
+        return None
+    if setting == "1":
+        return set(DEFAULT_REDACTED_KEYS)
+    return {key.strip() for key in setting.split(",") if key.strip()}
+
+def mask_secrets(text):
+    for pattern in SECRET_PATTERNS:
+        text = pattern.sub(lambda m: m.group(1) + "*" * (len(m.group(0)) - len(m.group(1))), text)
+    return text
+
+def redact(value, keys):
+    """Copy of a payload with sensitive values replaced by same-length filler"""
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if key in keys and isinstance(item, str):
+                result[key] = "x" * len(item)
+            else:
+                result[key] = redact(item, keys)
+        return result
+    if isinstance(value, list):
+        return [redact(item, keys) for item in value]
+    if isinstance(value, str):
+        return mask_secrets(value)
+    return value
+
+def record(hook, raw):
+    """Append a hook's raw stdin payload to the trace log"""
+    try:
+        import log_writer  # Only pay for the log writer when tracing is on
+        if isinstance(raw, bytes):
+            raw = raw.decode(errors="replace")
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            payload = raw  # Keep unparsable payloads verbatim
+
+        keys = redacted_keys()
+        if keys is not None:
+            payload = redact(payload, keys)
+
+        log_writer.append("trace", {
+            "ts": time.time(),
+            "event": EVENTS.get(hook, hook),
+            "session_id": os.environ.get("CLAUDE_SESSION_ID", "unknown"),
+            "cwd": os.getcwd(),
+            "payload": payload
+        })
+    except Exception:
+        pass  # Tracing must never break a hook
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Sidecar index over the JSONL hook logs
+
+For every log segment, logs/.index/ keeps a binary record per line (byte
+offset, length, timestamp, tool, session, exit code) and a small JSON meta
+file with the dictionaries, the indexed size and per-(tool, session, exit)
+counts. Indexing is incremental: only bytes appended since the last update
+are parsed. Queries prune segments by date and by their summary counts, and
+read only the byte ranges of matching lines.
+
+An index belongs to the file it was built from: the meta records its inode
+and a checksum of its first bytes. When the active file is rotated, its
+index moves to the rotated name; a new file that merely reuses a freed inode
+never inherits an index.
+"""
+import os
+import io
+import json
+import gzip
+import fcntl
+import zlib
+import struct
+from datetime import datetime
+
+from hook_paths import LOG_DIR
+import log_writer
+
+INDEX_VERSION = 2
+HEAD_BYTES = 4096  # Checksummed to tell a segment from a new file on a reused inode
+RECORD = struct.Struct('<QIdHIi')  # offset, length, timestamp, tool, session, exit code
+NO_EXIT_CODE = -2 ** 31
+
+def index_dir(log_dir=LOG_DIR):
+    return os.path.join(log_dir, '.index')
+
+def _parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+def _open_segment(path):
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+def _head_crc(path, size):
+    """Checksum of the first size bytes of an uncompressed segment"""
+    with open(path, 'rb') as f:
+        return zlib.crc32(f.read(size))
+
+class SegmentIndex:
+    """Index files for one log segment"""
+
+    def __init__(self, path, kind=None, date=None, log_dir=LOG_DIR):
+        self.path = path
+        self.kind = kind
+        self.date = date
+        name = os.path.basename(path)
+        self.idx_path = os.path.join(index_dir(log_dir), name + '.idx')
+        self.meta_path = os.path.join(index_dir(log_dir), name + '.meta.json')
+        self.meta = None
+
+    def _empty_meta(self, stat):
+        return {
+            "version": INDEX_VERSION,
+            "ino": stat.st_ino,
+            "indexed_bytes": 0,
+            "records": 0,
+            "tools": [],
+            "sessions": [],
+            "counts": {},
+            "min_ts": None,
+            "max_ts": None,
+            "head_bytes": 0,
+            "head_crc": 0
+        }
+
+    def load_meta(self):
+        if self.meta is None:
+            try:
+                with open(self.meta_path, 'r') as f:
+                    self.meta = json.load(f)
+            except (OSError, ValueError):
+                self.meta = {}
+        return self.meta
+
+    def describes(self, meta, stat):
+        """Whether an index meta was built from the file with this stat"""
+        if meta.get("version") != INDEX_VERSION or meta.get("ino") != stat.st_ino:
+            return False
+        if self.path.endswith('.gz'):
+            return True
+        try:
+            return stat.st_size >= meta["indexed_bytes"] and \
+                _head_crc(self.path, meta["head_bytes"]) == meta["head_crc"]
+        except (OSError, KeyError, TypeError):
+            return False
+
+    def adopts(self, orphan, stat):
+        """Whether an orphaned index is this segment's under its pre-rotation name"""
+        match = log_writer.LOG_NAME.match(os.path.basename(orphan.path))
+        if self.path.endswith('.gz') or not match or match.group("gz"):
+            return False
+        if (match.group("kind"), match.group("date")) != (self.kind, self.date):
+            return False
+        return self.describes(orphan.load_meta(), stat)
+
+    def update(self, orphans=None):
+        """Index lines appended since the last update"""
+        stat = os.stat(self.path)
+        meta = self.load_meta()
+        compressed = self.path.endswith('.gz')
+
+        if not self.describes(meta, stat):
+            # The active file was rotated to this name: reuse the index built under its old name
+            orphan = (orphans or {}).get(stat.st_ino)
+            if orphan and self.adopts(orphan, stat):
+                del orphans[stat.st_ino]
+                os.replace(orphan.idx_path, self.idx_path)
+                os.replace(orphan.meta_path, self.meta_path)
+                self.meta = None
+                meta = self.load_meta()
+            else:
+                meta = self.meta = self._empty_meta(stat)
+                if os.path.exists(self.idx_path):
+                    os.unlink(self.idx_path)
+
+        if compressed and meta["indexed_bytes"]:
+            return  # Compressed segments are immutable
+        if not compressed and stat.st_size <= meta["indexed_bytes"]:
+            return
+
+        tools = {name: i for i, name in enumerate(meta["tools"])}
+        sessions = {name: i for i, name in enumerate(meta["sessions"])}
+        counts = meta["counts"]
+        records = []
+
+        with _open_segment(self.path) as f:
+            if compressed:
+                data = f.read()
+            else:
+                f.seek(meta["indexed_bytes"])
+                data = f.read(stat.st_size - meta["indexed_bytes"])
+
+        end = data.rfind(b'\n') + 1  # Only complete lines
+        offset = meta["indexed_bytes"]
+        for line in io.BytesIO(data[:end]):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                entry = {}
+            if not isinstance(entry, dict):
+                entry = {}
+
+            tool = str(entry.get("tool_name") or entry.get("type") or "")
+            session = str(entry.get("session_id") or "")
+            exit_code = entry.get("exit_code")
+            exit_code = exit_code if isinstance(exit_code, int) else NO_EXIT_CODE
+            ts = _parse_timestamp(entry.get("timestamp"))
+
+            tool_id = tools.setdefault(tool, len(tools))
+            session_id = sessions.setdefault(session, len(sessions))
+            records.append(RECORD.pack(offset, len(line), ts, tool_id, session_id, exit_code))
+
+            key = f"{tool_id},{session_id},{exit_code}"
+            counts[key] = counts.get(key, 0) + 1
+            if ts:
+                meta["min_ts"] = ts if meta["min_ts"] is None else min(meta["min_ts"], ts)
+                meta["max_ts"] = ts if meta["max_ts"] is None else max(meta["max_ts"], ts)
+            offset += len(line)
+
+        with open(self.idx_path, 'ab') as f:
+            f.truncate(meta["records"] * RECORD.size)  # Drop records from an interrupted update
+            f.write(b"".join(records))
+
+        meta["tools"] = sorted(tools, key=tools.get)
+        meta["sessions"] = sorted(sessions, key=sessions.get)
+        meta["indexed_bytes"] = offset if not compressed else max(offset, 1)
+        if not compressed and meta["head_bytes"] < HEAD_BYTES:
+            meta["head_bytes"] = min(offset, HEAD_BYTES)
+            meta["head_crc"] = _head_crc(self.path, meta["head_bytes"])
+        meta["records"] += len(records)
+        tmp_path = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def records(self):
+        with open(self.idx_path, 'rb') as f:
+            data = f.read()
+        return RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size])
+
+    def read_lines(self, ranges):
+        """Read the given (offset, length) byte ranges, in order"""
+        lines = []
+        with _open_segment(self.path) as f:
+            for offset, length in sorted(ranges):
+                f.seek(offset)
+                lines.append(f.read(length).decode())
+        return lines
+
+def update_index(log_dir=LOG_DIR, kind=None, query=None):
+    """Bring the index up to date for every segment (or those a query can match)"""
+    os.makedirs(index_dir(log_dir), exist_ok=True)
+    with open(os.path.join(index_dir(log_dir), '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return _update_index(log_dir, kind, query)
+
+def _update_index(log_dir, kind, query):
+    segments = log_writer.list_segments(log_dir)
+    live = {os.path.basename(path) for path, _, _, _ in segments}
+
+    # Indexes whose file was renamed (rotated) or removed
+    orphans = {}
+    for name in os.listdir(index_dir(log_dir)):
+        if name.endswith('.meta.json') and name[:-len('.meta.json')] not in live:
+            orphan = SegmentIndex(os.path.join(log_dir, name[:-len('.meta.json')]), log_dir=log_dir)
+            ino = orphan.load_meta().get("ino")
+            if ino is not None:
+                orphans[ino] = orphan
+
+    indexes = []
+    for path, segment_kind, date, _ in segments:
+        if kind is not None and segment_kind != kind:
+            continue
+        if query is not None and not query.wants(segment_kind, date):
+            continue
+        index = SegmentIndex(path, segment_kind, date, log_dir)
+        try:
+            index.update(orphans)
+        except OSError:
+            continue  # Removed by retention while we were scanning
+        indexes.append(index)
+
+    for orphan in orphans.values():
+        if kind is not None and not os.path.basename(orphan.path).startswith(kind + "_"):
+            continue  # May still be adopted by a later query of its own kind
+        for stale in (orphan.idx_path, orphan.meta_path):
+            try:
+                os.unlink(stale)
+            except OSError:
+                pass
+    return indexes
+
+class Query:
+    """Filters over indexed log records"""
+
+    def __init__(self, kind=None, tool=None, session=None, exit_code=None, failed=False, since=None, until=None):
+        self.kind = kind
+        self.tool = tool
+        self.session = session
+        self.exit_code = exit_code
+        self.failed = failed
+        self.since = since
+        self.until = until
+
+    def wants(self, kind, date):
+        """True if a segment of this kind and date can hold matching records"""
+        return (self.kind is None or kind == self.kind) and self._date_in_range(date)
+
+    def _date_in_range(self, date):
+        if self.since is not None and date < datetime.fromtimestamp(self.since).strftime('%Y%m%d'):
+            return False
+        if self.until is not None and date > datetime.fromtimestamp(self.until).strftime('%Y%m%d'):
+            return False
+        return True
+
+    def _exit_matches(self, exit_code):
+        if self.failed and (exit_code == NO_EXIT_CODE or exit_code == 0):
+            return False
+        return self.exit_code is None or exit_code == self.exit_code
+
+    def _ids(self, meta):
+        tool_id = meta["tools"].index(self.tool) if self.tool is not None and self.tool in meta["tools"] else None
+        session_id = meta["sessions"].index(self.session) if self.session is not None and self.session in meta["sessions"] else None
+        return tool_id, session_id
+
+    def _covers(self, meta):
+        """True if the time filter includes every record of the segment"""
+        if meta["min_ts"] is None:
+            return self.since is None and self.until is None
+        return ((self.since is None or meta["min_ts"] >= self.since) and
+                (self.until is None or meta["max_ts"] < self.until))
+
+    def _candidates(self, indexes):
+        for index in indexes:
+            if not self.wants(index.kind, index.date):
+                continue
+            meta = index.load_meta()
+            tool_id, session_id = self._ids(meta)
+            if (self.tool is not None and tool_id is None) or (self.session is not None and session_id is None):
+                continue
+            yield index, meta, tool_id, session_id
+
+    def _matching_records(self, index, tool_id, session_id):
+        for offset, length, ts, tool, session, exit_code in index.records():
+            if tool_id is not None and tool != tool_id:
+                continue
+            if session_id is not None and session != session_id:
+                continue
+            if not self._exit_matches(exit_code):
+                continue
+            if self.since is not None and ts < self.since:
+                continue
+            if self.until is not None and ts >= self.until:
+                continue
+            yield offset, length
+
+    def count(self, indexes):
+        total = 0
+        for index, meta, tool_id, session_id in self._candidates(indexes):
+            if self._covers(meta):
+                # Answer from the per-segment summary without touching the records
+                for key, n in meta["counts"].items():
+                    tool, session, exit_code = (int(v) for v in key.split(","))
+                    if ((tool_id is None or tool == tool_id) and
+                            (session_id is None or session == session_id) and
+                            self._exit_matches(exit_code)):
+                        total += n
+            else:
+                total += sum(1 for _ in self._matching_records(index, tool_id, session_id))
+        return total
+
+    def lines(self, indexes, offset=0, limit=None):
+        """Matching raw lines in log order, skipping `offset` and returning at most `limit`"""
+        results = []
+        for index, meta, tool_id, session_id in self._candidates(indexes):
+            ranges = list(self._matching_records(index, tool_id, session_id))
+            if offset >= len(ranges):
+                offset -= len(ranges)
+                continue
+            ranges = ranges[offset:]
+            offset = 0
+            if limit is not None:
+                ranges = ranges[:limit - len(results)]
+            results.extend(index.read_lines(ranges))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
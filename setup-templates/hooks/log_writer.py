@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Shared JSONL log writer with rotation, compression and retention
+
+Records still go to logs/<kind>_YYYYMMDD.log, one JSON object per line.
+When a daily file grows past CLAUDE_LOG_MAX_BYTES it is renamed to the next
+segment (<kind>_YYYYMMDD.1.log, .2.log, ...). maintain() gzips closed
+segments and previous days' files, deletes files older than
+CLAUDE_LOG_RETENTION_DAYS and prunes the blob store (blob_store.py) the
+same way. Appends hold an exclusive flock on the file, so concurrent hook
+processes never interleave lines or write into a rotated segment.
+Long-lived processes can call enable_batching() to buffer writes.
+"""
+import os
+import re
+import json
+import time
+import fcntl
+import atexit
+import threading
+from datetime import datetime, timedelta
+
+from hook_paths import LOG_DIR, run_path
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_RETENTION_DAYS = 30
+MAINTENANCE_INTERVAL_SECONDS = 3600
+
+LOG_NAME = re.compile(r'^(?P<kind>[a-z_]+)_(?P<date>\d{8})(?:\.(?P<segment>\d+))?\.log(?P<gz>\.gz)?$')
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+def log_path(kind, log_dir=LOG_DIR, when=None):
+    """Active daily log file for a kind of record"""
+    return os.path.join(log_dir, f"{kind}_{(when or datetime.now()).strftime('%Y%m%d')}.log")
+
+def list_segments(log_dir=LOG_DIR, kind=None):
+    """All log files (active, rotated and compressed) as (path, kind, date, segment) in write order"""
+    segments = []
+    try:
+        names = os.listdir(log_dir)
+    except OSError:
+        return segments
+    for name in names:
+        match = LOG_NAME.match(name)
+        if match and (kind is None or match.group("kind") == kind):
+            # The active daily file is always the newest segment of its day
+            segment = int(match.group("segment")) if match.group("segment") else float("inf")
+            segments.append((os.path.join(log_dir, name), match.group("kind"), match.group("date"), segment))
+    segments.sort(key=lambda s: (s[1], s[2], s[3]))
+    return segments
+
+def _next_segment_path(path):
+    base = path[:-len(".log")]
+    directory, prefix = os.path.split(base)
+    highest = 0
+    for name in os.listdir(directory):
+        match = LOG_NAME.match(name)
+        if match and match.group("segment") and name.startswith(prefix + "."):
+            highest = max(highest, int(match.group("segment")))
+    return f"{base}.{highest + 1}.log"
+
+def write_lines(path, lines):
+    """Append complete lines under an exclusive lock, rotating the file when it gets too big"""
+    data = "".join(lines).encode()
+    max_bytes = _env_int("CLAUDE_LOG_MAX_BYTES", DEFAULT_MAX_BYTES)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    while True:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                current = None
+            if current is None or current.st_ino != os.fstat(fd).st_ino:
+                continue  # Rotated while we waited for the lock; reopen
+
+            os.write(fd, data)
+            if os.fstat(fd).st_size >= max_bytes:
+                os.rename(path, _next_segment_path(path))
+            return
+        finally:
+            os.close(fd)
+
+class _BatchWriter:
+    """Buffers lines per file and flushes them from a background thread"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.pending = {}
+        self.lock = threading.Lock()
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+        atexit.register(self.flush)
+
+    def add(self, path, line):
+        with self.lock:
+            self.pending.setdefault(path, []).append(line)
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for path, lines in pending.items():
+            try:
+                write_lines(path, lines)
+            except OSError:
+                pass
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+_batch = {}
+
+def enable_batching(interval=1.0):
+    """Buffer appends in this process and write them every `interval` seconds"""
+    if "writer" not in _batch:
+        _batch["writer"] = _BatchWriter(interval)
+
+def flush():
+    if "writer" in _batch:
+        _batch["writer"].flush()
+
+def append(kind, entry, log_dir=LOG_DIR):
+    """Append one JSON record to today's log for `kind`"""
+    path = log_path(kind, log_dir)
+    line = json.dumps(entry) + '\n'
+    if "writer" in _batch:
+        _batch["writer"].add(path, line)
+    else:
+        write_lines(path, [line])
+
+def _compress(path):
+    """Gzip a closed segment unless a writer still holds it"""
+    with open(path, 'rb') as src:
+        try:
+            fcntl.flock(src, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return
+        target = path + ".gz"
+        if os.path.exists(target):
+            # A late writer recreated an already compressed daily file
+            target = _next_segment_path(path) + ".gz"
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        import gzip
+        import shutil
+        with gzip.open(tmp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, target)
+        os.unlink(path)
+
+def maintain(log_dir=LOG_DIR, force=False):
+    """Compress closed segments and apply retention, at most once per interval"""
+    stamp = run_path("log_maintenance.stamp")
+    try:
+        if not force and time.time() - os.path.getmtime(stamp) < MAINTENANCE_INTERVAL_SECONDS:
+            return
+    except OSError:
+        pass
+
+    with open(run_path("log_maintenance.lock"), 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return  # Another process is already maintaining the logs
+
+        today = datetime.now().strftime('%Y%m%d')
+        cutoff = (datetime.now() - timedelta(days=_env_int("CLAUDE_LOG_RETENTION_DAYS", DEFAULT_RETENTION_DAYS))).strftime('%Y%m%d')
+
+        for path, kind, date, segment in list_segments(log_dir):
+            try:
+                if date < cutoff:
+                    os.unlink(path)
+                elif not path.endswith(".gz") and (date < today or segment != float("inf")):
+                    _compress(path)
+            except OSError:
+                pass
+
+        # Large logged values no longer referenced within the retention period
+        import blob_store
+        blob_store.prune(log_dir)
+
+        open(stamp, 'w').close()
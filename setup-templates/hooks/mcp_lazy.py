@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Lazy-start proxy for a stdio MCP server
+
+Usage: mcp_lazy.py <name> -- <command> [args...]
+
+Settings generated by scripts/mcp_profile.py run rarely used servers through
+this proxy. It answers the session-start handshake (initialize, tools/list,
+...) from the responses the profiler cached in .do.claude/cache/mcp_<name>.json
+and starts the real server only when a request needs it, replaying the
+handshake to it first. Without a cache entry for the same command the server
+is started right away and the proxy only passes messages through. ${VAR}
+references in the command are expanded only when the server is started.
+"""
+import os
+import sys
+import json
+import threading
+import subprocess
+
+if sys.flags.isolated:
+    # python3 -I (the fast-start bundle) leaves the script's directory off sys.path
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from hook_paths import cache_path
+
+# Requests answered from the cache; list requests only without a pagination cursor
+CACHED_METHODS = {"initialize", "tools/list", "resources/list", "resources/templates/list", "prompts/list"}
+HANDSHAKE_ID = "mcp-lazy-initialize"
+
+def cache_file(name):
+    return cache_path(f"mcp_{name}.json")
+
+def expand(command):
+    return [os.path.expandvars(arg) for arg in command]
+
+def load_responses(name, command):
+    """Cached handshake responses for a server, if they were recorded for this command"""
+    try:
+        with open(cache_file(name), 'r') as f:
+            cached = json.load(f)
+        if isinstance(cached.get("command"), list) and expand(cached["command"]) == expand(command):
+            return cached.get("responses", {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+class Proxy:
+    """Answers from the cache until a request needs the real server, then becomes a pipe"""
+
+    def __init__(self, command, responses):
+        self.command = expand(command)
+        self.responses = responses
+        self.child = None
+        self.pump_thread = None
+        self.initialize = None  # The client's initialize request, replayed to the real server
+        self.out_lock = threading.Lock()
+
+    def write(self, data):
+        with self.out_lock:
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+
+    def reply(self, message, result=None, error=None):
+        response = {"jsonrpc": "2.0", "id": message.get("id")}
+        if error is not None:
+            response["error"] = {"code": -32603, "message": error}
+        else:
+            response["result"] = result
+        self.write(json.dumps(response).encode() + b"\n")
+
+    def answer(self, message):
+        """Handle one message before the server runs; False when it needs the server"""
+        method = message.get("method")
+        params = message.get("params") or {}
+        if method == "initialize":
+            self.initialize = message
+        if "id" not in message:
+            return True  # Notifications (initialized, cancelled) mean nothing to a server not yet started
+        if method == "ping":
+            self.reply(message, {})
+            return True
+        if method in CACHED_METHODS and method in self.responses and not params.get("cursor"):
+            self.reply(message, self.responses[method])
+            return True
+        return False
+
+    def pump(self):
+        """Copy the server's output to the client"""
+        for line in self.child.stdout:
+            self.write(line)
+
+    def start(self):
+        """Start the real server and replay the handshake the client already went through"""
+        self.child = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        if self.initialize is not None:
+            request = dict(self.initialize, id=HANDSHAKE_ID)
+            self.child.stdin.write(json.dumps(request).encode() + b"\n")
+            self.child.stdin.flush()
+            while True:
+                line = self.child.stdout.readline()
+                if not line:
+                    self.child.kill()
+                    raise OSError("server did not answer initialize")
+                try:
+                    if json.loads(line).get("id") == HANDSHAKE_ID:
+                        break
+                except (ValueError, AttributeError):
+                    continue  # Not JSON-RPC; servers may log to stdout before they are up
+            self.child.stdin.write(b'{"jsonrpc": "2.0", "method": "notifications/initialized"}\n')
+            self.child.stdin.flush()
+        self.pump_thread = threading.Thread(target=self.pump, daemon=True)
+        self.pump_thread.start()
+
+    def run(self):
+        if not self.responses:
+            self.child = subprocess.Popen(self.command)  # Nothing cached: plain pass-through
+            sys.exit(self.child.wait())
+
+        for line in sys.stdin.buffer:
+            if self.child is not None:
+                self.child.stdin.write(line)
+                self.child.stdin.flush()
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(message, dict) or self.answer(message):
+                continue
+            try:
+                self.start()
+            except OSError as e:
+                self.reply(message, error=f"MCP server failed to start: {e}")
+                self.child = None
+                continue
+            self.child.stdin.write(line)
+            self.child.stdin.flush()
+
+        if self.child is not None:
+            self.child.stdin.close()
+            status = self.child.wait()
+            self.pump_thread.join()  # Remaining output
+            sys.exit(status)
+
+def main():
+    if len(sys.argv) < 4 or sys.argv[2] != "--":
+        print("Usage: mcp_lazy.py <name> -- <command> [args...]", file=sys.stderr)
+        sys.exit(1)
+    command = sys.argv[3:]
+    Proxy(command, load_responses(sys.argv[1], command)).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Non-blocking notification dispatcher
+
+send_notification() only records the event: inside a long-lived process
+(the hook daemon) it is put on an in-memory queue, otherwise it is appended
+to a spool file drained by a background dispatcher process. The dispatcher
+logs every raw event, merges events of the same category that arrive within
+CLAUDE_NOTIFY_WINDOW_SECONDS (e.g. "12 files updated"), and shows at most
+one notification per category every CLAUDE_NOTIFY_MIN_INTERVAL_SECONDS.
+"""
+import os
+import sys
+import json
+import time
+import fcntl
+
+from hook_paths import run_path
+import hook_budget
+import hook_metrics
+
+DEFAULT_WINDOW_SECONDS = 2.0
+DEFAULT_MIN_INTERVAL_SECONDS = 10.0
+POLL_SECONDS = 0.1
+IDLE_EXIT_SECONDS = 30
+DELIVERY_TIMEOUT_SECONDS = 5
+
+# How merged bursts are summarized, by category
+MERGED_MESSAGES = {
+    "file_updated": "{count} files updated",
+    "checkpoint": "{count} checkpoints saved",
+    "dev_command": "{count} commands started"
+}
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+def log_notification(title, message, urgent):
+    """Log notifications for debugging"""
+    from datetime import datetime
+    import log_writer
+
+    log_entry = {
+        "timestamp": datetime.now().isoformat(),
+        "title": title,
+        "message": message,
+        "urgent": urgent,
+        "type": "notification"
+    }
+
+    log_writer.append("notifications", log_entry)
+
+def deliver(title, message, sound="Glass", urgent=False):
+    """Show a system notification"""
+    import platform
+    import subprocess
+
+    if platform.system() == "Darwin":  # macOS
+        script = f'display notification "{message}" with title "{title}" sound name "{sound}"'
+        subprocess.run(["osascript", "-e", script], capture_output=True, timeout=DELIVERY_TIMEOUT_SECONDS)
+
+    elif platform.system() == "Linux":
+        urgency = "critical" if urgent else "normal"
+        try:
+            subprocess.run([
+                "notify-send",
+                f"--urgency={urgency}",
+                title,
+                message
+            ], capture_output=True, timeout=DELIVERY_TIMEOUT_SECONDS)
+        except FileNotFoundError:
+            pass  # notify-send not available
+
+class Dispatcher:
+    """Coalesces events per category and applies per-category rate limits"""
+
+    def __init__(self):
+        self.window = _env_float("CLAUDE_NOTIFY_WINDOW_SECONDS", DEFAULT_WINDOW_SECONDS)
+        self.min_interval = _env_float("CLAUDE_NOTIFY_MIN_INTERVAL_SECONDS", DEFAULT_MIN_INTERVAL_SECONDS)
+        self.pending = {}
+        self.last_delivered = {}
+
+    def add(self, event):
+        log_notification(event["title"], event["message"], event.get("urgent", False))
+        group = self.pending.setdefault(event["category"], {"first": time.time(), "events": []})
+        group["events"].append(event)
+
+    def tick(self):
+        """Deliver every group whose window has closed and whose category is not rate limited"""
+        now = time.time()
+        for category, group in list(self.pending.items()):
+            if now - group["first"] < self.window:
+                continue
+            if now - self.last_delivered.get(category, 0) < self.min_interval:
+                continue  # Keep merging until the category may notify again
+            del self.pending[category]
+            self.last_delivered[category] = now
+            title, message, sound, urgent = merge(category, group["events"])
+            try:
+                deliver(title, message, sound, urgent)
+            except Exception:
+                pass  # Never let one notification stop the dispatcher
+
+    def flush(self):
+        self.window = 0
+        self.min_interval = 0
+        self.tick()
+
+def merge(category, events):
+    """Summarize a burst of events as one notification"""
+    last = events[-1]
+    urgent = any(e.get("urgent") for e in events)
+    if len(events) == 1:
+        message = last["message"]
+    elif category in MERGED_MESSAGES:
+        message = MERGED_MESSAGES[category].format(count=len(events))
+    else:
+        message = f"{last['message']} (+{len(events) - 1} more)"
+    return last["title"], message, last.get("sound", "Glass"), urgent
+
+_in_process = {}
+
+def start_in_process():
+    """Dispatch from a thread of this (long-lived) process instead of a separate one"""
+    import queue
+    import atexit
+    import threading
+
+    if "queue" in _in_process:
+        return
+    events = queue.Queue()
+    dispatcher = Dispatcher()
+
+    def run():
+        while True:
+            try:
+                dispatcher.add(events.get(timeout=POLL_SECONDS))
+                while True:
+                    dispatcher.add(events.get_nowait())
+            except queue.Empty:
+                pass
+            dispatcher.tick()
+
+    def drain_at_exit():
+        import log_writer
+        while not events.empty():
+            dispatcher.add(events.get_nowait())
+        dispatcher.flush()
+        log_writer.flush()
+
+    threading.Thread(target=run, daemon=True).start()
+    atexit.register(drain_at_exit)
+    _in_process["queue"] = events
+
+def send_notification(title, message, sound="Glass", urgent=False, category=None):
+    """Queue a notification; never blocks on the notification system. Once the hook's
+    budget is spent it is only logged, not shown"""
+    event = {
+        "title": title,
+        "message": message,
+        "sound": sound,
+        "urgent": urgent,
+        "category": category or title
+    }
+    with hook_metrics.phase("notification"):
+        if hook_budget.shedding():
+            log_notification(title, message, urgent)
+        else:
+            hook_budget.run(_queue, event)
+
+def _queue(event):
+    if "queue" in _in_process:
+        _in_process["queue"].put(event)
+        return
+
+    try:
+        with open(run_path("notify.queue"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(json.dumps(event) + "\n")
+        if not _dispatcher_running():
+            _spawn_dispatcher()
+    except OSError:
+        pass  # Notifications are best effort
+
+def _dispatcher_running():
+    if time.time() - _in_process.get("spawned", 0) < IDLE_EXIT_SECONDS:
+        return True  # We started one recently; it may still be taking the lock
+    with open(run_path("notify.lock"), "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return True
+    return False
+
+def _spawn_dispatcher():
+    import subprocess
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__)],
+        cwd=os.getcwd(),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    _in_process["spawned"] = time.time()
+
+def _drain_spool():
+    try:
+        f = open(run_path("notify.queue"), "r+")
+    except OSError:
+        return []
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        lines = f.read().splitlines()
+        f.seek(0)
+        f.truncate()
+
+    events = []
+    for line in lines:
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            pass
+    return events
+
+def run_dispatcher():
+    """Drain the spool file until it stays idle"""
+    lock = open(run_path("notify.lock"), "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return  # Another dispatcher owns the spool
+
+    dispatcher = Dispatcher()
+    idle_since = time.time()
+    while True:
+        events = _drain_spool()
+        for event in events:
+            dispatcher.add(event)
+        dispatcher.tick()
+
+        if events or dispatcher.pending:
+            idle_since = time.time()
+        elif time.time() - idle_since >= IDLE_EXIT_SECONDS:
+            lock.close()
+            # An event may have been spooled while we decided to exit
+            if os.path.getsize(run_path("notify.queue")) == 0:
+                return
+            lock = open(run_path("notify.lock"), "a")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return
+        time.sleep(POLL_SECONDS)
+
+if __name__ == "__main__":
+    run_dispatcher()
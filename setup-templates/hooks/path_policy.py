@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Compiled path policy for file operations in the pre-tool hook
+
+Rules come from the built-in defaults plus an optional policy file
+(.do.claude/path_policy.json, or $CLAUDE_PATH_POLICY):
+
+    {
+      "include_defaults": true,
+      "protect": ["/opt/secrets/", "infra/prod/**", "*.pem"],
+      "notify": ["services/*/Dockerfile", "pyproject.toml"],
+      "allow": ["/var/tmp/"]
+    }
+
+A rule without wildcards names a file or directory and covers everything
+below it; a rule without a '/' matches the file name anywhere (*.pem,
+.env*); other rules are globs where '*' stays within a segment and '**'
+spans segments. Relative rules are anchored at the project root. "allow"
+overrides "protect", which overrides "notify".
+
+Rules are indexed by their literal leading segments in a trie, file names
+and extensions in hash maps, and the globs hanging off each trie node are
+compiled into one regex per verdict on first use, so a check walks the path
+once whatever the number of rules. Paths are checked both lexically
+normalized and with symlinks resolved, and the stricter verdict wins. The
+realpath of a parent directory is reused only while the directory and the
+cached path still stat to the same inode, so a long-running daemon notices a
+directory swapped for a symlink. The layout is cached on disk keyed
+by the policy file's mtime.
+"""
+import os
+import re
+import json
+
+from hook_paths import CLAUDE_DIR, cache_path
+
+LAYOUT_VERSION = 1
+REAL_DIR_CACHE_SIZE = 4096
+
+PROJECT_DIR = os.path.dirname(CLAUDE_DIR)
+
+DEFAULT_POLICY = {
+    # System directories are never written
+    "protect": ["/etc/", "/usr/", "/var/", "/sys/", "/proc/"],
+    # Modifying these is announced with a notification
+    "notify": ["package.json", "requirements.txt", "Cargo.toml", ".gitignore"],
+    "allow": []
+}
+
+# Highest priority first
+VERDICTS = ["allow", "protect", "notify"]
+# Combining the verdicts of two forms of a path, strictest first
+SEVERITY = ["protect", "notify", "allow"]
+
+_GLOB_CHARS = set('*?[')
+
+def policy_file():
+    """Location of the project policy file"""
+    return os.environ.get("CLAUDE_PATH_POLICY") or os.path.join(CLAUDE_DIR, 'path_policy.json')
+
+def _segment_regex(segment):
+    """Regex for one path segment of a glob"""
+    regex = []
+    i = 0
+    while i < len(segment):
+        c = segment[i]
+        if c == '*':
+            regex.append('[^/]*')
+        elif c == '?':
+            regex.append('[^/]')
+        elif c == '[' and segment.find(']', i + 2) != -1:
+            end = segment.find(']', i + 2)  # A ']' right after '[' is part of the class
+            body = segment[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            regex.append('[' + body.replace('\\', '\\\\') + ']')
+            i = end
+        else:
+            regex.append(re.escape(c))
+        i += 1
+    return "".join(regex)
+
+def glob_regex(pattern):
+    """Regex (for fullmatch) of a '/'-separated glob"""
+    parts = pattern.split('/')
+    regex = []
+    for i, part in enumerate(parts):
+        last = i == len(parts) - 1
+        if part == '**':
+            regex.append('.*' if last else '(?:[^/]+/)*')
+        else:
+            regex.append(_segment_regex(part) + ('' if last else '/'))
+    return "".join(regex)
+
+def _is_glob(text):
+    return any(c in _GLOB_CHARS for c in text)
+
+def _node(trie, segments):
+    for segment in segments:
+        trie = trie.setdefault("children", {}).setdefault(segment, {})
+    return trie
+
+def build_layout(policy):
+    """Index every rule by its literal part"""
+    layout = {"trie": {}, "names": {}, "extensions": {}, "name_globs": {}}
+    for verdict in VERDICTS:
+        for rule in policy.get(verdict, []):
+            pattern = rule.rstrip('/') + ('/**' if rule.endswith('/') and _is_glob(rule) else '')
+            if not pattern:
+                pattern = '/'
+
+            if '/' not in pattern:
+                if not _is_glob(pattern):
+                    layout["names"].setdefault(pattern, {}).setdefault(verdict, rule)
+                elif pattern.startswith('*.') and not _is_glob(pattern[2:]) and '.' not in pattern[2:]:
+                    layout["extensions"].setdefault(pattern[1:], {}).setdefault(verdict, rule)
+                else:
+                    layout["name_globs"].setdefault(verdict, []).append([_segment_regex(pattern), rule])
+                continue
+
+            if not pattern.startswith('/'):
+                pattern = os.path.join(PROJECT_DIR, pattern)
+            segments = [s for s in pattern.split('/') if s]
+            literal = 0
+            while literal < len(segments) and not _is_glob(segments[literal]):
+                literal += 1
+
+            node = _node(layout["trie"], segments[:literal])
+            if literal == len(segments):
+                node.setdefault("covers", {}).setdefault(verdict, rule)
+            else:
+                globs = node.setdefault("globs", {}).setdefault(verdict, [])
+                globs.append([glob_regex("/".join(segments[literal:])), rule])
+    return layout
+
+def _compile(rules):
+    """One alternation with a named group per rule, so a match tells which rule hit"""
+    try:
+        return re.compile("|".join(f"(?P<r{i}>{regex})" for i, (regex, _) in enumerate(rules)))
+    except re.error:
+        return None
+
+class PathPolicy:
+    """Classifies paths as protect, notify, allow or None (no rule)"""
+
+    def __init__(self, layout):
+        self.trie = layout["trie"]
+        self.names = layout["names"]
+        self.extensions = layout["extensions"]
+        self.name_globs = layout["name_globs"]
+        self.compiled = {}
+
+    def _glob_match(self, key, rules, text):
+        if key not in self.compiled:
+            self.compiled[key] = _compile(rules)
+        regex = self.compiled[key]
+        match = regex.fullmatch(text) if regex else None
+        if match is None:
+            return None
+        return rules[int(match.lastgroup[1:])][1]
+
+    def matches(self, path):
+        """{verdict: rule} of every verdict whose rules match an absolute, normalized path"""
+        found = {}
+        segments = [s for s in path.split('/') if s]
+
+        node = self.trie
+        for depth in range(len(segments) + 1):
+            for verdict, rule in node.get("covers", {}).items():
+                found.setdefault(verdict, rule)
+            for verdict, rules in node.get("globs", {}).items():
+                if verdict not in found:
+                    rule = self._glob_match((id(node), verdict), rules, "/".join(segments[depth:]))
+                    if rule is not None:
+                        found[verdict] = rule
+            if depth == len(segments):
+                break
+            node = node.get("children", {}).get(segments[depth])
+            if node is None:
+                break
+
+        name = segments[-1] if segments else ""
+        for verdict, rule in self.names.get(name, {}).items():
+            found.setdefault(verdict, rule)
+        extension = os.path.splitext(name)[1]
+        for verdict, rule in self.extensions.get(extension, {}).items():
+            found.setdefault(verdict, rule)
+        for verdict, rules in self.name_globs.items():
+            if verdict not in found:
+                rule = self._glob_match(("name", verdict), rules, name)
+                if rule is not None:
+                    found[verdict] = rule
+        return found
+
+    def classify(self, path):
+        """(verdict, rule) of the highest priority matching verdict, or (None, None)"""
+        found = self.matches(path)
+        for verdict in VERDICTS:
+            if verdict in found:
+                return verdict, found[verdict]
+        return None, None
+
+    def check(self, file_path):
+        """(verdict, rule) for writing a path, the stricter of its normalized and resolved forms"""
+        results = [self.classify(form) for form in resolve(file_path)]
+        for verdict in SEVERITY:
+            for result in results:
+                if result[0] == verdict:
+                    return result
+        return None, None
+
+_real_dirs = {}
+
+def _real_dir(directory):
+    """realpath of a directory, from the cache while both still name the same directory"""
+    try:
+        st = os.stat(directory)
+    except OSError:
+        return os.path.realpath(directory)
+    identity = (st.st_dev, st.st_ino)
+    cached = _real_dirs.get(directory)
+    if cached is not None and cached[0] == identity:
+        try:
+            st = os.lstat(cached[1])
+            if (st.st_dev, st.st_ino) == identity:
+                return cached[1]
+        except OSError:
+            pass
+
+    real = os.path.realpath(directory)
+    if len(_real_dirs) >= REAL_DIR_CACHE_SIZE:
+        _real_dirs.clear()
+    _real_dirs[directory] = (identity, real)
+    return real
+
+def target_paths(parameters):
+    """Every path a file operation writes; multi_edit may carry one per edit"""
+    paths = []
+    if parameters.get("file_path"):
+        paths.append(parameters["file_path"])
+    paths.extend(path for path in parameters.get("file_paths", []) if path)
+    for edit in parameters.get("edits", []):
+        if isinstance(edit, dict) and edit.get("file_path"):
+            paths.append(edit["file_path"])
+    return paths
+
+def resolve(file_path):
+    """The path lexically normalized, and with symlinks resolved"""
+    absolute = os.path.join(os.getcwd(), os.path.expanduser(file_path))
+    normalized = os.path.normpath(absolute)
+    real = os.path.join(_real_dir(os.path.dirname(absolute)), os.path.basename(absolute))
+    if os.path.islink(real):
+        real = os.path.realpath(real)  # The file itself is a link; never cached
+    else:
+        real = os.path.normpath(real)
+    if real == normalized:
+        return [normalized]
+    return [normalized, real]
+
+def _read_policy(path):
+    """Merge the policy file with the defaults"""
+    with open(path, 'r') as f:
+        rules = json.load(f)
+
+    policy = {}
+    for verdict in VERDICTS:
+        defaults = DEFAULT_POLICY[verdict] if rules.get("include_defaults", True) else []
+        policy[verdict] = defaults + list(rules.get(verdict, []))
+    return policy
+
+def _load_layout(path, stat):
+    """Layout for a policy file, from the disk cache when the file is unchanged"""
+    key = {
+        "version": LAYOUT_VERSION,
+        "defaults": DEFAULT_POLICY,
+        "project": PROJECT_DIR,
+        "path": path,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size
+    }
+    cache_file = cache_path("path_policy.json")
+
+    try:
+        with open(cache_file, 'r') as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            return cached["layout"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    layout = build_layout(_read_policy(path))
+    try:
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({"key": key, "layout": layout}, f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass  # Cache is an optimization only
+    return layout
+
+_loaded = {}
+
+def default_policy():
+    """Policy with only the built-in rules, built without touching the disk"""
+    if "default" not in _loaded:
+        _loaded["default"] = PathPolicy(build_layout(DEFAULT_POLICY))
+    return _loaded["default"]
+
+def loaded_policy():
+    """Current policy if it needs no loading (the built-in rules, or a policy file this
+    process already compiled); None otherwise"""
+    path = policy_file()
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return default_policy()
+    if _loaded.get("state") == (path, stat.st_mtime_ns, stat.st_size):
+        return _loaded["policy"]
+    return None
+
+def load_policy():
+    """Current policy, rebuilt only when the policy file changes"""
+    path = policy_file()
+    try:
+        stat = os.stat(path)
+        state = (path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        stat = None
+        state = (None, None, None)
+
+    if _loaded.get("state") != state:
+        if stat is None:
+            _loaded["policy"] = default_policy()
+        else:
+            _loaded["policy"] = PathPolicy(_load_layout(path, stat))
+        _loaded["state"] = state
+    return _loaded["policy"]
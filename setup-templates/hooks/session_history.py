@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Fixed-size ring file for session history
+
+logs/session_history.ring is a small header followed by CAPACITY fixed-size
+slots. Appending a session writes one slot and the header under an flock, so
+cost does not depend on how many sessions are retained. Readers mmap the file.
+Capacity comes from CLAUDE_SESSION_HISTORY_SIZE when the file is created.
+"""
+import os
+import json
+import mmap
+import fcntl
+import struct
+from datetime import datetime
+
+from hook_paths import LOG_DIR
+
+MAGIC = b'CCSH'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIQQQ')  # magic, version, reserved, capacity, next slot, used slots, total sessions
+RECORD = struct.Struct('<dfI24s24s64s')  # timestamp, duration_minutes, total_tools, productivity, automation, session_id
+DEFAULT_CAPACITY = 10000
+
+def history_path(log_dir=LOG_DIR):
+    return os.path.join(log_dir, 'session_history.ring')
+
+def _capacity():
+    try:
+        return max(1, int(os.environ.get("CLAUDE_SESSION_HISTORY_SIZE", DEFAULT_CAPACITY)))
+    except ValueError:
+        return DEFAULT_CAPACITY
+
+def _text(value, size):
+    return ("" if value is None else str(value)).encode()[:size]
+
+def _value(raw):
+    """A stored text field; numeric scores (0 for a session without duration) come back as numbers"""
+    text = raw.rstrip(b'\0').decode(errors='replace')
+    return int(text) if text.isdecimal() else text
+
+def _pack(session):
+    try:
+        timestamp = datetime.fromisoformat(session["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        timestamp = 0.0
+    return RECORD.pack(
+        timestamp,
+        float(session.get("duration_minutes") or 0),
+        int(session.get("total_tools") or 0),
+        _text(session.get("productivity_score"), 24),
+        _text(session.get("automation_efficiency"), 24),
+        _text(session.get("session_id"), 64)
+    )
+
+def _unpack(data):
+    timestamp, duration, total_tools, productivity, automation, session_id = RECORD.unpack(data)
+    session = {
+        "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+        "duration_minutes": round(duration, 1),
+        "total_tools": total_tools,
+        "productivity_score": _value(productivity),
+        "automation_efficiency": _value(automation)
+    }
+    if session_id.strip(b'\0'):
+        session["session_id"] = session_id.rstrip(b'\0').decode(errors='replace')
+    return session
+
+def _write_slot(f, capacity, next_slot, used, total, session):
+    """Write a session into the next slot and advance the header"""
+    f.seek(HEADER.size + next_slot * RECORD.size)
+    f.write(_pack(session))
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, VERSION, 0, capacity, (next_slot + 1) % capacity, min(used + 1, capacity), total + 1))
+    return (next_slot + 1) % capacity, min(used + 1, capacity), total + 1
+
+def _create(f, log_dir):
+    """Initialize an empty ring, importing the last sessions of a legacy session_history.json"""
+    capacity = _capacity()
+    f.truncate(HEADER.size + capacity * RECORD.size)
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, VERSION, 0, capacity, 0, 0, 0))
+
+    legacy_file = os.path.join(log_dir, 'session_history.json')
+    try:
+        with open(legacy_file, 'r') as legacy:
+            history = json.load(legacy)
+    except (OSError, ValueError):
+        return capacity, 0, 0, 0
+
+    next_slot, used, total = 0, 0, 0
+    for session in history.get("sessions", [])[-capacity:]:
+        next_slot, used, total = _write_slot(f, capacity, next_slot, used, total, session)
+
+    # Sessions the legacy file had already trimmed still count towards the total
+    total = max(history.get("total_sessions", 0), total)
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, VERSION, 0, capacity, next_slot, used, total))
+    return capacity, next_slot, used, total
+
+def append(session, log_dir=LOG_DIR):
+    """Record one finished session in O(1)"""
+    path = history_path(log_dir)
+    os.makedirs(log_dir, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, 'r+b') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size or header[:4] != MAGIC:
+            capacity, next_slot, used, total = _create(f, log_dir)
+        else:
+            _, _, _, capacity, next_slot, used, total = HEADER.unpack(header)
+        _write_slot(f, capacity, next_slot, used, total, session)
+
+def read_history(limit=None, log_dir=LOG_DIR):
+    """Session history in the legacy {"sessions": [...], "total_sessions": n} shape, oldest first"""
+    try:
+        f = open(history_path(log_dir), 'rb')
+    except OSError:
+        return {"sessions": [], "total_sessions": 0}
+
+    with f:
+        fcntl.flock(f, fcntl.LOCK_SH)
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            return {"sessions": [], "total_sessions": 0}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            magic, _, _, capacity, next_slot, used, total = HEADER.unpack_from(view, 0)
+            if magic != MAGIC:
+                return {"sessions": [], "total_sessions": 0}
+
+            count = used
+            if limit is not None:
+                count = min(count, limit)
+            first = (next_slot - count) % capacity
+            sessions = []
+            for i in range(count):
+                offset = HEADER.size + ((first + i) % capacity) * RECORD.size
+                sessions.append(_unpack(view[offset:offset + RECORD.size]))
+
+    return {"sessions": sessions, "total_sessions": total}
@@ -5,15 +5,25 @@ Advanced session manager for Claude Code
 import sys
 import json
 import os
-import subprocess
-import platform
+import time
 from datetime import datetime
 
-def send_notification(title, message, sound="Glass"):
-    """Send system notification"""
-    if platform.system() == "Darwin":  # macOS
-        script = f'display notification "{message}" with title "{title}" sound name "{sound}"'
-        subprocess.run(["osascript", "-e", script], capture_output=True)
+if sys.flags.isolated:
+    # python3 -I (the fast-start bundle) leaves the script's directory off sys.path
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import checkpoint_worker
+import hook_budget
+import hook_metrics
+import hook_trace
+import log_writer
+import session_history
+import stats_store
+import telemetry
+from notify_dispatcher import send_notification
+
+# Slack around the session's time window when rebuilding its counts from the logs
+REBUILD_MARGIN_SECONDS = 60
 
 def generate_session_report(data):
     """Generate comprehensive session report"""
@@ -22,20 +32,28 @@ def generate_session_report(data):
     duration_ms = data.get("duration_ms", 0)
     duration_min = duration_ms / 60000 if duration_ms > 0 else 0
     
-    # Load usage statistics
-    stats_file = os.path.join(os.path.dirname(__file__), '../logs/stats.json')
+    # Tool usage for this session only
+    session_id = stats_store.session_id(data)
     tool_breakdown = {}
     
     try:
-        if os.path.exists(stats_file):
-            with open(stats_file, 'r') as f:
-                stats = json.load(f)
-                tool_breakdown = stats.get("tool_counts", {})
+        tool_breakdown = stats_store.session_tool_counts(session_id)
     except Exception:
         pass
     
+    if not tool_breakdown and total_tools:
+        # The store lost the session's counts; rebuild them from the logs of its time window only
+        until = time.time() + REBUILD_MARGIN_SECONDS
+        since = until - duration_ms / 1000 - 2 * REBUILD_MARGIN_SECONDS
+        try:
+            tool_breakdown = hook_budget.run(stats_store.rebuild_session_counts, session_id,
+                                             since=since, until=until) or {}
+        except Exception:
+            pass
+    
     # Generate report
     report = {
+        "session_id": session_id,
         "session_end": datetime.now().isoformat(),
         "duration_minutes": round(duration_min, 1),
         "total_tools_used": total_tools,
@@ -69,8 +87,8 @@ def calculate_productivity_score(total_tools, duration_min):
 
 def calculate_automation_efficiency(tool_breakdown):
     """Calculate automation efficiency score"""
-    if not tool_breakdown:
-        return "no_data"
+    if not tool_breakdown or os.environ.get("CLAUDE_LOG_READ_ONLY", "0") != "1":
+        return "no_data"  # Read-only (manual) tools are only counted when they are logged
     
     # Automated tools vs manual tools
     automated_tools = ["bash", "write", "edit", "multi_edit"]
@@ -103,45 +121,34 @@ def save_session_report(report):
         json.dump(report, f, indent=2)
     
     # Update session history
-    history_file = os.path.join(log_dir, "session_history.json")
-    
     try:
-        if os.path.exists(history_file):
-            with open(history_file, 'r') as f:
-                history = json.load(f)
-        else:
-            history = {"sessions": [], "total_sessions": 0}
-        
-        # Add current session
-        history["sessions"].append({
+        session_history.append({
             "timestamp": report["session_end"],
             "duration_minutes": report["duration_minutes"],
             "total_tools": report["total_tools_used"],
             "productivity_score": report["session_summary"]["productivity_score"],
-            "automation_efficiency": report["session_summary"]["automation_efficiency"]
+            "automation_efficiency": report["session_summary"]["automation_efficiency"],
+            "session_id": report.get("session_id")
         })
-        
-        # Keep only last 50 sessions
-        history["sessions"] = history["sessions"][-50:]
-        history["total_sessions"] += 1
-        
-        with open(history_file, 'w') as f:
-            json.dump(history, f, indent=2)
-            
     except Exception:
         pass  # Silently handle history errors
 
-def create_final_checkpoint():
+def create_final_checkpoint(session_id="unknown"):
     """Create final git checkpoint if needed"""
     
+    # Let the background worker commit whatever it still has queued
     try:
-        # Check if we're in a git repo and have changes
-        result = subprocess.run(["git", "status", "--porcelain"], 
-                              capture_output=True, text=True)
-        
-        if result.returncode == 0 and result.stdout.strip():
-            subprocess.run(["git", "add", "."], capture_output=True)
-            
+        checkpoint_worker.flush()
+        if checkpoint_worker.checkpoint_mode() == "ref":
+            # Path-targeted checkpoints never touch HEAD or the user's index
+            checkpoint_worker.discard_session_index(session_id)
+            return
+    except Exception:
+        pass
+    
+    try:
+        # Stage changes (from the change tracker's set when it runs) and commit them
+        if checkpoint_worker.stage_changes():
             commit_msg = f"""Session end checkpoint: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 Final checkpoint from Claude Code session
@@ -150,7 +157,7 @@ Final checkpoint from Claude Code session
 
 Co-Authored-By: Claude <noreply@anthropic.com>"""
             
-            subprocess.run(["git", "commit", "-m", commit_msg], capture_output=True)
+            checkpoint_worker.git(["commit", "-m", commit_msg])
             
     except Exception:
         pass  # Silently handle git errors
@@ -171,20 +178,39 @@ def send_session_summary(report):
 
 def main():
     try:
-        data = json.load(sys.stdin)
+        hook_budget.start("stop")
+        hook_metrics.begin("stop")
+        raw = sys.stdin.read()
+        if hook_trace.enabled():
+            hook_trace.record("stop", raw)
+        data = json.loads(raw)
+        
+        # Refresh stats.json from the stats store
+        try:
+            hook_budget.run(stats_store.export_stats_json)
+        except Exception:
+            pass
         
         # Generate comprehensive session report
         report = generate_session_report(data)
         
         # Save report
         save_session_report(report)
+        telemetry.emit("session", duration_ms=data.get("duration_ms", 0), tools=report["total_tools_used"])
         
         # Create final checkpoint
-        create_final_checkpoint()
+        with hook_metrics.phase("checkpoint"):
+            hook_budget.run(create_final_checkpoint, report["session_id"])
         
         # Send summary notification
         send_session_summary(report)
         
+        # Compress rotated logs and apply retention
+        try:
+            hook_budget.run(log_writer.maintain)
+        except Exception:
+            pass
+        
         # Return success with report data
         result = data.copy()
         result["session_report"] = report
@@ -3,52 +3,17 @@
 Smart notification hook for Claude Code events
 """
 import sys
-import json
-import subprocess
-import platform
 import os
-from datetime import datetime
+import json
 
-def send_notification(title, message, sound="Glass", urgent=False):
-    """Send system notification with platform detection"""
-    
-    if platform.system() == "Darwin":  # macOS
-        urgency = "critical" if urgent else "normal"
-        script = f'display notification "{message}" with title "{title}" sound name "{sound}"'
-        subprocess.run(["osascript", "-e", script], capture_output=True)
-        
-    elif platform.system() == "Linux":
-        urgency = "critical" if urgent else "normal"
-        try:
-            subprocess.run([
-                "notify-send",
-                f"--urgency={urgency}",
-                title,
-                message
-            ], capture_output=True)
-        except FileNotFoundError:
-            pass  # notify-send not available
-    
-    # Log notification
-    log_notification(title, message, urgent)
+if sys.flags.isolated:
+    # python3 -I (the fast-start bundle) leaves the script's directory off sys.path
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-def log_notification(title, message, urgent):
-    """Log notifications for debugging"""
-    
-    log_dir = os.path.join(os.path.dirname(__file__), '../logs')
-    os.makedirs(log_dir, exist_ok=True)
-    
-    log_entry = {
-        "timestamp": datetime.now().isoformat(),
-        "title": title,
-        "message": message,
-        "urgent": urgent,
-        "type": "notification"
-    }
-    
-    log_file = os.path.join(log_dir, f"notifications_{datetime.now().strftime('%Y%m%d')}.log")
-    with open(log_file, 'a') as f:
-        f.write(json.dumps(log_entry) + '\n')
+import hook_budget
+import hook_metrics
+import hook_trace
+from notify_dispatcher import send_notification
 
 def handle_session_events(data):
     """Handle session-level events"""
@@ -121,7 +86,12 @@ def handle_automation_events(data):
 
 def main():
     try:
-        data = json.load(sys.stdin)
+        hook_budget.start("notification")
+        hook_metrics.begin("notification")
+        raw = sys.stdin.read()
+        if hook_trace.enabled():
+            hook_trace.record("notification", raw)
+        data = json.loads(raw)
         
         # Handle different event types
         event_type = data.get("event_type", "")
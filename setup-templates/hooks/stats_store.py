@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Transactional usage statistics store (SQLite, WAL mode)
+
+Every tool call is one short write transaction of atomic counter increments,
+so concurrent hook processes never lose updates. Counters are kept overall,
+per tool, per session and per day. export_stats_json() writes the legacy
+logs/stats.json shape for readers that expect it.
+"""
+import os
+import json
+import sqlite3
+from datetime import datetime
+
+from hook_paths import LOG_DIR
+import hook_budget
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS totals (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS tool_counts (
+    tool_name TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0,
+    successes INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS session_tool_counts (
+    session_id TEXT NOT NULL,
+    tool_name TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    successes INTEGER NOT NULL DEFAULT 0,
+    duration_ms INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, tool_name)
+);
+CREATE TABLE IF NOT EXISTS daily_tool_counts (
+    day TEXT NOT NULL,
+    tool_name TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    successes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, tool_name)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_connections = {}
+
+def session_id(data=None):
+    """Session a hook payload belongs to, resolved the same way for logging and reports"""
+    return os.environ.get("CLAUDE_SESSION_ID") or (data or {}).get("session_id") or "unknown"
+
+def stats_db_path():
+    return os.path.join(LOG_DIR, 'stats.db')
+
+def stats_json_path():
+    return os.path.join(LOG_DIR, 'stats.json')
+
+def connect():
+    """Shared connection for this process, creating the schema on first use"""
+    path = stats_db_path()
+    conn = _connections.get(path)
+    if conn is not None:
+        return conn
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    _import_legacy_stats(conn)
+    _connections[path] = conn
+    return conn
+
+def _import_legacy_stats(conn):
+    """Seed the store from an existing stats.json, once"""
+    if conn.execute("SELECT 1 FROM meta WHERE name = 'initialized'").fetchone():
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("SELECT 1 FROM meta WHERE name = 'initialized'").fetchone():
+            conn.execute("COMMIT")
+            return
+
+        try:
+            with open(stats_json_path(), 'r') as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            stats = {}
+
+        conn.execute("INSERT OR REPLACE INTO totals VALUES ('total_tools', ?)", (stats.get("total_tools", 0),))
+        conn.execute("INSERT OR REPLACE INTO totals VALUES ('successful_tools', ?)", (stats.get("successful_tools", 0),))
+        for tool_name, count in stats.get("tool_counts", {}).items():
+            conn.execute("INSERT OR REPLACE INTO tool_counts (tool_name, count) VALUES (?, ?)", (tool_name, count))
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_updated', ?)", (stats.get("last_updated"),))
+        conn.execute("INSERT INTO meta VALUES ('initialized', ?)", (datetime.now().isoformat(),))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def record(log_entry):
+    """Atomically count one tool call"""
+    conn = connect()
+    now = datetime.now()
+    tool_name = log_entry["tool_name"]
+    success = 1 if log_entry["success"] else 0
+    session_id = log_entry.get("session_id", "unknown")
+    duration_ms = log_entry.get("duration_ms") or 0
+
+    # Wait for a busy database no longer than the hook can afford
+    conn.execute("PRAGMA busy_timeout = %d" % (hook_budget.timeout(30) * 1000))
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("UPDATE totals SET value = value + 1 WHERE name = 'total_tools'")
+        conn.execute("UPDATE totals SET value = value + ? WHERE name = 'successful_tools'", (success,))
+        conn.execute(
+            "INSERT INTO tool_counts VALUES (?, 1, ?) "
+            "ON CONFLICT (tool_name) DO UPDATE SET count = count + 1, successes = successes + excluded.successes",
+            (tool_name, success))
+        conn.execute(
+            "INSERT INTO session_tool_counts VALUES (?, ?, 1, ?, ?) "
+            "ON CONFLICT (session_id, tool_name) DO UPDATE SET count = count + 1, "
+            "successes = successes + excluded.successes, duration_ms = duration_ms + excluded.duration_ms",
+            (session_id, tool_name, success, duration_ms))
+        conn.execute(
+            "INSERT INTO daily_tool_counts VALUES (?, ?, 1, ?) "
+            "ON CONFLICT (day, tool_name) DO UPDATE SET count = count + 1, successes = successes + excluded.successes",
+            ((log_entry.get("timestamp") or now.isoformat())[:10], tool_name, success))
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_updated', ?)", (now.isoformat(),))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def load_stats():
+    """Current statistics in the legacy stats.json shape"""
+    conn = connect()
+    totals = dict(conn.execute("SELECT name, value FROM totals"))
+    last_updated = conn.execute("SELECT value FROM meta WHERE name = 'last_updated'").fetchone()
+    return {
+        "total_tools": totals.get("total_tools", 0),
+        "successful_tools": totals.get("successful_tools", 0),
+        "tool_counts": dict(conn.execute("SELECT tool_name, count FROM tool_counts ORDER BY tool_name")),
+        "last_updated": last_updated[0] if last_updated else None
+    }
+
+def export_stats_json(path=None):
+    """Write the legacy stats.json file from the store"""
+    path = path or stats_json_path()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(load_stats(), f, indent=2)
+    os.replace(tmp_path, path)
+
+def session_tool_counts(session_id):
+    """Per-tool call counts for one session, maintained as events arrive"""
+    conn = connect()
+    return dict(conn.execute(
+        "SELECT tool_name, count FROM session_tool_counts WHERE session_id = ? ORDER BY tool_name",
+        (session_id,)))
+
+def rebuild_session_counts(session_id, log_dir=LOG_DIR, since=None, until=None):
+    """Recompute a session's aggregates by streaming its records from the (rotated) usage logs,
+    only reading segments of the session's time window [since, until)"""
+    import log_index
+
+    query = log_index.Query(kind="usage", session=session_id, since=since, until=until)
+    totals = {}
+    for line in query.lines(log_index.update_index(log_dir, "usage", query)):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        row = totals.setdefault(entry.get("tool_name", "unknown"), [0, 0, 0])
+        row[0] += 1
+        row[1] += 1 if entry.get("success") else 0
+        row[2] += entry.get("duration_ms") or 0
+
+    try:
+        conn = connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM session_tool_counts WHERE session_id = ?", (session_id,))
+            conn.executemany(
+                "INSERT INTO session_tool_counts VALUES (?, ?, ?, ?, ?)",
+                [(session_id, tool_name, *row) for tool_name, row in totals.items()])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    except sqlite3.Error:
+        pass  # Still return the rebuilt counts
+
+    return {tool_name: row[0] for tool_name, row in sorted(totals.items())}
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Fire-and-forget hook telemetry for the machine-wide collector
+
+With CLAUDE_TELEMETRY=1, emit() sends one JSON datagram per event to the
+collector socket in ~/.claude-code-ultra/telemetry/ (CLAUDE_TELEMETRY_DIR).
+The socket is non-blocking: when the collector is busy the event is dropped,
+and when it is not running the event is dropped and the collector started
+for the next one. A hook never waits on telemetry.
+"""
+import os
+import sys
+import json
+import time
+import _socket  # The socket wrapper module pulls in enum/selectors; keep startup lean
+
+from hook_paths import CLAUDE_DIR, owned_socket, user_runtime_dir
+
+PROJECT_DIR = os.path.dirname(CLAUDE_DIR)
+SPAWN_INTERVAL_SECONDS = 10
+
+_state = {}
+
+def enabled():
+    return os.environ.get("CLAUDE_TELEMETRY", "0") == "1"
+
+def telemetry_dir():
+    return os.environ.get("CLAUDE_TELEMETRY_DIR") or os.path.join(os.path.expanduser("~"), ".claude-code-ultra", "telemetry")
+
+def socket_path():
+    """Collector socket, in user_runtime_dir() when the telemetry directory path is too long"""
+    path = os.path.join(telemetry_dir(), "collector.sock")
+    if len(path.encode()) < 100:
+        return path
+    return os.path.join(user_runtime_dir(), "telemetry.sock")
+
+def emit(kind, **fields):
+    """Send an event to the collector without ever blocking"""
+    if not enabled():
+        return
+    event = {
+        "ts": time.time(),
+        "kind": kind,
+        "project": PROJECT_DIR,
+        "session": os.environ.get("CLAUDE_SESSION_ID", "unknown")
+    }
+    event.update(fields)
+    try:
+        sock = _state.get("sock")
+        if sock is None:
+            sock = _state["sock"] = _socket.socket(_socket.AF_UNIX, _socket.SOCK_DGRAM)
+            sock.setblocking(False)
+        path = socket_path()
+        if not owned_socket(path):
+            raise FileNotFoundError(path)  # Missing, or someone else's
+        sock.sendto(json.dumps(event).encode(), path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        _spawn_collector()
+    except OSError:
+        pass  # Collector queue full or event too large: drop it
+
+def _spawn_collector():
+    """Start the collector unless this process or another one just tried"""
+    marker = os.path.join(telemetry_dir(), "collector.spawn")
+    now = time.time()
+    try:
+        if now - _state.get("spawned", 0) < SPAWN_INTERVAL_SECONDS or now - os.path.getmtime(marker) < SPAWN_INTERVAL_SECONDS:
+            return
+    except OSError:
+        pass
+    _state["spawned"] = now
+
+    import subprocess
+    try:
+        os.makedirs(telemetry_dir(), mode=0o700, exist_ok=True)
+        open(marker, "w").close()
+        subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "telemetry_collector.py")],
+            cwd="/",
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except OSError:
+        pass  # Telemetry is best effort
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Machine-wide collector for hook telemetry from every project
+
+Started on demand by telemetry.emit(). One collector per user receives the
+event datagrams of all projects, batches them into telemetry.db (SQLite,
+WAL mode) next to its socket, and keeps hourly rollups per project, event
+kind and tool alongside the raw events. Raw events are pruned after
+CLAUDE_TELEMETRY_RETENTION_DAYS, rollups are kept. It exits after
+CLAUDE_TELEMETRY_IDLE seconds without events.
+
+Rollups are read with setup-templates/scripts/telemetry.py.
+"""
+import os
+import json
+import time
+import fcntl
+import socket
+import sqlite3
+
+from telemetry import telemetry_dir, socket_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    ts REAL NOT NULL,
+    project TEXT NOT NULL,
+    session TEXT,
+    kind TEXT NOT NULL,
+    tool TEXT NOT NULL DEFAULT '',
+    success INTEGER NOT NULL DEFAULT 1,
+    duration_ms REAL NOT NULL DEFAULT 0,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS events_project_ts ON events (project, ts);
+CREATE INDEX IF NOT EXISTS events_kind_ts ON events (kind, ts);
+CREATE TABLE IF NOT EXISTS hourly (
+    hour INTEGER NOT NULL,
+    project TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    duration_ms REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour, project, kind, tool)
+);
+"""
+
+DEFAULT_IDLE_SECONDS = 3600
+DEFAULT_RETENTION_DAYS = 30
+FLUSH_INTERVAL_SECONDS = 1.0
+MAX_BATCH = 1000
+PRUNE_INTERVAL_SECONDS = 3600
+RECEIVE_BUFFER_BYTES = 4 * 1024 * 1024
+
+def db_path():
+    return os.path.join(telemetry_dir(), "telemetry.db")
+
+def connect(path=None):
+    conn = sqlite3.connect(path or db_path(), timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def _row(event):
+    ts = float(event.get("ts") or time.time())
+    return (
+        ts,
+        str(event.get("project", "")),
+        event.get("session"),
+        str(event.get("kind", "")),
+        str(event.get("tool") or ""),
+        0 if event.get("success") is False else 1,
+        float(event.get("duration_ms") or 0),
+        json.dumps({k: v for k, v in event.items()
+                    if k not in ("ts", "project", "session", "kind", "tool", "success", "duration_ms")})
+    )
+
+def store(conn, events):
+    """Insert a batch of events and fold it into the hourly rollups, in one transaction"""
+    rows = []
+    for event in events:
+        try:
+            rows.append(_row(event))
+        except (TypeError, ValueError, AttributeError):
+            pass  # Malformed event
+    if not rows:
+        return
+
+    rollups = {}
+    for ts, project, _, kind, tool, success, duration_ms, _ in rows:
+        key = (int(ts // 3600) * 3600, project, kind, tool)
+        count, failures, duration = rollups.get(key, (0, 0, 0.0))
+        rollups[key] = (count + 1, failures + (1 - success), duration + duration_ms)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("""
+            INSERT INTO hourly VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (hour, project, kind, tool) DO UPDATE SET
+                count = count + excluded.count,
+                failures = failures + excluded.failures,
+                duration_ms = duration_ms + excluded.duration_ms
+        """, [key + value for key, value in rollups.items()])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def prune(conn, retention_days=None):
+    """Drop raw events past retention; rollups are kept"""
+    if retention_days is None:
+        try:
+            retention_days = float(os.environ.get("CLAUDE_TELEMETRY_RETENTION_DAYS", DEFAULT_RETENTION_DAYS))
+        except ValueError:
+            retention_days = DEFAULT_RETENTION_DAYS
+    conn.execute("DELETE FROM events WHERE ts < ?", (time.time() - retention_days * 86400,))
+
+def rollup(conn, since, until=None, project=None):
+    """Per-project tool rates, failure rates and checkpoint cost between two timestamps"""
+    until = until or time.time()
+    hours = max((until - since) / 3600, 1e-9)
+    sql = """
+        SELECT project, kind, tool, SUM(count), SUM(failures), SUM(duration_ms) FROM hourly
+        WHERE hour >= ? AND hour < ?
+    """
+    params = [int(since // 3600) * 3600, until]
+    if project:
+        sql += " AND project = ?"
+        params.append(project)
+    sql += " GROUP BY project, kind, tool"
+
+    projects = {}
+    for name, kind, tool, count, failures, duration_ms in conn.execute(sql, params):
+        summary = projects.setdefault(name, {
+            "project": name, "tool_calls": 0, "tool_failures": 0, "sessions": 0,
+            "checkpoints": 0, "checkpoint_ms_total": 0.0, "tools": {}
+        })
+        if kind == "tool":
+            summary["tool_calls"] += count
+            summary["tool_failures"] += failures
+            summary["tools"][tool] = {
+                "calls": count,
+                "failure_rate": round(failures / count, 4) if count else 0.0,
+                "avg_ms": round(duration_ms / count, 1) if count else 0.0
+            }
+        elif kind == "checkpoint":
+            summary["checkpoints"] += count
+            summary["checkpoint_ms_total"] += duration_ms
+        elif kind == "session":
+            summary["sessions"] += count
+
+    for summary in projects.values():
+        calls = summary["tool_calls"]
+        summary["tools_per_hour"] = round(calls / hours, 2)
+        summary["failure_rate"] = round(summary["tool_failures"] / calls, 4) if calls else 0.0
+        checkpoints = summary["checkpoints"]
+        summary["checkpoint_ms_avg"] = round(summary["checkpoint_ms_total"] / checkpoints, 1) if checkpoints else 0.0
+        summary["checkpoint_ms_total"] = round(summary["checkpoint_ms_total"], 1)
+    return sorted(projects.values(), key=lambda s: -s["tool_calls"])
+
+def serve():
+    """Receive events until idle, storing them in batches"""
+    directory = telemetry_dir()
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    lock = open(os.path.join(directory, "collector.lock"), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return  # Another collector is running
+
+    path = socket_path()
+    if os.path.exists(path):
+        os.unlink(path)  # Stale socket from a previous collector
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(path)
+    os.chmod(path, 0o600)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_BYTES)
+    except OSError:
+        pass
+
+    conn = connect()
+    prune(conn)
+    idle_seconds = int(os.environ.get("CLAUDE_TELEMETRY_IDLE", DEFAULT_IDLE_SECONDS))
+    batch = []
+    last_event = last_flush = last_prune = time.time()
+    try:
+        while True:
+            sock.settimeout(FLUSH_INTERVAL_SECONDS if batch else min(idle_seconds, 60))
+            try:
+                data = sock.recv(65536)
+                batch.append(json.loads(data))
+                last_event = time.time()
+            except socket.timeout:
+                pass
+            except ValueError:
+                pass  # Not JSON
+
+            now = time.time()
+            if batch and (len(batch) >= MAX_BATCH or now - last_flush >= FLUSH_INTERVAL_SECONDS):
+                try:
+                    store(conn, batch)
+                except sqlite3.Error:
+                    pass  # Drop the batch rather than stop collecting
+                batch = []
+                last_flush = now
+            if now - last_prune >= PRUNE_INTERVAL_SECONDS:
+                prune(conn)
+                last_prune = now
+            if not batch and now - last_event >= idle_seconds:
+                break
+    finally:
+        sock.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        if batch:
+            store(conn, batch)
+        conn.close()
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Logging-only post-tool hook
+
+Settings written by scripts/mcp_profile.py route the profiled MCP tools here
+through hook_client.py, so their calls are recorded in the usage log and
+stats without the post-tool hook's notifications or checkpoints.
+"""
+import json
+
+import hook_metrics
+import telemetry
+from enhanced_post_tool import log_tool_usage
+
+def process(raw):
+    """Log a raw post-tool payload, returning (response, exit_code)"""
+    hook_metrics.begin("log_tool")
+    try:
+        with hook_metrics.phase("parse"):
+            data = json.loads(raw)
+        hook_metrics.set_tool(data.get("tool_name", ""))
+        log_tool_usage(data)
+        telemetry.emit("tool", tool=data.get("tool_name", ""), success=data.get("exit_code", 0) == 0,
+                       duration_ms=data.get("duration_ms", 0))
+        return data, 0
+    except Exception as e:
+        # Log error but don't fail
+        error_data = data if 'data' in locals() else {}
+        error_data["hook_error"] = str(e)
+        return error_data, 0
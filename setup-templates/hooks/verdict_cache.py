@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Persistent verdict cache for command validation
+
+cache/verdicts.cache is a fixed-size, 8-way set-associative table shared by
+every session of the project. A slot holds a command exactly as given, the
+fingerprint of the rules that classified it and the resulting level, so a
+repeated command skips rule evaluation entirely. Slots written under other
+rules never match, which invalidates the cache whenever the policy changes;
+the least recently used slot of a set is replaced on a miss. Hit and miss
+counters live in the header (`verdict_cache.py stats`). Commands longer than
+a slot are not cached, and a lookup that finds the cache locked by another
+process or thread classifies the command directly instead of waiting. Set CLAUDE_VERDICT_CACHE=0 to disable, and
+CLAUDE_VERDICT_CACHE_ENTRIES to size a new cache file.
+
+Usage: verdict_cache.py [stats|clear]
+"""
+import os
+import sys
+import json
+import fcntl
+import zlib
+import struct
+import threading
+
+from hook_paths import cache_path
+
+MAGIC = b'CCVC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIQQQ')  # magic, version, ways, sets, clock, hits, misses
+SLOT = struct.Struct('<Q8sBH237s')  # last used (0 = empty), rules fingerprint, level, command length, command
+USED = struct.Struct('<Q')
+WAYS = 8
+DEFAULT_ENTRIES = 4096
+MAX_COMMAND_BYTES = 237
+
+LEVELS = [None, "safe", "dangerous", "dev"]
+
+_state = {}
+_lock = threading.Lock()  # flock does not exclude threads sharing the descriptor
+
+def enabled():
+    return os.environ.get("CLAUDE_VERDICT_CACHE", "1") != "0"
+
+def cache_file():
+    return cache_path("verdicts.cache")
+
+def _entries():
+    try:
+        return max(WAYS, int(os.environ.get("CLAUDE_VERDICT_CACHE_ENTRIES", DEFAULT_ENTRIES)))
+    except ValueError:
+        return DEFAULT_ENTRIES
+
+def _fd():
+    """Descriptor of the cache file, kept open for the life of the process"""
+    if "fd" not in _state:
+        _state["fd"] = os.open(cache_file(), os.O_RDWR | os.O_CREAT, 0o644)
+    return _state["fd"]
+
+def _header(fd):
+    """Header fields, (re)creating an empty table when the file is new or from another version"""
+    data = os.pread(fd, HEADER.size, 0)
+    if len(data) == HEADER.size:
+        header = list(HEADER.unpack(data))
+        if header[0] == MAGIC and header[1] == VERSION:
+            return header
+
+    sets = max(1, _entries() // WAYS)
+    os.ftruncate(fd, 0)
+    os.ftruncate(fd, HEADER.size + sets * WAYS * SLOT.size)
+    header = [MAGIC, VERSION, WAYS, sets, 0, 0, 0]
+    os.pwrite(fd, HEADER.pack(*header), 0)
+    return header
+
+def _set_offset(header, key):
+    _, _, ways, sets, _, _, _ = header
+    return HEADER.size + (zlib.crc32(key) % sets) * ways * SLOT.size
+
+def _lookup(fd, key, fingerprint):
+    """Cached level of a command, or False on a miss; counts the access"""
+    header = _header(fd)
+    ways = header[2]
+    offset = _set_offset(header, key)
+    slots = os.pread(fd, ways * SLOT.size, offset)
+    header[4] += 1
+
+    for i in range(ways):
+        used, slot_fingerprint, level, length, text = SLOT.unpack_from(slots, i * SLOT.size)
+        if used and slot_fingerprint == fingerprint and text[:length] == key:
+            os.pwrite(fd, USED.pack(header[4]), offset + i * SLOT.size)
+            header[5] += 1
+            os.pwrite(fd, HEADER.pack(*header), 0)
+            return LEVELS[level]
+
+    header[6] += 1
+    os.pwrite(fd, HEADER.pack(*header), 0)
+    return False
+
+def _store(fd, key, fingerprint, level):
+    """Put a verdict into the least recently used slot of its set"""
+    header = _header(fd)
+    ways = header[2]
+    offset = _set_offset(header, key)
+    slots = os.pread(fd, ways * SLOT.size, offset)
+
+    victim, victim_used = 0, None
+    for i in range(ways):
+        used, slot_fingerprint, _, length, text = SLOT.unpack_from(slots, i * SLOT.size)
+        if used and slot_fingerprint == fingerprint and text[:length] == key:
+            return  # Another process stored it meanwhile
+        if victim_used is None or used < victim_used:
+            victim, victim_used = i, used
+
+    header[4] += 1
+    os.pwrite(fd, SLOT.pack(header[4], fingerprint, LEVELS.index(level), len(key), key), offset + victim * SLOT.size)
+    os.pwrite(fd, HEADER.pack(*header), 0)
+
+def _locked(func, *args, wait=False):
+    """Run func on the locked cache file; raises BlockingIOError when it is busy and not wait"""
+    if not _lock.acquire(blocking=wait):
+        raise BlockingIOError("verdict cache busy")
+    try:
+        fd = _fd()
+        fcntl.flock(fd, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        try:
+            return func(fd, *args)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        _lock.release()
+
+def classify(policy, command):
+    """policy.classify() of a command, from the cache when it was seen under the same rules"""
+    # Keyed byte for byte: rules may be anchored or whitespace sensitive
+    key = command.encode(errors="surrogatepass")
+    if not enabled() or len(key) > MAX_COMMAND_BYTES:
+        return policy.classify(command)
+
+    fingerprint = bytes.fromhex(policy.fingerprint[:16])
+    try:
+        level = _locked(_lookup, key, fingerprint)
+        if level is not False:
+            return level
+    except OSError:
+        return policy.classify(command)  # Busy or unusable; the cache is an optimization only
+
+    # Evaluate the rules without holding the lock; compiling a large policy can take a while
+    level = policy.classify(command)
+    try:
+        _locked(_store, key, fingerprint, level)
+    except OSError:
+        pass
+    return level
+
+def _count_used(fd):
+    header = _header(fd)
+    _, _, ways, sets, _, _, _ = header
+    used = 0
+    for s in range(sets):
+        slots = os.pread(fd, ways * SLOT.size, HEADER.size + s * ways * SLOT.size)
+        used += sum(1 for i in range(ways) if USED.unpack_from(slots, i * SLOT.size)[0])
+    return header, used
+
+def stats():
+    """Hit and miss counters plus occupancy"""
+    header, used = _locked(_count_used, wait=True)
+    _, _, ways, sets, _, hits, misses = header
+    lookups = hits + misses
+    return {
+        "entries": ways * sets,
+        "used": used,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+    }
+
+def clear():
+    """Drop every cached verdict and reset the counters"""
+    def truncate(fd):
+        os.ftruncate(fd, 0)
+        _header(fd)
+    _locked(truncate, wait=True)
+
+def main():
+    action = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if action == "stats":
+        print(json.dumps(stats(), indent=2))
+    elif action == "clear":
+        clear()
+    else:
+        print("Usage: verdict_cache.py [stats|clear]")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -4,51 +4,74 @@ Generate project-specific CLAUDE.md file
 """
 import sys
 import os
-import json
 
-def detect_project_info(target_dir):
-    """Detect project information from directory contents"""
+import project_scan
+
+def detect_project_info(target_dir, update_cache=True):
+    """Detect project information from the tree, including nested sub-projects"""
     info = {
-        "name": os.path.basename(target_dir),
+        "name": os.path.basename(os.path.abspath(target_dir)),
         "type": "generic",
         "description": "A software project",
-        "tech_stack": []
+        "tech_stack": [],
+        "subprojects": []
     }
     
+    scan = project_scan.scan(target_dir, update_cache=update_cache)
+    root = scan["root_record"] or {"manifests": {}, "py": False}
+    manifests = root["manifests"]
+    
     # Check for package.json
-    package_json = os.path.join(target_dir, "package.json")
-    if os.path.exists(package_json):
-        try:
-            with open(package_json, 'r') as f:
-                data = json.load(f)
-                info["name"] = data.get("name", info["name"])
-                info["description"] = data.get("description", info["description"])
-                info["type"] = "node"
-                info["tech_stack"] = ["Node.js", "JavaScript/TypeScript"]
-        except:
-            pass
+    if "package.json" in manifests:
+        meta = manifests["package.json"][1]
+        info["name"] = meta.get("name", info["name"])
+        info["description"] = meta.get("description", info["description"])
+        info["type"] = "node"
+        info["tech_stack"] = ["Node.js", "JavaScript/TypeScript"]
     
     # Check for Python files
-    elif any(f.endswith('.py') for f in os.listdir(target_dir)):
+    elif root["py"]:
         info["type"] = "python"
         info["tech_stack"] = ["Python"]
     
     # Check for Rust
-    elif os.path.exists(os.path.join(target_dir, "Cargo.toml")):
+    elif "Cargo.toml" in manifests:
         info["type"] = "rust"
         info["tech_stack"] = ["Rust"]
     
     # Check for Java
-    elif os.path.exists(os.path.join(target_dir, "pom.xml")):
+    elif "pom.xml" in manifests:
         info["type"] = "java"
         info["tech_stack"] = ["Java", "Maven"]
     
+    # Nested workspaces (monorepos)
+    info["subprojects"] = [p for p in scan["subprojects"] if p["path"] != "."]
+    if info["subprojects"]:
+        if info["type"] == "generic":
+            types = {t for p in scan["subprojects"] for t in p["types"]}
+            info["type"] = types.pop() if len(types) == 1 else "monorepo"
+        info["tech_stack"] += [s for s in scan["tech_stack"] if s not in info["tech_stack"]]
+    
     return info
 
-def generate_claude_md(target_dir, project_type):
+def format_subprojects(subprojects):
+    """Markdown section listing nested sub-projects"""
+    if not subprojects:
+        return ""
+    lines = ["## Sub-projects"]
+    for project in subprojects:
+        line = f"- `{project['path']}` ({', '.join(project['tech_stack'])})"
+        if project["name"] != os.path.basename(project["path"]):
+            line += f": {project['name']}"
+        if project["description"]:
+            line += f" - {project['description']}"
+        lines.append(line)
+    return "\n".join(lines) + "\n\n"
+
+def generate_claude_md(target_dir, project_type, update_cache=True):
     """Generate CLAUDE.md content for the project"""
     
-    info = detect_project_info(target_dir)
+    info = detect_project_info(target_dir, update_cache)
     
     template = f"""# {info["name"]}
 
@@ -58,7 +81,7 @@ def generate_claude_md(target_dir, project_type):
 **Project Type**: {info["type"]}
 **Tech Stack**: {", ".join(info["tech_stack"])}
 
-## Claude Code Configuration
+{format_subprojects(info["subprojects"])}## Claude Code Configuration
 
 ### Automation Features Enabled
 - ✅ **Ultra Thinking**: Extended reasoning for complex problems
@@ -2,10 +2,54 @@
 """
 Generate Claude Code settings.json based on project type
 """
+import os
 import sys
+import ast
 import json
 
-def generate_settings(project_type):
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hooks')
+
+def hook_command(script, fast=False):
+    """Hook run command; the fast-start bundle uses an isolated interpreter without site-packages"""
+    command = f"hooks/{script}"
+    return f"python3 -I -S {command}" if fast else command
+
+def handled_tools(script):
+    """HANDLED_TOOLS of a hook module, read from its source without importing it; None means every tool"""
+    with open(os.path.join(HOOKS_DIR, script), 'r') as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "HANDLED_TOOLS" for t in node.targets):
+            return list(ast.literal_eval(node.value))
+    return None
+
+def tool_match(tools):
+    """Hook matcher for a list of tool names; an empty matcher matches every call"""
+    return {} if tools is None else {"tool_name": tools}
+
+def tool_routes(fast=False, log_read_only=False):
+    """pre_tool_use and post_tool_use entries that run a hook only for the tools it handles;
+    with log_read_only every call goes through the post-tool hook, which logs them all"""
+    pre_tools = handled_tools("enhanced_pre_tool.py")
+    post_tools = handled_tools("enhanced_post_tool.py")
+    routes = {
+        "pre_tool_use": [
+            {
+                "match": tool_match(pre_tools),
+                "run": [hook_command("hook_client.py pre_tool", fast)]
+            }
+        ],
+        "post_tool_use": [
+            {
+                # Logging needs every call, MCP and other tools unknown here included
+                "match": tool_match(None if log_read_only else post_tools),
+                "run": [hook_command("hook_client.py post_tool", fast)]
+            }
+        ]
+    }
+    return routes
+
+def generate_settings(project_type, fast=False, log_read_only=False):
     """Generate optimized settings for different project types"""
     
     base_settings = {
@@ -19,37 +63,38 @@ def generate_settings(project_type):
             "multi_edit": "allow"
         },
         "hooks": {
-            "pre_tool_use": [
-                {
-                    "match": {},
-                    "run": ["hooks/enhanced_pre_tool.py"]
-                }
-            ],
-            "post_tool_use": [
-                {
-                    "match": {},
-                    "run": ["hooks/enhanced_post_tool.py"]
-                }
-            ],
             "notification": [
                 {
                     "match": {},
-                    "run": ["hooks/smart_notification.py"]
+                    "run": [hook_command("smart_notification.py", fast)]
                 }
             ],
             "stop": [
                 {
                     "match": {},
-                    "run": ["hooks/session_manager.py"]
+                    "run": [hook_command("session_manager.py", fast)]
                 }
             ]
         },
         "environment": {
             "DISABLE_NON_ESSENTIAL_MODEL_CALLS": "true",
-            "CLAUDE_CODE_DISABLE_TERMINAL_TITLE": "true"
+            "CLAUDE_CODE_DISABLE_TERMINAL_TITLE": "true",
+            "CLAUDE_CHECKPOINT_QUIET_SECONDS": "5",
+            "CLAUDE_CHECKPOINT_MODE": "commit",
+            "CLAUDE_LOG_RETENTION_DAYS": "30",
+            "CLAUDE_NOTIFY_WINDOW_SECONDS": "2",
+            "CLAUDE_NOTIFY_MIN_INTERVAL_SECONDS": "10",
+            "CLAUDE_HOOK_BUDGET_MS": "1000",
+            "CLAUDE_HOOK_BUDGET_MS_STOP": "15000"
         }
     }
     
+    # Tool hooks are routed per tool from what each hook handles
+    routes = tool_routes(fast, log_read_only)
+    base_settings["hooks"] = dict(routes, **base_settings["hooks"])
+    if log_read_only:
+        base_settings["environment"]["CLAUDE_LOG_READ_ONLY"] = "1"
+    
     # Project-specific MCP servers
     mcp_servers = {}
     
@@ -113,12 +158,15 @@ def generate_settings(project_type):
     return base_settings
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: generate-settings.py <project_type>")
+    flags = ["--fast", "--log-read-only"]
+    args = [arg for arg in sys.argv[1:] if arg not in flags]
+    if len(args) != 1:
+        print("Usage: generate-settings.py <project_type> [--fast] [--log-read-only]")
         sys.exit(1)
     
-    project_type = sys.argv[1]
-    settings = generate_settings(project_type)
+    project_type = args[0]
+    settings = generate_settings(project_type, fast="--fast" in sys.argv[1:],
+                                 log_read_only="--log-read-only" in sys.argv[1:])
     print(json.dumps(settings, indent=2))
 
 if __name__ == "__main__":
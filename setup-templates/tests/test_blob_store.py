@@ -0,0 +1,17 @@
+import json
+
+def test_lone_surrogates_round_trip(hook, project):
+    blob_store = hook("blob_store")
+    content = "x" * 5000 + "\ud800"
+    ref = blob_store.externalize({"content": content}, limit=4096)["content"]
+    assert blob_store.is_ref(ref)
+    assert blob_store.resolve(ref) == content
+
+def test_post_tool_logs_content_with_lone_surrogates(hook, project):
+    enhanced_post_tool = hook("enhanced_post_tool")
+    raw = '{"tool_name": "write", "parameters": {"file_path": "a.txt", "content": "' + "x" * 5000 + '\\udc80"}}'
+
+    assert enhanced_post_tool.process(raw)[1] == 0
+    [path] = (project / ".do.claude" / "logs").glob("usage_*.log")
+    [entry] = [json.loads(line) for line in path.read_text().splitlines()]
+    assert hook("blob_store").resolve(entry["parameters"])["content"].endswith("\udc80")
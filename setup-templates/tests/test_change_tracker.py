@@ -0,0 +1,53 @@
+import subprocess
+
+import pytest
+
+def _git(cwd, *args):
+    return subprocess.run(["git"] + list(args), cwd=cwd, capture_output=True, text=True, check=True).stdout
+
+@pytest.fixture
+def tracker(hook, project):
+    _git(project, "init", "-q")
+    _git(project, "config", "user.email", "test@example.com")
+    _git(project, "config", "user.name", "test")
+    (project / ".gitignore").write_text(".do.claude/\n")
+    (project / "kept.txt").write_text("one\n")
+    _git(project, "add", "-A")
+    _git(project, "commit", "-q", "-m", "initial")
+
+    tracker = hook("change_tracker").Tracker(str(project))
+    tracker.reconcile()
+    if tracker.state != "ok":
+        pytest.skip("inotify is not available")
+    yield tracker
+    tracker.libc.close(tracker.fd)
+
+def test_changes_are_tracked_without_git_status(tracker, project):
+    (project / "kept.txt").write_text("two\n")
+    (project / ".do.claude" / "ignored.txt").write_text("x\n")
+    reply = tracker.handle({"op": "changes"})
+    assert reply["state"] == "ok" and reply["paths"] == ["kept.txt"]
+
+    tracker.handle({"op": "ack", "seq": reply["seq"]})
+    assert tracker.handle({"op": "changes"})["paths"] == []
+
+def test_queue_overflow_rebuilds_the_set_from_git_status(tracker, project, monkeypatch):
+    with open("/proc/sys/fs/inotify/max_queued_events") as f:
+        max_events = int(f.read())
+    if max_events > 50000:
+        pytest.skip("event queue too large to overflow quickly")
+    reconciled = []
+    monkeypatch.setattr(tracker, "reconcile", lambda reconcile=tracker.reconcile: reconciled.append(1) or reconcile())
+
+    (project / "kept.txt").write_text("two\n")
+    names = [f"f{i:05d}" for i in range(max_events // 2 + 100)]  # Create and close-write events each
+    for name in names:
+        (project / name).write_text("")
+    reply = tracker.handle({"op": "changes"})
+    assert reconciled == [1]
+    assert reply["state"] == "ok"
+    assert reply["paths"] == sorted(names + ["kept.txt"])
+
+    # Watches are back after the rebuild
+    (project / "after.txt").write_text("x\n")
+    assert "after.txt" in tracker.handle({"op": "changes"})["paths"]
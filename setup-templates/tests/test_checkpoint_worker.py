@@ -0,0 +1,144 @@
+import io
+import os
+import sys
+import json
+import threading
+import subprocess
+
+import pytest
+
+def _git(cwd, *args):
+    return subprocess.run(["git"] + list(args), cwd=cwd, capture_output=True, text=True, check=True).stdout
+
+@pytest.fixture
+def worker(hook, monkeypatch):
+    checkpoint_worker = hook("checkpoint_worker")
+    monkeypatch.setattr(checkpoint_worker, "spawn_worker", lambda: None)
+    monkeypatch.setattr(checkpoint_worker, "send_notification", lambda *args, **kwargs: None)
+    return checkpoint_worker
+
+@pytest.fixture
+def repo(project):
+    _git(project, "init", "-q")
+    _git(project, "config", "user.email", "test@example.com")
+    _git(project, "config", "user.name", "test")
+    (project / ".gitignore").write_text(".do.claude/\n")
+    (project / "kept.txt").write_text("one\n")
+    _git(project, "add", "-A")
+    _git(project, "commit", "-q", "-m", "initial")
+    return project
+
+def test_tracked_changes_are_staged_and_acked(worker, repo, monkeypatch):
+    acked = []
+    (repo / "kept.txt").write_text("two\n")
+    (repo / "new.txt").write_text("new\n")
+    monkeypatch.setattr(worker.change_tracker, "changes", lambda: (str(repo), 7, ["kept.txt", "new.txt", "gone.txt"]))
+    monkeypatch.setattr(worker.change_tracker, "ack", acked.append)
+
+    worker.commit_checkpoint([{"file_path": None}])
+    assert acked == [7]
+    assert _git(repo, "status", "--porcelain") == ""
+    assert sorted(_git(repo, "show", "--name-only", "--format=", "HEAD").split()) == ["kept.txt", "new.txt"]
+
+def test_deleted_tracked_path_is_staged(worker, repo, monkeypatch):
+    acked = []
+    os.unlink(repo / "kept.txt")
+    monkeypatch.setattr(worker.change_tracker, "changes", lambda: (str(repo), 3, ["kept.txt"]))
+    monkeypatch.setattr(worker.change_tracker, "ack", acked.append)
+
+    worker.commit_checkpoint([{"file_path": None}])
+    assert acked == [3]
+    assert _git(repo, "ls-files") == ".gitignore\n"
+
+def test_failed_commit_emits_no_checkpoint(worker, repo, monkeypatch):
+    emitted = []
+    monkeypatch.setattr(worker.change_tracker, "changes", lambda: None)
+    monkeypatch.setattr(worker.telemetry, "emit", lambda kind, **fields: emitted.append(kind))
+    (repo / "kept.txt").write_text("two\n")
+    _git(repo, "config", "user.useConfigOnly", "true")
+    _git(repo, "config", "--unset", "user.email")
+    monkeypatch.setenv("GIT_CONFIG_GLOBAL", os.devnull)
+    monkeypatch.delenv("EMAIL", raising=False)
+
+    worker.commit_checkpoint([{"file_path": None}])
+    assert emitted == []
+
+def test_every_touched_path_is_queued(hook, worker, project):
+    enhanced_post_tool = hook("enhanced_post_tool")
+    parameters = {"file_path": "a.txt", "file_paths": ["b.txt"], "edits": [{"file_path": "c.txt"}]}
+    enhanced_post_tool.create_auto_checkpoint(enhanced_post_tool.path_policy.target_paths(parameters))
+    enhanced_post_tool.create_auto_checkpoint([])
+    paths = [entry["file_path"] for entry in worker.drain_queue()]
+    assert paths == [str(project / name) for name in ("a.txt", "b.txt", "c.txt")] + [None]
+
+def _ref_files(repo, ref):
+    return sorted(_git(repo, "ls-tree", "-r", "--name-only", ref).split())
+
+def test_ref_checkpoint_of_named_paths(worker, repo, monkeypatch):
+    monkeypatch.setenv("CLAUDE_CHECKPOINT_MODE", "ref")
+    (repo / "a.txt").write_text("a\n")
+    (repo / "b.txt").write_text("b\n")
+    worker.commit_checkpoint([{"file_path": str(repo / "a.txt"), "session_id": "s1"}])
+    assert _ref_files(repo, "refs/checkpoints/s1") == [".gitignore", "a.txt", "kept.txt"]
+    assert _git(repo, "status", "--porcelain").split() == ["??", "a.txt", "??", "b.txt"]
+
+def test_ref_checkpoint_without_paths_covers_the_work_tree(worker, repo, monkeypatch):
+    monkeypatch.setenv("CLAUDE_CHECKPOINT_MODE", "ref")
+    (repo / "dist.txt").write_text("built\n")
+    worker.commit_checkpoint([{"file_path": str(repo / "kept.txt"), "session_id": "s1"},
+                              {"file_path": None, "session_id": "s1"}])
+    assert _ref_files(repo, "refs/checkpoints/s1") == [".gitignore", "dist.txt", "kept.txt"]
+
+def test_burst_is_committed_once(worker, monkeypatch):
+    commits = []
+    monkeypatch.setattr(worker, "commit_checkpoint", commits.append)
+    monkeypatch.setattr(worker, "quiet_seconds", lambda: 0.3)
+    monkeypatch.setattr(worker, "IDLE_EXIT_SECONDS", 0.5)
+    worker.enqueue(["a.txt"])
+    worker.enqueue(["b.txt", "c.txt"])
+
+    thread = threading.Thread(target=worker.run_worker)
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert len(commits) == 1
+    assert [os.path.basename(e["file_path"]) for e in commits[0]] == ["a.txt", "b.txt", "c.txt"]
+    assert worker.pending_since() is None
+
+def test_flush_commits_without_waiting_for_quiet_period(worker, monkeypatch):
+    commits = []
+    monkeypatch.setattr(worker, "commit_checkpoint", commits.append)
+    worker.enqueue(["a.txt"])
+    worker.enqueue()
+    worker.flush(timeout=1)
+    assert len(commits) == 1 and len(commits[0]) == 2
+    assert worker.drain_queue() == []
+
+
+def test_session_id_comes_from_the_payload(hook, worker, project):
+    enhanced_post_tool = hook("enhanced_post_tool")
+    enhanced_post_tool.process(json.dumps({"tool_name": "write", "parameters": {"file_path": "a.txt"},
+                                           "exit_code": 0, "session_id": "payload-session"}))
+    assert [entry["session_id"] for entry in worker.drain_queue()] == ["payload-session"]
+
+def test_stop_hook_discards_the_payload_session_index(hook, worker, project, monkeypatch):
+    monkeypatch.setenv("CLAUDE_CHECKPOINT_MODE", "ref")
+    session_manager = hook("session_manager")
+    discarded = []
+    monkeypatch.setattr(session_manager.checkpoint_worker, "flush", lambda *args, **kwargs: None)
+    monkeypatch.setattr(session_manager.checkpoint_worker, "discard_session_index", discarded.append)
+    monkeypatch.setattr(sys, "stdin", io.StringIO(json.dumps({"session_id": "payload-session", "duration_ms": 1000})))
+    session_manager.main()
+    assert discarded == ["payload-session"]
+
+def test_session_ids_git_refuses_get_valid_distinct_refs(worker, repo, monkeypatch):
+    monkeypatch.setenv("CLAUDE_CHECKPOINT_MODE", "ref")
+    ids = ["a..b", "a__b", "run.lock", "a/b", "..", "-", "s1"]
+    refs = [worker.session_ref(session_id) for session_id in ids]
+    assert len(set(refs)) == len(ids) and refs[-1] == "refs/checkpoints/s1"
+    for ref in refs:
+        subprocess.run(["git", "check-ref-format", ref], check=True)
+
+    (repo / "a.txt").write_text("a\n")
+    worker.commit_ref_checkpoint("a..b", [str(repo / "a.txt")])
+    assert "a.txt" in _ref_files(repo, worker.session_ref("a..b"))
@@ -0,0 +1,38 @@
+import re
+import sys
+import json
+
+CUSTOM_RULES = {
+    "safe": [r"^make\s+lint(\s|$)", r"docker\s+ps|docker\s+images", r"ech?o\s"],
+    "dev": [r"^make\s+", r"^(npm|pnpm)\s+run", r"\.py$"],
+    "dangerous": [r"terraform\s+destroy", r"^cat.*\|\s*sh", r"x+\s*\|"]
+}
+
+def _reference(policy, command):
+    """The original matcher: every rule in order, safe anchored, the others searched"""
+    for name, anchored in (("safe", True), ("dangerous", False), ("dev", False)):
+        find = re.match if anchored else re.search
+        if any(find(pattern, command) for pattern in policy[name]):
+            return name
+    return None
+
+def test_default_policy_matches_the_original_matcher(hook, commands):
+    command_policy = hook("command_policy")
+    policy = command_policy.load_policy()
+    for command in commands:
+        assert policy.classify(command) == _reference(command_policy.DEFAULT_POLICY, command), command
+
+def test_custom_policy_matches_the_original_matcher(hook, project, commands):
+    (project / ".do.claude" / "command_policy.json").write_text(json.dumps(CUSTOM_RULES))
+    command_policy = hook("command_policy")
+    rules = {name: command_policy.DEFAULT_POLICY[name] + CUSTOM_RULES[name] for name in CUSTOM_RULES}
+    compiled = command_policy.load_policy()
+
+    # A fresh process gets the same answers from the cached layout
+    assert (project / ".do.claude" / "cache" / "command_policy.json").is_file()
+    del sys.modules["command_policy"]
+    cached = hook("command_policy").load_policy()
+    for command in commands:
+        expected = _reference(rules, command)
+        assert compiled.classify(command) == expected, command
+        assert cached.classify(command) == expected, command
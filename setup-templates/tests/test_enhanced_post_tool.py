@@ -0,0 +1,22 @@
+import json
+
+def _read_log(project, kind):
+    lines = []
+    for path in sorted((project / ".do.claude" / "logs").glob(f"{kind}_*.log")):
+        lines.extend(json.loads(line) for line in path.read_text().splitlines())
+    return lines
+
+def test_spent_budget_keeps_log_stats_and_notification_records(hook, project, monkeypatch):
+    monkeypatch.setenv("CLAUDE_HOOK_BUDGET_MS", "0")
+    enhanced_post_tool = hook("enhanced_post_tool")
+    enhanced_post_tool.hook_budget.start("post_tool")
+    raw = json.dumps({"tool_name": "write", "parameters": {"file_path": "a.txt"}, "exit_code": 0})
+
+    assert enhanced_post_tool.process(raw)[1] == 0
+    assert [e["tool_name"] for e in _read_log(project, "usage")] == ["write"]
+    assert enhanced_post_tool.stats_store.load_stats()["tool_counts"] == {"write": 1}
+    assert [e["message"] for e in _read_log(project, "notifications")] == ["a.txt"]
+    # Showing the notification and queueing the checkpoint are what gets shed
+    run_dir = project / ".do.claude" / "run"
+    assert not (run_dir / "notify.queue").exists()
+    assert not (run_dir / "checkpoint.queue").exists()
@@ -0,0 +1,58 @@
+import json
+import threading
+
+def _call(command):
+    return json.dumps({"tool_name": "bash", "parameters": {"command": command}})
+
+def test_fallback_uses_builtin_rules_without_policy_file(hook):
+    enhanced_pre_tool = hook("enhanced_pre_tool")
+    assert enhanced_pre_tool.fallback_verdict(_call("ls"))[1] == 0
+    assert enhanced_pre_tool.fallback_verdict(_call("sudo rm -rf /"))[1] == 1
+
+def test_fallback_blocks_until_project_policy_is_loaded(hook, project):
+    (project / ".do.claude" / "command_policy.json").write_text(json.dumps({"dangerous": ["terraform\\s+destroy"]}))
+    enhanced_pre_tool = hook("enhanced_pre_tool")
+    response, exit_code = enhanced_pre_tool.fallback_verdict(_call("ls"))
+    assert exit_code == 1 and "policy" in response["error"]
+
+    enhanced_pre_tool.command_policy.load_policy()
+    assert enhanced_pre_tool.fallback_verdict(_call("ls"))[1] == 0
+    assert enhanced_pre_tool.fallback_verdict(_call("terraform destroy"))[1] == 1
+
+def test_fallback_blocks_with_unloaded_path_policy(hook, project):
+    (project / ".do.claude" / "path_policy.json").write_text(json.dumps({"protect": ["*.pem"]}))
+    enhanced_pre_tool = hook("enhanced_pre_tool")
+    payload = json.dumps({"tool_name": "write", "parameters": {"file_path": "key.pem"}})
+    assert enhanced_pre_tool.fallback_verdict(payload)[1] == 1
+
+def test_fallback_does_not_wait_for_locks_the_stalled_thread_holds(hook, monkeypatch):
+    enhanced_pre_tool = hook("enhanced_pre_tool")
+    monkeypatch.setattr(enhanced_pre_tool, "send_notification", lambda *args, **kwargs: 1 / 0)
+    results = []
+    thread = threading.Thread(target=lambda: results.append(enhanced_pre_tool.fallback_verdict(_call("rm -rf /"))),
+                              daemon=True)
+    with enhanced_pre_tool.verdict_cache._lock:
+        thread.start()
+        thread.join(5)
+    assert results and results[0][1] == 1 and "dangerous" in results[0][0]["error"]
+
+def test_fallback_checks_every_multi_edit_path(hook, project):
+    enhanced_pre_tool = hook("enhanced_pre_tool")
+    payload = json.dumps({"tool_name": "multi_edit", "parameters": {
+        "edits": [{"file_path": "a.txt"}, {"file_path": "/etc/passwd"}]}})
+    response, exit_code = enhanced_pre_tool.fallback_verdict(payload)
+    assert exit_code == 1 and "/etc/passwd" in response["error"]
+
+BATCH = {"batch": [
+    {"tool_name": "bash", "parameters": {"command": "ls"}},
+    {"tool_name": "write", "parameters": {"file_path": "/etc/hosts"}},
+    {"tool_name": "bash", "parameters": {"command": "sudo rm -rf /"}}
+]}
+
+def test_batch_gets_a_verdict_per_call(hook):
+    enhanced_pre_tool = hook("enhanced_pre_tool")
+    for response, exit_code in (enhanced_pre_tool.process(json.dumps(BATCH)),
+                                enhanced_pre_tool.fallback_verdict(json.dumps(BATCH))):
+        assert exit_code == 1 and response["error"] == "Blocked 2 of 3 tool calls"
+        assert [bool(r.get("error")) for r in response["results"]] == [False, True, True]
+    assert enhanced_pre_tool.process(json.dumps({"batch": BATCH["batch"][:1]}))[1] == 0
@@ -0,0 +1,32 @@
+def _routes(settings, event):
+    return [(entry["match"], entry["run"]) for entry in settings["hooks"][event]]
+
+def test_read_only_tools_run_no_hook_by_default(script):
+    settings = script("generate-settings").generate_settings("generic")
+    for event in ("pre_tool_use", "post_tool_use"):
+        [(match, _)] = _routes(settings, event)
+        assert "read" not in match["tool_name"] and "bash" in match["tool_name"]
+    assert "CLAUDE_LOG_READ_ONLY" not in settings["environment"]
+
+def test_log_read_only_sends_every_call_to_the_post_tool_hook(script):
+    settings = script("generate-settings").generate_settings("generic", log_read_only=True)
+    assert _routes(settings, "post_tool_use") == [({}, ["hooks/hook_client.py post_tool"])]
+    assert settings["environment"]["CLAUDE_LOG_READ_ONLY"] == "1"
+
+def test_profiled_mcp_tools_are_not_logged_twice(script):
+    generate_settings = script("generate-settings")
+    mcp_profile = script("mcp_profile")
+    profiles = {"github": {"tools": ["create_issue"]}}
+    decisions = {"github": ("eager", "")}
+    for log_read_only, expected in ((False, 2), (True, 1)):
+        settings = generate_settings.generate_settings("generic", log_read_only=log_read_only)
+        settings["mcpServers"] = {"github": settings["mcpServers"]["github"]}
+        optimized = mcp_profile.optimized_settings(settings, profiles, decisions)
+        assert len(optimized["hooks"]["post_tool_use"]) == expected
+
+def test_automation_efficiency_needs_read_only_logging(hook, monkeypatch):
+    session_manager = hook("session_manager")
+    assert session_manager.calculate_automation_efficiency({"bash": 5}) == "no_data"
+    monkeypatch.setenv("CLAUDE_LOG_READ_ONLY", "1")
+    assert session_manager.calculate_automation_efficiency({"bash": 5}) == "high_automation"
+    assert session_manager.calculate_automation_efficiency({"bash": 1, "read": 9}) == "low_automation"
@@ -0,0 +1,15 @@
+import os
+import sys
+import json
+import subprocess
+
+BENCH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'benchmarks', 'hook_bench.py')
+
+def test_default_suite_runs(tmp_path):
+    """Every benchmark still calls an entry point that exists"""
+    output = tmp_path / "results.json"
+    result = subprocess.run([sys.executable, BENCH, "--iterations", "3", "--cold-runs", "1", "--output", str(output)],
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr
+    results = json.loads(output.read_text())["results"]
+    assert "validate_batch" in results and "cold_start:hook_client pre_tool" in results
@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import subprocess
+
+import pytest
+
+def test_long_project_paths_use_a_private_socket_dir(hook, monkeypatch, tmp_path):
+    hook_paths = hook("hook_paths")
+    monkeypatch.setattr(hook_paths, "RUN_DIR", str(tmp_path / ("x" * 120)))
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "xdg"))
+    (tmp_path / "xdg").mkdir(mode=0o700)
+
+    path = hook_paths.socket_path("hookd.sock")
+    directory = os.path.dirname(path)
+    assert directory == str(tmp_path / "xdg" / "claude-code-ultra")
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+
+    os.chmod(directory, 0o755)
+    with pytest.raises(PermissionError):
+        hook_paths.socket_path("hookd.sock")
+
+def test_client_ignores_a_socket_of_another_user(hook):
+    hook_client = hook("hook_client")
+    path = hook_client.socket_path()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    try:
+        hook_client.connect().close()
+        if os.getuid() != 0:
+            pytest.skip("changing the socket owner needs root")
+        os.chown(path, os.getuid() + 1, -1)
+        with pytest.raises(FileNotFoundError):
+            hook_client.connect()
+    finally:
+        server.close()
+
+def _run_client(project, hook, payload):
+    env = {k: v for k, v in os.environ.items() if not k.startswith("CLAUDE_")}
+    env["CLAUDE_HOOK_DAEMON_IDLE"] = "30"
+    result = subprocess.run([sys.executable, str(project / ".do.claude" / "hooks" / "hook_client.py"), hook],
+                            input=json.dumps(payload), capture_output=True, text=True, cwd=project, env=env, timeout=30)
+    return json.loads(result.stdout)
+
+def _pids(project, script):
+    result = subprocess.run(["pgrep", "-f", str(project / ".do.claude" / "hooks" / script)],
+                            capture_output=True, text=True)
+    return [int(pid) for pid in result.stdout.split()]
+
+def _daemon_pid(project):
+    pids = _pids(project, "hook_daemon.py")
+    return pids[0] if pids else None
+
+def _wait(condition, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        value = condition()
+        if value:
+            return value
+        time.sleep(0.05)
+    return condition()
+
+def test_daemon_restarts_when_a_dependency_changes(project):
+    socket_file = project / ".do.claude" / "run" / "hookd.sock"
+    payload = {"tool_name": "write", "parameters": {"file_path": "a.txt"}}
+    try:
+        _run_client(project, "pre_tool", payload)
+        first = _wait(lambda: socket_file.exists() and _daemon_pid(project))
+        assert first
+
+        # A module the hooks import, not one the daemon imports by name
+        policy = project / ".do.claude" / "hooks" / "path_policy.py"
+        policy.write_text(policy.read_text().replace('"protect": ["/etc/"', '"protect": ["/etc/", "a.txt"'))
+        assert _run_client(project, "pre_tool", payload).get("error")
+        assert _wait(lambda: _daemon_pid(project) is None)
+
+        _run_client(project, "pre_tool", payload)
+        second = _wait(lambda: socket_file.exists() and _daemon_pid(project))
+        assert second and second != first
+        assert _run_client(project, "pre_tool", payload).get("error")
+    finally:
+        # The hooks run in the client process also start a notification dispatcher
+        for pid in _pids(project, "hook_daemon.py") + _pids(project, "notify_dispatcher.py"):
+            os.kill(pid, signal.SIGTERM)
+
+def test_batch_is_validated_by_the_daemon(project):
+    socket_file = project / ".do.claude" / "run" / "hookd.sock"
+    batch = {"batch": [{"tool_name": "bash", "parameters": {"command": "ls"}},
+                       {"tool_name": "write", "parameters": {"file_path": "/etc/hosts"}}]}
+    try:
+        _run_client(project, "pre_tool", {"tool_name": "bash", "parameters": {"command": "ls"}})
+        assert _wait(lambda: socket_file.exists() and _daemon_pid(project))
+        response = _run_client(project, "pre_tool", batch)
+        assert response["error"] == "Blocked 1 of 2 tool calls"
+        assert [bool(r.get("error")) for r in response["results"]] == [False, True]
+    finally:
+        for pid in _pids(project, "hook_daemon.py") + _pids(project, "notify_dispatcher.py"):
+            os.kill(pid, signal.SIGTERM)
@@ -0,0 +1,27 @@
+import os
+import fcntl
+import json
+
+def test_contended_flush_keeps_observations_pending(hook, project):
+    hook_metrics = hook("hook_metrics")
+    hook_paths = hook("hook_paths")
+    log_dir = str(project / ".do.claude" / "logs")
+    hook_metrics.begin("pre_tool", "Bash")
+    hook_metrics.observe("validate_command", 0.002)
+
+    # Another process flushing must not stall this one's exit
+    metrics_file = hook_paths.run_path("metrics.json")
+    holder = os.open(metrics_file, os.O_RDWR | os.O_CREAT)
+    fcntl.flock(holder, fcntl.LOCK_EX)
+    try:
+        hook_metrics.flush(log_dir)
+        assert os.path.getsize(metrics_file) == 0
+        assert not os.path.exists(hook_metrics.textfile_path(log_dir))
+    finally:
+        os.close(holder)
+
+    hook_metrics.flush(log_dir)
+    with open(metrics_file) as f:
+        histograms = json.load(f)
+    assert histograms["pre_tool|validate_command|Bash"][-1] == 1
+    assert os.path.exists(hook_metrics.textfile_path(log_dir))
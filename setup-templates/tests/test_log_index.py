@@ -0,0 +1,69 @@
+import os
+import json
+
+def _entry(i):
+    return {"timestamp": "2026-10-18T10:00:%02d" % i, "tool_name": "bash", "session_id": "s1", "exit_code": 0}
+
+def test_rotated_segment_adopts_its_index(hook, project, monkeypatch):
+    log_writer = hook("log_writer")
+    log_index = hook("log_index")
+    log_dir = str(project / ".do.claude" / "logs")
+    for i in range(3):
+        log_writer.append("usage", _entry(i), log_dir)
+    log_writer.append("notifications", {"timestamp": "2026-10-18T10:00:00", "type": "info"}, log_dir)
+    [active] = [index for index in log_index.update_index(log_dir) if index.kind == "usage"]
+    assert active.load_meta()["records"] == 3
+
+    monkeypatch.setenv("CLAUDE_LOG_MAX_BYTES", "1")
+    log_writer.append("usage", _entry(3), log_dir)  # Rotates usage_<date>.log to usage_<date>.1.log
+    rebuilt = []
+    monkeypatch.setattr(log_index.SegmentIndex, "_empty_meta",
+                        lambda self, stat, empty=log_index.SegmentIndex._empty_meta: rebuilt.append(self.path) or empty(self, stat))
+
+    # A query of another kind leaves the orphaned usage index for its own kind to adopt
+    log_index.update_index(log_dir, "notifications")
+    [rotated] = log_index.update_index(log_dir, "usage")
+    assert rotated.path.endswith(".1.log")
+    assert rebuilt == []
+    assert rotated.load_meta()["records"] == 4
+    assert len(list(rotated.records())) == 4
+    assert log_index.Query(kind="usage", tool="bash").count([rotated]) == 4
+    assert not (project / ".do.claude" / "logs" / ".index" / (active.path.rsplit("/", 1)[1] + ".meta.json")).exists()
+
+def _write_log(path, entries):
+    path.write_text("".join(json.dumps(e) + "\n" for e in entries))
+
+def _reuse_inode(index_dir, old_name, new_path):
+    """Point an orphaned index at a new file, as if the file system reused the freed inode"""
+    meta_path = index_dir / (old_name + ".meta.json")
+    meta = json.loads(meta_path.read_text())
+    meta["ino"] = os.stat(new_path).st_ino
+    meta_path.write_text(json.dumps(meta))
+
+def test_new_file_on_a_reused_inode_gets_its_own_index(hook, project):
+    log_index = hook("log_index")
+    logs = project / ".do.claude" / "logs"
+    logs.mkdir(parents=True, exist_ok=True)
+    failed = [dict(_entry(i), exit_code=1) for i in range(6)]
+
+    # Compressed (or removed) by maintenance; the next day's log takes its inode
+    _write_log(logs / "usage_20261017.log", failed)
+    log_index.update_index(str(logs), "usage")
+    os.unlink(logs / "usage_20261017.log")
+    _write_log(logs / "usage_20261018.log", [dict(_entry(0), tool_name="read")])
+    _reuse_inode(logs / ".index", "usage_20261017.log", logs / "usage_20261018.log")
+
+    # Same kind and day, but different content
+    _write_log(logs / "usage_20261019.log", failed)
+    log_index.update_index(str(logs), "usage")
+    os.unlink(logs / "usage_20261019.log")
+    _write_log(logs / "usage_20261019.1.log", [dict(_entry(0), tool_name="read")] * 7)
+    _reuse_inode(logs / ".index", "usage_20261019.log", logs / "usage_20261019.1.log")
+
+    indexes = log_index.update_index(str(logs), "usage")
+    assert log_index.Query(kind="usage", tool="read").count(indexes) == 8
+    assert log_index.Query(kind="usage", tool="bash", failed=True).count(indexes) == 0
+    assert all(json.loads(line)["tool_name"] == "read" for line in log_index.Query(kind="usage").lines(indexes))
+    assert sorted(os.listdir(logs / ".index")) == sorted(
+        ["usage_20261018.log.idx", "usage_20261018.log.meta.json",
+         "usage_20261019.1.log.idx", "usage_20261019.1.log.meta.json", ".lock"])
@@ -0,0 +1,38 @@
+import json
+import argparse
+
+def _args(**overrides):
+    return argparse.Namespace(**dict({"min_calls": 5, "defer_ms": 500, "days": 30, "drop_unused": False}, **overrides))
+
+def test_secrets_stay_out_of_settings_and_cache(project, hook, script, monkeypatch):
+    mcp_lazy = hook("mcp_lazy")
+    mcp_profile = script("mcp_profile")
+    monkeypatch.setenv("GH_TOKEN", "s3cret")
+    config = {"command": "npx", "args": ["server-github", "--token", "${GH_TOKEN}"]}
+    profile = {"tools": ["create_issue"], "responses": {"initialize": {"ok": True}}}
+
+    settings = mcp_profile.optimized_settings({"mcpServers": {"github": config}}, {"github": profile},
+                                              {"github": ("defer", "")})
+    mcp_profile.save_responses(str(project), "github", config, profile)
+    with open(mcp_lazy.cache_file("github")) as f:
+        cached = f.read()
+    assert "s3cret" not in json.dumps(settings) and "s3cret" not in cached
+    assert "${GH_TOKEN}" in settings["mcpServers"]["github"]["args"]
+
+    # The proxy matches the cache and starts the server with the secret expanded
+    command = settings["mcpServers"]["github"]["args"][3:]
+    assert mcp_lazy.load_responses("github", command) == profile["responses"]
+    assert mcp_lazy.Proxy(command, {}).command[-1] == "s3cret"
+
+def test_unused_servers_are_dropped_only_when_their_calls_are_logged(script):
+    generate_settings = script("generate-settings")
+    mcp_profile = script("mcp_profile")
+    settings = generate_settings.generate_settings("generic")
+    settings["hooks"]["post_tool_use"].append(
+        {"match": generate_settings.tool_match(["mcp__github__create_issue"]), "run": ["hooks/hook_client.py log_tool"]})
+    profile = {"status": "ready", "ready_ms": 900}
+
+    assert mcp_profile.decide(profile, 0, _args(), mcp_profile.logs_server(settings, "github"))[0] == "drop"
+    assert mcp_profile.decide(profile, 0, _args(), mcp_profile.logs_server(settings, "memory"))[0] == "defer"
+    settings = generate_settings.generate_settings("generic", log_read_only=True)
+    assert mcp_profile.logs_server(settings, "memory")
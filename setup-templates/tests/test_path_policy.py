@@ -0,0 +1,18 @@
+import os
+import json
+
+def test_directory_swapped_for_symlink_is_resolved_again(hook, project):
+    (project / ".do.claude" / "path_policy.json").write_text(json.dumps({"protect": [f"{project}/secrets/"]}))
+    (project / "secrets").mkdir()
+    (project / "work").mkdir()
+    path_policy = hook("path_policy")
+    policy = path_policy.load_policy()
+
+    assert policy.check("work/notes.txt")[0] is None
+    os.rename(project / "work", project / "work.old")
+    os.symlink(project / "secrets", project / "work")
+    assert policy.check("work/notes.txt")[0] == "protect"
+
+    os.unlink(project / "work")
+    os.rename(project / "work.old", project / "work")
+    assert policy.check("work/notes.txt")[0] is None
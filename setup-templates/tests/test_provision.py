@@ -0,0 +1,29 @@
+import os
+
+def _tree(root):
+    return sorted(os.path.relpath(os.path.join(d, name), root)
+                  for d, dirs, files in os.walk(root) for name in dirs + files)
+
+def test_dry_run_writes_nothing(tmp_path, script, monkeypatch):
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+    repo = tmp_path / "repo"
+    (repo / ".do.claude").mkdir(parents=True)
+    (repo / "pyproject.toml").write_text('[project]\nname = "demo"\n')
+    before = _tree(repo)
+
+    report = script("provision").provision(str(repo), dry_run=True)
+    assert report["status"] == "ok"
+    assert "CLAUDE.md" in report["changed"]
+    assert _tree(repo) == before
+
+def test_provision_caches_the_scan(tmp_path, script, monkeypatch):
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "pyproject.toml").write_text('[project]\nname = "demo"\n')
+
+    provision = script("provision")
+    assert provision.provision(str(repo))["status"] == "ok"
+    assert (repo / ".do.claude" / "hooks").is_dir()
+    assert provision.provision(str(repo))["changed"] == []
+    assert (repo / ".do.claude" / "cache" / "project_scan.json").is_file()
@@ -0,0 +1,35 @@
+import json
+
+def _session(i, productivity="high"):
+    return {"timestamp": "2026-10-18T10:%02d:00" % i, "duration_minutes": 1.5, "total_tools": i,
+            "productivity_score": productivity, "automation_efficiency": "no_data", "session_id": f"s{i}"}
+
+def test_ring_keeps_the_newest_sessions(hook, project, monkeypatch):
+    monkeypatch.setenv("CLAUDE_SESSION_HISTORY_SIZE", "3")
+    session_history = hook("session_history")
+    for i in range(5):
+        session_history.append(_session(i))
+
+    history = session_history.read_history()
+    assert history["total_sessions"] == 5
+    assert [s["session_id"] for s in history["sessions"]] == ["s2", "s3", "s4"]
+    assert history["sessions"][-1] == dict(_session(4), timestamp="2026-10-18T10:04:00")
+    assert [s["session_id"] for s in session_history.read_history(limit=2)["sessions"]] == ["s3", "s4"]
+
+def test_zero_productivity_score_is_kept(hook, project):
+    session_history = hook("session_history")
+    session_history.append(_session(0, productivity=0))
+    assert session_history.read_history()["sessions"][0]["productivity_score"] == 0
+
+def test_legacy_history_is_imported(hook, project, monkeypatch):
+    monkeypatch.setenv("CLAUDE_SESSION_HISTORY_SIZE", "2")
+    logs = project / ".do.claude" / "logs"
+    logs.mkdir(parents=True, exist_ok=True)
+    legacy = {"sessions": [_session(i) for i in range(3)], "total_sessions": 40}
+    (logs / "session_history.json").write_text(json.dumps(legacy))
+
+    session_history = hook("session_history")
+    session_history.append(_session(3))
+    history = session_history.read_history()
+    assert history["total_sessions"] == 41
+    assert [s["session_id"] for s in history["sessions"]] == ["s2", "s3"]
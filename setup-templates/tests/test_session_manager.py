@@ -0,0 +1,36 @@
+import json
+from datetime import datetime, timedelta
+
+def _post(enhanced_post_tool, tool_name, **payload):
+    enhanced_post_tool.process(json.dumps(dict(payload, tool_name=tool_name, parameters={}, exit_code=0)))
+
+def test_report_counts_tools_under_the_payload_session(hook):
+    enhanced_post_tool = hook("enhanced_post_tool")
+    session_manager = hook("session_manager")
+    _post(enhanced_post_tool, "bash", session_id="s1")
+    _post(enhanced_post_tool, "bash", session_id="s2")
+
+    report = session_manager.generate_session_report({"session_id": "s1", "total_tools_used": 1, "duration_ms": 60000})
+    assert report["session_id"] == "s1"
+    assert report["tool_breakdown"] == {"bash": 1}
+
+def test_rebuild_reads_only_the_session_window(hook, project):
+    log_writer = hook("log_writer")
+    session_manager = hook("session_manager")
+    old = datetime.now() - timedelta(days=10)
+    log_writer.write_lines(log_writer.log_path("usage", when=old), [json.dumps(
+        {"timestamp": old.isoformat(), "tool_name": "edit", "session_id": "s1", "exit_code": 0}) + "\n"])
+    log_writer.append("usage", {"timestamp": datetime.now().isoformat(), "tool_name": "bash",
+                                "session_id": "s1", "exit_code": 0, "success": True})
+
+    report = session_manager.generate_session_report({"session_id": "s1", "total_tools_used": 1, "duration_ms": 60000})
+    assert report["tool_breakdown"] == {"bash": 1}
+    indexed = {path.name for path in (project / ".do.claude" / "logs").rglob("*.idx")}
+    assert not any(old.strftime("%Y%m%d") in name for name in indexed)
+
+def test_session_without_tools_skips_the_rebuild(hook, monkeypatch):
+    session_manager = hook("session_manager")
+    rebuilt = []
+    monkeypatch.setattr(session_manager.stats_store, "rebuild_session_counts", lambda *args, **kwargs: rebuilt.append(args))
+    report = session_manager.generate_session_report({"session_id": "s1", "total_tools_used": 0})
+    assert report["tool_breakdown"] == {} and rebuilt == []
@@ -0,0 +1,31 @@
+import json
+import multiprocessing
+
+WORKERS = 6
+CALLS = 40
+
+def test_concurrent_processes_lose_no_updates(hook, project):
+    stats_store = hook("stats_store")
+    logs = project / ".do.claude" / "logs"
+    logs.mkdir(parents=True, exist_ok=True)
+    (logs / "stats.json").write_text(json.dumps({"total_tools": 10, "successful_tools": 9, "tool_counts": {"bash": 10}}))
+
+    def work(n):
+        for i in range(CALLS):
+            stats_store.record({"tool_name": "bash" if i % 2 else f"tool{n}", "success": i % 4 != 0,
+                                "session_id": "s1", "duration_ms": 1})
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=work, args=(n,)) for n in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    stats = stats_store.load_stats()
+    assert stats["total_tools"] == 10 + WORKERS * CALLS
+    assert stats["successful_tools"] == 9 + WORKERS * CALLS * 3 // 4
+    assert stats["tool_counts"]["bash"] == 10 + WORKERS * CALLS // 2
+    assert all(stats["tool_counts"][f"tool{n}"] == CALLS // 2 for n in range(WORKERS))
+    assert sum(stats_store.session_tool_counts("s1").values()) == WORKERS * CALLS
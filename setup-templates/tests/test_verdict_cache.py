@@ -0,0 +1,49 @@
+import os
+import fcntl
+import json
+
+CUSTOM_POLICY = {
+    "safe": ["^make\\\\s+lint(\\\\s|$)"],
+    "dev": ["^make\\\\s+"],
+    "dangerous": ["terraform\\\\s+destroy", "^\\\\s"]
+}
+
+def _assert_same_verdicts(hook, commands):
+    command_policy = hook("command_policy")
+    verdict_cache = hook("verdict_cache")
+    policy = command_policy.load_policy()
+    for _ in range(2):  # Cold cache, then every command again from the cache
+        for command in commands:
+            assert verdict_cache.classify(policy, command) == policy.classify(command), repr(command)
+    assert verdict_cache.stats()["hits"] > 0
+
+def test_cached_verdict_matches_policy(hook, commands):
+    _assert_same_verdicts(hook, commands)
+
+def test_cached_verdict_matches_custom_policy(hook, project, commands):
+    (project / ".do.claude" / "command_policy.json").write_text(json.dumps(CUSTOM_POLICY))
+    _assert_same_verdicts(hook, commands)
+
+def test_padding_does_not_hide_dangerous_command(hook):
+    command_policy = hook("command_policy")
+    verdict_cache = hook("verdict_cache")
+    policy = command_policy.load_policy()
+    verdict_cache.classify(policy, "ls -la")
+    for command in [" ls -la && sudo rm -rf /", "\techo hi; rm -rf ~", "ls  -la"]:
+        assert verdict_cache.classify(policy, command) == policy.classify(command)
+
+def test_locked_cache_is_bypassed(hook):
+    command_policy = hook("command_policy")
+    verdict_cache = hook("verdict_cache")
+    policy = command_policy.load_policy()
+    verdict_cache.classify(policy, "ls -la")
+
+    # Another process holding the cache file lock must not stall validation
+    holder = os.open(verdict_cache.cache_file(), os.O_RDWR)
+    fcntl.flock(holder, fcntl.LOCK_EX)
+    try:
+        assert verdict_cache.classify(policy, "rm -rf /") == "dangerous"
+        assert verdict_cache.classify(policy, "ls -la") == "safe"
+    finally:
+        os.close(holder)
+    assert verdict_cache.stats()["hits"] == 0